@@ -1,13 +1,12 @@
 from token import RPAR
-from database import SessionLocal
+from database import get_db
 from fastapi import FastAPI, Depends, HTTPException, APIRouter, status, Body, Request
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, ConfigDict
 from typing import Annotated, List
 from models import Users  # Add this import for the Users model
-from passlib.context import CryptContext
 import models
-from auth import get_current_user
+from auth import get_current_user, hash_password
 from datetime import date
 from log import api_log
 
@@ -24,8 +23,6 @@ router = APIRouter(
     dependencies=[Depends(admin_required)]
 )
 
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 dicoAllowToChange = {
     'owner': ['owner', 'admin', 'mod', 'player'],
     'admin': ['mod', 'player'],
@@ -81,13 +78,6 @@ class UserAfterCreation(BaseModel):
     rp_nipol: int
     temp_password: str
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 db_dependency = Annotated[Session, Depends(get_db)]
 user_dependency = Annotated[models.Users, Depends(get_current_user)]
 
@@ -161,7 +151,7 @@ async def delete_user(user_id: int, db: db_dependency, request: Request, current
 async def register_user(user: UserCreate, db: db_dependency, request: Request, current_user: user_dependency):
     # Hash the password
     temp_password = generate_temp_password()
-    hashed_password = bcrypt_context.hash(temp_password)  # Default password, should be changed by user later
+    hashed_password = await hash_password(temp_password)  # Default password, should be changed by user later
     db_user = Users(
         # Entered by user later
         first_name="inconnu",
@@ -193,21 +183,18 @@ async def register_user(user: UserCreate, db: db_dependency, request: Request, c
 
     try:
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
-        new_user = db.query(Users).filter(Users.rp_nipol == db_user.rp_nipol).first()
-        if not new_user:
-            raise HTTPException(status_code=500, detail="User creation failed")
+        db.flush()  # Attribue l'id sans commit intermédiaire: utilisateur et notification dans la même transaction
+        new_user_id, new_user_nipol = db_user.id, db_user.rp_nipol
         db_notifications = models.Notifications(
-            user_id=new_user.id,  # type: ignore
+            user_id=new_user_id,  # type: ignore
             title="Complétez votre inscription",
             message="Rendez-vous dans votre profil pour compléter votre inscription et choisir votre mot de passe. \n Ensuite, un administrateur validera votre inscription.",
             redirect_to="/profile",
         )
         db.add(db_notifications)
         db.commit()
-        api_log("admin.register_user", level="INFO", request=request, tags=["admin", "register_user"], user_id=current_user.id,email=current_user.email,data={"created_user_id": db_user.id, "created_user_nipol": db_user.rp_nipol} ,correlation_id=request.headers.get("x-correlation-id")) # type: ignore
-        return {"id": db_user.id, "rp_nipol": db_user.rp_nipol, "temp_password": temp_password}
+        api_log("admin.register_user", level="INFO", request=request, tags=["admin", "register_user"], user_id=current_user.id,email=current_user.email,data={"created_user_id": new_user_id, "created_user_nipol": new_user_nipol} ,correlation_id=request.headers.get("x-correlation-id")) # type: ignore
+        return {"id": new_user_id, "rp_nipol": new_user_nipol, "temp_password": temp_password}
     except Exception as e:
         db.rollback()
         if db.query(Users).filter(Users.rp_nipol == user.rp_nipol).first():
@@ -271,7 +258,7 @@ async def update_password(user_id: int, db: db_dependency, request: Request, cur
     if user.privileges not in dicoAllowToChange[current_user.privileges]: # type: ignore
         raise HTTPException(status_code=403, detail="Cannot update user with equal or higher privileges")
     temp_password = generate_temp_password()
-    user.password = bcrypt_context.hash(temp_password)  # type: ignore
+    user.password = await hash_password(temp_password)  # type: ignore
     user.temp_password = True # type: ignore
     db.commit()
     api_log("admin.update_password", level="CRITICAL", request=request, tags=["admin", "update_password"], user_id=current_user.id,email=current_user.email,data={"updated_user_id": user.id, "updated_user_nipol": user.rp_nipol} ,correlation_id=request.headers.get("x-correlation-id")) # type: ignore
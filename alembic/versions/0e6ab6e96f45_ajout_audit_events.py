@@ -0,0 +1,49 @@
+"""Ajout table audit_events
+
+Revision ID: 0e6ab6e96f45
+Revises: 1c0220c96c61
+Create Date: 2026-10-19 09:12:41.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0e6ab6e96f45'
+down_revision: Union[str, Sequence[str], None] = '1c0220c96c61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('audit_events',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('event', sa.String(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('email', sa.String(), nullable=True),
+    sa.Column('record_type', sa.String(), nullable=True),
+    sa.Column('record_id', sa.BigInteger(), nullable=True),
+    sa.Column('method', sa.String(), nullable=True),
+    sa.Column('path', sa.String(), nullable=True),
+    sa.Column('client_ip', sa.String(), nullable=True),
+    sa.Column('correlation_id', sa.String(), nullable=True),
+    sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_audit_events_created_at'), 'audit_events', ['created_at'], unique=False)
+    op.create_index('ix_audit_events_user_created_at', 'audit_events', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_audit_events_record_created_at', 'audit_events', ['record_type', 'record_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_audit_events_record_created_at', table_name='audit_events')
+    op.drop_index('ix_audit_events_user_created_at', table_name='audit_events')
+    op.drop_index(op.f('ix_audit_events_created_at'), table_name='audit_events')
+    op.drop_table('audit_events')
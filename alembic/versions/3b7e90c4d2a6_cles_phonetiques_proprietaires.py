@@ -0,0 +1,97 @@
+"""Clés phonétiques des noms sur proprietaires
+
+Revision ID: 3b7e90c4d2a6
+Revises: 9f2d4b7a1c58
+Create Date: 2026-10-19 18:11:05.472930
+
+"""
+from typing import Sequence, Union
+
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7e90c4d2a6'
+down_revision: Union[str, Sequence[str], None] = '9f2d4b7a1c58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 5000
+
+# Copie figée de text_search.phonetic_key (et de normalize) au moment de la migration: un réglage
+# ultérieur de l'algorithme ne doit pas changer les clés écrites en rejouant l'historique
+ACCENTS = "àâäáãåāăąçćčĉďđéèêëēėęěĝğíìîïīįĵķĺľłñńňóòôöõøōőŕřśšşťţúùûüūůűųŵýÿŷźžżÀÂÄÁÃÅĀĂĄÇĆČĈĎĐÉÈÊËĒĖĘĚĜĞÍÌÎÏĪĮĴĶĹĽŁÑŃŇÓÒÔÖÕØŌŐŔŘŚŠŞŤŢÚÙÛÜŪŮŰŲŴÝŸŶŹŽŻ"
+SANS_ACCENTS = "aaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzzaaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzz"
+LIGATURES = (("œ", "oe"), ("Œ", "OE"), ("æ", "ae"), ("Æ", "AE"), ("ß", "ss"))
+PHONETIC_CONSONANTS = [
+    (r"y", "i"), (r"ph", "f"), (r"s?[cs]h", "5"), (r"h", ""),
+    (r"gu(?=[ei])", "k"), (r"g(?=[ei])", "j"), (r"gn", "n"), (r"g", "k"),
+    (r"qu?", "k"), (r"c(?=[ei])", "s"), (r"c", "k"), (r"x$", ""), (r"x", "ks"),
+    (r"w", "v"), (r"z", "s"), (r"bv", "v"),
+]
+PHONETIC_ENDINGS = [(r"[dts]+$", ""), (r"ier$", "ie")]
+PHONETIC_VOWELS = [
+    (r"e?au", "o"), (r"oi", "4"), (r"ou", "3"),
+    (r"(?:ai|ei)[nm](?![aeiou])", "1"), (r"[iu][nm](?![aeiou])", "1"),
+    (r"[ae][nm](?![aeiou])", "2"), (r"o[nm](?![aeiou])", "6"),
+    (r"ai|ei", "e"), (r"eu|oe", "9"), (r"(?<=.)e+$", ""),
+]
+
+
+def _apply(rules, text):
+    for pattern, replacement in rules:
+        text = re.sub(pattern, replacement, text)
+    return text
+
+
+def phonetic_key(text):
+    if text is None:
+        return None
+    text = str(text).replace("ç", "s").replace("Ç", "S")
+    for ligature, replacement in LIGATURES:
+        text = text.replace(ligature, replacement)
+    word = re.sub(r"[^a-z]+", "", text.translate(str.maketrans(ACCENTS, SANS_ACCENTS)).lower())
+    if not word:
+        return None
+    word = re.sub(r"(.)\1+", r"\1", _apply(PHONETIC_CONSONANTS, word))
+    word = _apply(PHONETIC_VOWELS, _apply(PHONETIC_ENDINGS, word))
+    return re.sub(r"(.)\1+", r"\1", word) or None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('proprietaires', sa.Column('nom_phonetique', sa.String(), nullable=True))
+    op.add_column('proprietaires', sa.Column('nom_usage_phonetique', sa.String(), nullable=True))
+    op.add_column('proprietaires', sa.Column('prenom_phonetique', sa.String(), nullable=True))
+
+    # Clés calculées en Python (pas d'équivalent SQL), par lots sur l'id; index créés après le remplissage
+    bind = op.get_bind()
+    update = sa.text("UPDATE proprietaires SET nom_phonetique = :nom, nom_usage_phonetique = :nom_usage, prenom_phonetique = :prenom WHERE id = :id")
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text("SELECT id, nom_famille, nom_usage, prenom FROM proprietaires WHERE id > :last_id ORDER BY id LIMIT :batch"),
+            {"last_id": last_id, "batch": BACKFILL_BATCH},
+        ).all()
+        if not rows:
+            break
+        bind.execute(update, [
+            {"id": row.id, "nom": phonetic_key(row.nom_famille), "nom_usage": phonetic_key(row.nom_usage), "prenom": phonetic_key(row.prenom)}
+            for row in rows
+        ])
+        last_id = rows[-1].id
+
+    op.create_index('ix_proprietaires_nom_phonetique', 'proprietaires', ['nom_phonetique', 'prenom_phonetique'], unique=False)
+    op.create_index('ix_proprietaires_nom_usage_phonetique', 'proprietaires', ['nom_usage_phonetique', 'prenom_phonetique'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_proprietaires_nom_usage_phonetique', table_name='proprietaires')
+    op.drop_index('ix_proprietaires_nom_phonetique', table_name='proprietaires')
+    op.drop_column('proprietaires', 'prenom_phonetique')
+    op.drop_column('proprietaires', 'nom_usage_phonetique')
+    op.drop_column('proprietaires', 'nom_phonetique')
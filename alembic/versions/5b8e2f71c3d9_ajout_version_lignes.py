@@ -0,0 +1,33 @@
+"""Ajout colonne version (ETag) sur les fichiers
+
+Revision ID: 5b8e2f71c3d9
+Revises: 0e6ab6e96f45
+Create Date: 2026-10-19 11:04:27.531920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e2f71c3d9'
+down_revision: Union[str, Sequence[str], None] = '0e6ab6e96f45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('proprietaires', 'fnpc', 'infractions_routieres', 'fpr', 'siv')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # server_default constant: PostgreSQL ajoute la colonne sans réécrire la table
+    for table in TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(TABLES):
+        op.drop_column(table, 'version')
@@ -0,0 +1,77 @@
+"""Suivi des modifications: updated_at et table deleted_records
+
+Revision ID: 6c1f3e8a9b52
+Revises: d41a6c2f8e07
+Create Date: 2026-10-19 20:14:51.093627
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c1f3e8a9b52'
+down_revision: Union[str, Sequence[str], None] = 'd41a6c2f8e07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('proprietaires', 'fnpc', 'infractions_routieres', 'fpr', 'siv')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('deleted_records',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('record_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_deleted_records_table_name_deleted_at', 'deleted_records', ['table_name', 'deleted_at'], unique=False)
+    # clock_timestamp() et non now(): l'heure de l'écriture, pas celle du début de la transaction,
+    # pour que l'écart avec l'heure du commit reste dans la fenêtre de recouvrement du flux
+    op.execute("""
+        CREATE FUNCTION touch_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := clock_timestamp();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE FUNCTION record_deletion() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO deleted_records (table_name, record_id, deleted_at) VALUES (TG_TABLE_NAME, OLD.id, clock_timestamp());
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in TABLES:
+        # Valeur par défaut constante pour les lignes existantes: pas de réécriture de la table
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+        op.create_index(op.f(f'ix_{table}_updated_at'), table, ['updated_at'], unique=False)
+        op.execute(f"""
+            CREATE TRIGGER {table}_updated_at
+            BEFORE INSERT OR UPDATE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION touch_updated_at()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_deletion
+            AFTER DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION record_deletion()
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(TABLES):
+        op.execute(f"DROP TRIGGER {table}_deletion ON {table}")
+        op.execute(f"DROP TRIGGER {table}_updated_at ON {table}")
+        op.drop_index(op.f(f'ix_{table}_updated_at'), table_name=table)
+        op.drop_column(table, 'updated_at')
+    op.execute("DROP FUNCTION record_deletion()")
+    op.execute("DROP FUNCTION touch_updated_at()")
+    op.drop_index('ix_deleted_records_table_name_deleted_at', table_name='deleted_records')
+    op.drop_table('deleted_records')
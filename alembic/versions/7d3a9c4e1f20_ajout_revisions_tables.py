@@ -0,0 +1,55 @@
+"""Ajout table_revisions et triggers de révision
+
+Revision ID: 7d3a9c4e1f20
+Revises: 5b8e2f71c3d9
+Create Date: 2026-10-19 14:22:09.481337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3a9c4e1f20'
+down_revision: Union[str, Sequence[str], None] = '5b8e2f71c3d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('proprietaires', 'fnpc', 'infractions_routieres', 'fpr', 'siv')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('table_revisions',
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('revision', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    # Trigger par instruction (et non par ligne): un seul UPDATE de table_revisions par écriture,
+    # même pour un COPY ou un UPDATE de masse
+    op.execute("""
+        CREATE FUNCTION bump_table_revision() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO table_revisions (table_name, revision) VALUES (TG_TABLE_NAME, 1)
+            ON CONFLICT (table_name) DO UPDATE SET revision = table_revisions.revision + 1;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in TABLES:
+        op.execute(f"INSERT INTO table_revisions (table_name, revision) VALUES ('{table}', 0)")
+        op.execute(f"""
+            CREATE TRIGGER {table}_revision
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_table_revision()
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(TABLES):
+        op.execute(f"DROP TRIGGER {table}_revision ON {table}")
+    op.execute("DROP FUNCTION bump_table_revision()")
+    op.drop_table('table_revisions')
@@ -0,0 +1,36 @@
+"""Recherche approchée des noms: pg_trgm et colonne nom_recherche sur proprietaires
+
+Revision ID: 9f2d4b7a1c58
+Revises: e5b09d7c3a61
+Create Date: 2026-10-19 17:02:44.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f2d4b7a1c58'
+down_revision: Union[str, Sequence[str], None] = 'e5b09d7c3a61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Copie figée de text_search.sql_normalize(models.NOM_RECHERCHE_SOURCE) au moment de la migration
+NOM_RECHERCHE = "btrim(regexp_replace(lower(translate(replace(replace(replace(replace(replace(coalesce(nom_famille, '') || ' ' || coalesce(nom_usage, '') || ' ' || coalesce(prenom, '') || ' ' || coalesce(second_prenom, ''), 'œ', 'oe'), 'Œ', 'OE'), 'æ', 'ae'), 'Æ', 'AE'), 'ß', 'ss'), 'àâäáãåāăąçćčĉďđéèêëēėęěĝğíìîïīįĵķĺľłñńňóòôöõøōőŕřśšşťţúùûüūůűųŵýÿŷźžżÀÂÄÁÃÅĀĂĄÇĆČĈĎĐÉÈÊËĒĖĘĚĜĞÍÌÎÏĪĮĴĶĹĽŁÑŃŇÓÒÔÖÕØŌŐŔŘŚŠŞŤŢÚÙÛÜŪŮŰŲŴÝŸŶŹŽŻ', 'aaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzzaaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzz')), '[^a-z0-9]+', ' ', 'g'))"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Extension contrib: nécessite les droits de création d'extension sur la base
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Colonne générée STORED: réécriture de la table proprietaires au moment de la migration
+    op.add_column('proprietaires', sa.Column('nom_recherche', sa.String(), sa.Computed(NOM_RECHERCHE, persisted=True), nullable=True))
+    op.create_index('ix_proprietaires_nom_recherche_trgm', 'proprietaires', ['nom_recherche'], unique=False, postgresql_using='gin', postgresql_ops={'nom_recherche': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_proprietaires_nom_recherche_trgm', table_name='proprietaires', postgresql_using='gin')
+    op.drop_column('proprietaires', 'nom_recherche')
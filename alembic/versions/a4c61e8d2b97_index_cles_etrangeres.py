@@ -0,0 +1,40 @@
+"""Index sur les clés étrangères (dossier d'une personne)
+
+Revision ID: a4c61e8d2b97
+Revises: 7d3a9c4e1f20
+Create Date: 2026-10-19 15:03:51.772014
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c61e8d2b97'
+down_revision: Union[str, Sequence[str], None] = '7d3a9c4e1f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, colonne): colonnes lues par les IN (...) de selectinload
+INDEXES = (
+    ('fnpc', 'prop_id'),
+    ('infractions_routieres', 'neph'),
+    ('fpr', 'prop_id'),
+    ('fpr', 'neph'),
+    ('siv', 'prop_id'),
+    ('siv', 'co_prop_id'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in INDEXES:
+        op.create_index(op.f(f'ix_{table}_{column}'), table, [column], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in reversed(INDEXES):
+        op.drop_index(op.f(f'ix_{table}_{column}'), table_name=table)
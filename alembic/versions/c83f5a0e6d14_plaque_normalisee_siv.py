@@ -0,0 +1,31 @@
+"""Plaque normalisée (colonne générée) sur siv
+
+Revision ID: c83f5a0e6d14
+Revises: a4c61e8d2b97
+Create Date: 2026-10-19 15:41:12.093855
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c83f5a0e6d14'
+down_revision: Union[str, Sequence[str], None] = 'a4c61e8d2b97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Colonne générée STORED: réécriture de la table siv au moment de la migration
+    op.add_column('siv', sa.Column('ci_plaque_normalisee', sa.String(), sa.Computed("upper(regexp_replace(ci_numero_immatriculation, '[^A-Za-z0-9]', '', 'g'))", persisted=True), nullable=True))
+    op.create_index(op.f('ix_siv_ci_plaque_normalisee'), 'siv', ['ci_plaque_normalisee'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_siv_ci_plaque_normalisee'), table_name='siv')
+    op.drop_column('siv', 'ci_plaque_normalisee')
@@ -0,0 +1,54 @@
+"""Index dénormalisé de l'omnibox: table search_documents
+
+Revision ID: d41a6c2f8e07
+Revises: 3b7e90c4d2a6
+Create Date: 2026-10-19 19:03:27.851164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41a6c2f8e07'
+down_revision: Union[str, Sequence[str], None] = '3b7e90c4d2a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Copie figée de search_index.Source.insert_sql("true") pour chaque source au moment de la migration
+SEARCH_DOCUMENTS = [
+    # proprietaire
+    "INSERT INTO search_documents (kind, record_id, cle, libelle) SELECT kind, record_id, cle, libelle FROM (SELECT 'proprietaire' AS kind, id AS record_id, replace(btrim(regexp_replace(lower(translate(replace(replace(replace(replace(replace(coalesce(nom_famille, '') || ' ' || coalesce(prenom, ''), 'œ', 'oe'), 'Œ', 'OE'), 'æ', 'ae'), 'Æ', 'AE'), 'ß', 'ss'), 'àâäáãåāăąçćčĉďđéèêëēėęěĝğíìîïīįĵķĺľłñńňóòôöõøōőŕřśšşťţúùûüūůűųŵýÿŷźžżÀÂÄÁÃÅĀĂĄÇĆČĈĎĐÉÈÊËĒĖĘĚĜĞÍÌÎÏĪĮĴĶĹĽŁÑŃŇÓÒÔÖÕØŌŐŔŘŚŠŞŤŢÚÙÛÜŪŮŰŲŴÝŸŶŹŽŻ', 'aaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzzaaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzz')), '[^a-z0-9]+', ' ', 'g')), ' ', '') AS cle, concat_ws(' ', nom_famille, prenom, '(' || to_char(date_naissance, 'DD/MM/YYYY') || ')') AS libelle FROM proprietaires WHERE true UNION SELECT 'proprietaire' AS kind, id AS record_id, replace(btrim(regexp_replace(lower(translate(replace(replace(replace(replace(replace(coalesce(nom_usage, '') || ' ' || coalesce(prenom, ''), 'œ', 'oe'), 'Œ', 'OE'), 'æ', 'ae'), 'Æ', 'AE'), 'ß', 'ss'), 'àâäáãåāăąçćčĉďđéèêëēėęěĝğíìîïīįĵķĺľłñńňóòôöõøōőŕřśšşťţúùûüūůűųŵýÿŷźžżÀÂÄÁÃÅĀĂĄÇĆČĈĎĐÉÈÊËĒĖĘĚĜĞÍÌÎÏĪĮĴĶĹĽŁÑŃŇÓÒÔÖÕØŌŐŔŘŚŠŞŤŢÚÙÛÜŪŮŰŲŴÝŸŶŹŽŻ', 'aaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzzaaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzz')), '[^a-z0-9]+', ' ', 'g')), ' ', '') AS cle, concat_ws(' ', nom_famille, prenom, '(' || to_char(date_naissance, 'DD/MM/YYYY') || ')') AS libelle FROM proprietaires WHERE true UNION SELECT 'proprietaire' AS kind, id AS record_id, replace(btrim(regexp_replace(lower(translate(replace(replace(replace(replace(replace(coalesce(prenom, '') || ' ' || coalesce(nom_famille, ''), 'œ', 'oe'), 'Œ', 'OE'), 'æ', 'ae'), 'Æ', 'AE'), 'ß', 'ss'), 'àâäáãåāăąçćčĉďđéèêëēėęěĝğíìîïīįĵķĺľłñńňóòôöõøōőŕřśšşťţúùûüūůűųŵýÿŷźžżÀÂÄÁÃÅĀĂĄÇĆČĈĎĐÉÈÊËĒĖĘĚĜĞÍÌÎÏĪĮĴĶĹĽŁÑŃŇÓÒÔÖÕØŌŐŔŘŚŠŞŤŢÚÙÛÜŪŮŰŲŴÝŸŶŹŽŻ', 'aaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzzaaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzz')), '[^a-z0-9]+', ' ', 'g')), ' ', '') AS cle, concat_ws(' ', nom_famille, prenom, '(' || to_char(date_naissance, 'DD/MM/YYYY') || ')') AS libelle FROM proprietaires WHERE true) documents WHERE cle <> ''",
+    # siv
+    "INSERT INTO search_documents (kind, record_id, cle, libelle) SELECT kind, record_id, cle, libelle FROM (SELECT 'siv' AS kind, id AS record_id, replace(btrim(regexp_replace(lower(translate(replace(replace(replace(replace(replace(ci_numero_immatriculation, 'œ', 'oe'), 'Œ', 'OE'), 'æ', 'ae'), 'Æ', 'AE'), 'ß', 'ss'), 'àâäáãåāăąçćčĉďđéèêëēėęěĝğíìîïīįĵķĺľłñńňóòôöõøōőŕřśšşťţúùûüūůűųŵýÿŷźžżÀÂÄÁÃÅĀĂĄÇĆČĈĎĐÉÈÊËĒĖĘĚĜĞÍÌÎÏĪĮĴĶĹĽŁÑŃŇÓÒÔÖÕØŌŐŔŘŚŠŞŤŢÚÙÛÜŪŮŰŲŴÝŸŶŹŽŻ', 'aaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzzaaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzz')), '[^a-z0-9]+', ' ', 'g')), ' ', '') AS cle, concat_ws(' ', ci_numero_immatriculation, vl_marque, vl_denomination_commerciale) AS libelle FROM siv WHERE true) documents WHERE cle <> ''",
+    # fnpc
+    "INSERT INTO search_documents (kind, record_id, cle, libelle) SELECT kind, record_id, cle, libelle FROM (SELECT 'fnpc' AS kind, id AS record_id, replace(btrim(regexp_replace(lower(translate(replace(replace(replace(replace(replace(neph::text, 'œ', 'oe'), 'Œ', 'OE'), 'æ', 'ae'), 'Æ', 'AE'), 'ß', 'ss'), 'àâäáãåāăąçćčĉďđéèêëēėęěĝğíìîïīįĵķĺľłñńňóòôöõøōőŕřśšşťţúùûüūůűųŵýÿŷźžżÀÂÄÁÃÅĀĂĄÇĆČĈĎĐÉÈÊËĒĖĘĚĜĞÍÌÎÏĪĮĴĶĹĽŁÑŃŇÓÒÔÖÕØŌŐŔŘŚŠŞŤŢÚÙÛÜŪŮŰŲŴÝŸŶŹŽŻ', 'aaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzzaaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzz')), '[^a-z0-9]+', ' ', 'g')), ' ', '') AS cle, concat_ws(' ', 'Permis', numero_titre, '- NEPH', neph) AS libelle FROM fnpc WHERE true UNION SELECT 'fnpc' AS kind, id AS record_id, replace(btrim(regexp_replace(lower(translate(replace(replace(replace(replace(replace(numero_titre, 'œ', 'oe'), 'Œ', 'OE'), 'æ', 'ae'), 'Æ', 'AE'), 'ß', 'ss'), 'àâäáãåāăąçćčĉďđéèêëēėęěĝğíìîïīįĵķĺľłñńňóòôöõøōőŕřśšşťţúùûüūůűųŵýÿŷźžżÀÂÄÁÃÅĀĂĄÇĆČĈĎĐÉÈÊËĒĖĘĚĜĞÍÌÎÏĪĮĴĶĹĽŁÑŃŇÓÒÔÖÕØŌŐŔŘŚŠŞŤŢÚÙÛÜŪŮŰŲŴÝŸŶŹŽŻ', 'aaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzzaaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzz')), '[^a-z0-9]+', ' ', 'g')), ' ', '') AS cle, concat_ws(' ', 'Permis', numero_titre, '- NEPH', neph) AS libelle FROM fnpc WHERE true) documents WHERE cle <> ''",
+    # user
+    "INSERT INTO search_documents (kind, record_id, cle, libelle) SELECT kind, record_id, cle, libelle FROM (SELECT 'user' AS kind, id AS record_id, replace(btrim(regexp_replace(lower(translate(replace(replace(replace(replace(replace(rp_nipol, 'œ', 'oe'), 'Œ', 'OE'), 'æ', 'ae'), 'Æ', 'AE'), 'ß', 'ss'), 'àâäáãåāăąçćčĉďđéèêëēėęěĝğíìîïīįĵķĺľłñńňóòôöõøōőŕřśšşťţúùûüūůűųŵýÿŷźžżÀÂÄÁÃÅĀĂĄÇĆČĈĎĐÉÈÊËĒĖĘĚĜĞÍÌÎÏĪĮĴĶĹĽŁÑŃŇÓÒÔÖÕØŌŐŔŘŚŠŞŤŢÚÙÛÜŪŮŰŲŴÝŸŶŹŽŻ', 'aaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzzaaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzz')), '[^a-z0-9]+', ' ', 'g')), ' ', '') AS cle, concat_ws(' ', rp_nipol, rp_grade, rp_last_name, rp_first_name) AS libelle FROM users WHERE true UNION SELECT 'user' AS kind, id AS record_id, replace(btrim(regexp_replace(lower(translate(replace(replace(replace(replace(replace(coalesce(rp_last_name, '') || ' ' || coalesce(rp_first_name, ''), 'œ', 'oe'), 'Œ', 'OE'), 'æ', 'ae'), 'Æ', 'AE'), 'ß', 'ss'), 'àâäáãåāăąçćčĉďđéèêëēėęěĝğíìîïīįĵķĺľłñńňóòôöõøōőŕřśšşťţúùûüūůűųŵýÿŷźžżÀÂÄÁÃÅĀĂĄÇĆČĈĎĐÉÈÊËĒĖĘĚĜĞÍÌÎÏĪĮĴĶĹĽŁÑŃŇÓÒÔÖÕØŌŐŔŘŚŠŞŤŢÚÙÛÜŪŮŰŲŴÝŸŶŹŽŻ', 'aaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzzaaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzz')), '[^a-z0-9]+', ' ', 'g')), ' ', '') AS cle, concat_ws(' ', rp_nipol, rp_grade, rp_last_name, rp_first_name) AS libelle FROM users WHERE true) documents WHERE cle <> ''",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('search_documents',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('record_id', sa.Integer(), nullable=False),
+    sa.Column('cle', sa.String(), nullable=False),
+    sa.Column('libelle', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Remplissage en SQL (requêtes de la mise à jour incrémentale à cette révision), index créés ensuite
+    for statement in SEARCH_DOCUMENTS:
+        op.execute(statement)
+    op.create_index('ix_search_documents_cle', 'search_documents', ['cle'], unique=False, postgresql_ops={'cle': 'text_pattern_ops'})
+    op.create_index('ix_search_documents_kind_record_id', 'search_documents', ['kind', 'record_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_search_documents_kind_record_id', table_name='search_documents')
+    op.drop_index('ix_search_documents_cle', table_name='search_documents')
+    op.drop_table('search_documents')
@@ -0,0 +1,37 @@
+"""Index composites pour les recherches par clé naturelle
+
+Revision ID: e5b09d7c3a61
+Revises: c83f5a0e6d14
+Create Date: 2026-10-19 16:18:37.640129
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b09d7c3a61'
+down_revision: Union[str, Sequence[str], None] = 'c83f5a0e6d14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_proprietaires_identite', 'proprietaires', [sa.text('lower(nom_famille)'), sa.text('lower(prenom)'), 'date_naissance'], unique=False)
+    # Les index composites couvrent aussi les recherches sur leur première colonne seule
+    op.create_index('ix_fpr_prop_id_date_enregistrement', 'fpr', ['prop_id', 'date_enregistrement'], unique=False)
+    op.create_index('ix_fpr_neph_date_enregistrement', 'fpr', ['neph', 'date_enregistrement'], unique=False)
+    op.drop_index(op.f('ix_fpr_prop_id'), table_name='fpr')
+    op.drop_index(op.f('ix_fpr_neph'), table_name='fpr')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_fpr_neph'), 'fpr', ['neph'], unique=False)
+    op.create_index(op.f('ix_fpr_prop_id'), 'fpr', ['prop_id'], unique=False)
+    op.drop_index('ix_fpr_neph_date_enregistrement', table_name='fpr')
+    op.drop_index('ix_fpr_prop_id_date_enregistrement', table_name='fpr')
+    op.drop_index('ix_proprietaires_identite', table_name='proprietaires')
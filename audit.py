@@ -0,0 +1,193 @@
+from datetime import datetime
+import os
+import queue
+import threading
+import time
+from typing import Annotated, Any, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from database import engine, get_db
+import models
+from auth import get_current_user
+from log import api_log, add_audit_sink, remove_audit_sink
+from metrics import LOG_QUEUE_DEPTH, LOG_QUEUE_DROPPED
+
+# Micro-batch: on écrit toutes les AUDIT_FLUSH_MS ou dès AUDIT_BATCH_SIZE évènements,
+# en un seul INSERT multi-lignes, jamais un commit par requête.
+AUDIT_ENABLED = os.getenv("AUDIT_ENABLED", "true").lower() == "true"
+AUDIT_FLUSH_MS = int(os.getenv("AUDIT_FLUSH_MS", "500"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+AUDIT_QUEUE_MAX = int(os.getenv("AUDIT_QUEUE_MAX", "10000"))
+
+
+class AuditBatcher:
+    """Accumule les évènements d'audit en mémoire et les écrit par lots depuis un thread dédié."""
+
+    def __init__(self, flush_interval_ms: int, batch_size: int, max_queue: int) -> None:
+        self._flush_interval = flush_interval_ms / 1000
+        self._batch_size = max(1, batch_size)
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, row: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            # Mieux vaut perdre une trace que bloquer une lecture
+            LOG_QUEUE_DROPPED.inc()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-batcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        # Vide ce qui reste (arrêt propre du worker)
+        self._write(self._drain(len(self._queue.queue)))
+
+    def _drain(self, limit: int) -> List[Dict[str, Any]]:
+        rows: List[Dict[str, Any]] = []
+        while len(rows) < limit:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            rows: List[Dict[str, Any]] = []
+            deadline = time.monotonic() + self._flush_interval
+            while len(rows) < self._batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    rows.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+                rows.extend(self._drain(self._batch_size - len(rows)))
+            self._write(rows)
+            LOG_QUEUE_DEPTH.set(self.depth)
+
+    def _write(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(models.AuditEvents).values(rows))
+        except Exception as e:
+            api_log("audit.flush.failed", level="ERROR", data={"lost_events": len(rows)}, err=e)
+
+
+batcher = AuditBatcher(AUDIT_FLUSH_MS, AUDIT_BATCH_SIZE, AUDIT_QUEUE_MAX)
+
+
+def _audit_sink(event: Dict[str, Any]) -> None:
+    data = event.get("data") or {}
+    req = event.get("request") or {}
+    record_id = data.get("record_id")
+    batcher.submit({
+        "created_at": event["ts"],
+        "event": event["event"],
+        "user_id": event.get("user_id"),
+        "email": event.get("email"),
+        "record_type": event["event"].split(".", 1)[0],
+        "record_id": record_id if isinstance(record_id, int) else None,
+        "method": req.get("method"),
+        "path": req.get("path"),
+        "client_ip": req.get("client_ip"),
+        "correlation_id": event.get("correlation_id"),
+        "data": data or None,
+    })
+
+
+def start() -> None:
+    if not AUDIT_ENABLED:
+        return
+    add_audit_sink(_audit_sink)
+    batcher.start()
+
+
+def stop() -> None:
+    remove_audit_sink(_audit_sink)
+    batcher.stop()
+
+
+# ---------- Consultation du journal d'audit ----------
+def connection_required(current_user: Annotated[models.Users, Depends(get_current_user)]):
+    can_use = ["admin", "owner"]
+    if not current_user:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    if current_user.privileges not in can_use:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    return current_user
+
+router = APIRouter(
+    prefix="/audit",
+    tags=["audit"],
+    dependencies=[Depends(connection_required)]
+)
+
+class AuditEventPublic(BaseModel):
+    id: int
+    created_at: datetime
+    event: str
+    user_id: int | None = None
+    email: str | None = None
+    record_type: str | None = None
+    record_id: int | None = None
+    method: str | None = None
+    path: str | None = None
+    client_ip: str | None = None
+    correlation_id: str | None = None
+    data: Dict[str, Any] | None = None
+    model_config = ConfigDict(from_attributes=True)
+
+db_dependency = Annotated[Session, Depends(get_db)]
+user_dependency = Annotated[models.Users, Depends(get_current_user)]
+
+@router.get("/events/", response_model=List[AuditEventPublic])
+async def read_audit_events(
+    db: db_dependency,
+    user: user_dependency,
+    request: Request,
+    user_id: int | None = None,
+    record_type: str | None = None,
+    record_id: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
+    if record_id is not None and record_type is None:
+        raise HTTPException(status_code=400, detail="record_id requires record_type")
+    # Les filtres suivent l'ordre des index (user_id, created_at) / (record_type, record_id, created_at)
+    query = db.query(models.AuditEvents)
+    if user_id is not None:
+        query = query.filter(models.AuditEvents.user_id == user_id)
+    if record_type is not None:
+        query = query.filter(models.AuditEvents.record_type == record_type)
+    if record_id is not None:
+        query = query.filter(models.AuditEvents.record_id == record_id)
+    if since is not None:
+        query = query.filter(models.AuditEvents.created_at >= since)
+    if until is not None:
+        query = query.filter(models.AuditEvents.created_at < until)
+    events = query.order_by(models.AuditEvents.created_at.desc()).limit(limit).all()
+    api_log("audit.read", level="INFO", request=request, email=user.email, user_id=user.id, tags=["audit", "list"], data={"filter_user_id": user_id, "record_type": record_type, "record_id": record_id}, correlation_id=request.headers.get("x-correlation-id")) # type: ignore
+    return events
@@ -1,18 +1,23 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import Date, DateTime
+from sqlalchemy.orm import Session, make_transient_to_detached
 from starlette import status
-from database import SessionLocal
+from database import get_db
 from models import Users
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
+import orjson
 from dotenv import load_dotenv
 import os
 from log import api_log
+from metrics import track_bcrypt
+import cache_backend
 from typing import Literal, cast
 
 load_dotenv()
@@ -27,6 +32,11 @@ ALGORITHM = "HS256"
 
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 30
+# Durée de vie des utilisateurs en cache pour get_current_user (invalidés à chaque modification).
+# Uniquement avec un cache partagé (CACHE_BACKEND=redis): en mémoire, une suspension, une déconnexion
+# forcée (token_version) ou un changement de privilèges ne serait vu que du worker qui l'a enregistré.
+AUTH_USER_CACHE_TTL_S = float(os.getenv("AUTH_USER_CACHE_TTL_S", "60"))
+AUTH_USER_CACHE_ENABLED = cache_backend.SHARED and AUTH_USER_CACHE_TTL_S > 0
 
 # Cookies config
 COOKIE_SECURE = os.getenv("COOKIE_SECURE", "true").lower() == "true"
@@ -44,13 +54,6 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 db_dependency = Annotated[Session, Depends(get_db)]
 
 # ---------- utils tokens ----------
@@ -65,18 +68,29 @@ def create_access_token(nipol: str, user_id: int, token_version: int) -> str:
 def create_refresh_token(nipol: str, user_id: int, token_version: int) -> str:
     return _create_token({"sub": nipol, "id": user_id, "ver": token_version}, timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
 
-def authenticate_user(nipol: str, password: str, db: Session):
+# ---------- utils bcrypt ----------
+# bcrypt est volontairement lent (~200 ms): exécuté dans le threadpool pour ne pas bloquer
+# la boucle d'évènements pendant une vague de connexions.
+async def verify_password(password: str, hashed: str) -> bool:
+    with track_bcrypt("verify"):
+        return await run_in_threadpool(bcrypt_context.verify, password, hashed)
+
+async def hash_password(password: str) -> str:
+    with track_bcrypt("hash"):
+        return await run_in_threadpool(bcrypt_context.hash, password)
+
+async def authenticate_user(nipol: str, password: str, db: Session):
     user = db.query(Users).filter(Users.rp_nipol == nipol).first()
     if not user:
         return False
-    if not bcrypt_context.verify(password, user.password): # type: ignore
+    if not await verify_password(password, user.password): # type: ignore
         return False
     return user
 
 # ---------- Login ----------
 @router.post("/token", response_model=Token)
 async def login_for_acces_token(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: db_dependency, request: Request):
-    user = authenticate_user(form_data.username, form_data.password, db)
+    user = await authenticate_user(form_data.username, form_data.password, db)
     if not user:
         api_log("login.failed", level="INFO", request=request, tags=["auth", "login"], email=form_data.username, correlation_id=request.headers.get("x-correlation-id")) # type: ignore
         raise HTTPException(
@@ -147,6 +161,57 @@ async def logout():
     resp.delete_cookie("refresh_token", path="/")
     return resp
 
+# ---------- cache des utilisateurs ----------
+# Colonnes de users en cache, sans le hash du mot de passe (chargé à la demande si une route le lit)
+_USER_CACHE_COLUMNS = [column for column in Users.__table__.columns if column.key != "password"]
+
+
+def _user_tags(user: Users) -> list:
+    return [f"users:{user.id}"]
+
+
+cache_backend.register_tagger(Users, _user_tags)
+
+
+def _encode_user(user: Users) -> bytes:
+    return orjson.dumps({column.key: getattr(user, column.key) for column in _USER_CACHE_COLUMNS})
+
+
+def _decode_user(db: Session, value: bytes) -> Users:
+    data = orjson.loads(value)
+    for column in _USER_CACHE_COLUMNS:
+        raw = data.get(column.key)
+        if raw is not None and isinstance(column.type, DateTime):
+            data[column.key] = datetime.fromisoformat(raw)
+        elif raw is not None and isinstance(column.type, Date):
+            data[column.key] = date.fromisoformat(raw)
+    user = Users(**data)
+    # Objet "comme chargé par une requête": rattaché à la session sans SELECT
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+async def _load_user(db: Session, nipol: str, user_id: int) -> Users | None:
+    if not AUTH_USER_CACHE_ENABLED:
+        return db.query(Users).filter(Users.rp_nipol == nipol, Users.id == user_id).first()
+    key = f"user:{user_id}"
+    loaded: list = []
+
+    def build() -> bytes | None:
+        user = db.query(Users).filter(Users.rp_nipol == nipol, Users.id == user_id).first()
+        if user is None:
+            return None
+        loaded.append(user)
+        return _encode_user(user)
+
+    value, _hit = await cache_backend.get_or_build(key, build, AUTH_USER_CACHE_TTL_S, [f"users:{user_id}"])
+    if loaded:
+        return loaded[0]
+    if value is None:
+        return None
+    user = _decode_user(db, value)
+    return user if user.rp_nipol == nipol else None
+
 # ---------- get_current_user : Lit l'acces Token et renvoie l'utilisateur ----------
 async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)], db: db_dependency):
     try:
@@ -166,7 +231,7 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)], db: db
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user = db.query(Users).filter(Users.rp_nipol == nipol, Users.id == user_id).first()
+    user = await _load_user(db, nipol, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,105 @@
+"""Benchmark de l'encodage JSON des réponses: JSONResponse (json stdlib) contre ORJSONResponse.
+
+Mesure le rendu du corps pour des listes déjà passées par le response_model (c'est ce que reçoit la
+classe de réponse), sur des schémas avec dates et datetimes, et vérifie que les octets sont identiques.
+
+    python -m benchmarks.bench_json --rows 5000
+    python -m benchmarks.bench_json --endpoints      # + temps de bout en bout des grosses listes (TestClient, base générée)
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+import timeit
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# Routes de liste qui passent encore par la classe de réponse par défaut
+LIST_ENDPOINTS = [
+    "/admin/users/",
+    "/proprietaires/read/",
+    "/fpr/read/",
+    "/infractions/read/",
+    "/notifications_public/notifications/get_all/",
+]
+
+
+def jsonable_payloads(rows: int) -> Dict[str, List[Any]]:
+    """Contenu tel que produit par serialize_response (dates en chaînes ISO) pour plusieurs schémas."""
+    from typing import List as ListType
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+
+    import models
+    from admin import UserAdminView
+    from benchmarks.seed import COLUMNS, Plan, gen_fnpc, gen_notifications, gen_proprietaires, gen_siv, gen_users
+    from notifications_public import NotificationPublic
+    from public import fnpcPublic, proprietairePublic, sivPublic
+
+    plan = Plan(1.0, {table: 1 for table in COLUMNS}, 10**11)
+    plan.counts = {table: rows for table in plan.counts}
+    payloads = {}
+    for name, schema, model, table, generator, args in [
+        ("fnpcPublic", fnpcPublic, models.fnpc, "fnpc", gen_fnpc, ()),
+        ("sivPublic", sivPublic, models.siv, "siv", gen_siv, ()),
+        ("proprietairePublic", proprietairePublic, models.Proprietaires, "proprietaires", gen_proprietaires, ()),
+        ("UserAdminView", UserAdminView, models.Users, "users", gen_users, ("<hash>",)),
+        ("NotificationPublic", NotificationPublic, models.Notifications, "notifications", gen_notifications, ()),
+    ]:
+        objects = [model(**dict(zip(COLUMNS[table], row))) for row in generator(plan, random.Random(0), *args)]
+        field = create_model_field(name="Response", type_=ListType[schema], mode="serialization")
+        payloads[name] = asyncio.run(serialize_response(field=field, response_content=objects))
+    return payloads
+
+
+def run_render(rows: int, repeat: int) -> None:
+    from fastapi.responses import JSONResponse, ORJSONResponse
+
+    for name, content in jsonable_payloads(rows).items():
+        stdlib_body = JSONResponse(content).body
+        orjson_body = ORJSONResponse(content).body
+        assert stdlib_body == orjson_body, f"{name}: orjson output differs"
+        stdlib = min(timeit.repeat(lambda: JSONResponse(content), number=1, repeat=repeat))
+        fast = min(timeit.repeat(lambda: ORJSONResponse(content), number=1, repeat=repeat))
+        print(f"{name:<20}{rows:>7} rows {len(stdlib_body) / 1024:9.0f} KiB   json {stdlib * 1000:8.2f} ms   "
+              f"orjson {fast * 1000:7.2f} ms   x{stdlib / fast:5.1f}")
+
+
+def run_endpoints(repeat: int) -> None:
+    from fastapi.testclient import TestClient
+    from benchmarks.http_bench import BENCH_NIPOL, BENCH_PASSWORD, ensure_bench_user
+    import main
+
+    ensure_bench_user()
+    response_class = main.app.router.default_response_class
+    print(f"default_response_class: {getattr(response_class, 'value', response_class).__name__}")  # DefaultPlaceholder si non configurée
+    with TestClient(main.app) as client:
+        token = client.post("/auth/token", data={"username": BENCH_NIPOL, "password": BENCH_PASSWORD}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        for path in LIST_ENDPOINTS:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                response = client.get(path, headers=headers)
+                timings.append(time.perf_counter() - start)
+            print(f"{path:<50}{response.status_code:>5} {len(response.content) / 1024:9.0f} KiB  best {min(timings) * 1000:8.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--endpoints", action="store_true", help="mesure aussi les routes de liste de l'application")
+    args = parser.parse_args()
+    run_render(args.rows, args.repeat)
+    if args.endpoints:
+        run_endpoints(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
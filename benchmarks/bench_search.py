@@ -0,0 +1,105 @@
+"""Benchmark de la recherche de personnes par nom: LIKE naïf contre index trigrammes et clés phonétiques.
+
+Pour des requêtes mal orthographiées mais prononcées comme le vrai nom ("Gotier Seline" pour
+Gauthier Céline), mesure la latence (médiane, p95) et le rappel: part des requêtes dont le top
+renvoie au moins une personne portant le nom et le prénom visés.
+
+  - like:        nom_famille / nom_usage / prenom ILIKE '%mot%' pour chaque mot (parcours complet de la table)
+  - trigramme:   public.search_trigram (index GIN sur nom_recherche)
+  - phonetique:  public.search_phonetic (index sur les clés phonétiques, reclassement par distance d'édition)
+
+    python -m benchmarks.bench_search --repeat 5    # base générée par benchmarks.seed
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# (requête, nom_famille attendu, prénom attendu): noms et prénoms de benchmarks.seed, graphies altérées
+QUERIES: List[Tuple[str, str, str]] = [
+    ("Gotier Seline", "Gauthier", "Céline"),
+    ("Lefèbvre Lea", "Lefebvre", "Léa"),
+    ("Dupond Hugo", "Dupont", "Hugo"),
+    ("Tomas Lukas", "Thomas", "Lucas"),
+    ("Le Roi Emma", "Leroy", "Emma"),
+    ("Fransois Orelie", "François", "Aurélie"),
+    ("Rousso Natalie", "Rousseau", "Nathalie"),
+    ("Guerrin Piere", "Guérin", "Pierre"),
+    ("Mersier Julie", "Mercier", "Julie"),
+    ("Fontène Manon", "Fontaine", "Manon"),
+    ("Chevallier Kévin", "Chevalier", "Kevin"),
+    ("Bertran Sofie", "Bertrand", "Sophie"),
+    ("Durant Mohammed", "Durand", "Mohamed"),
+    ("Fore Inès", "Faure", "Inès"),
+    ("Jirard Teo", "Girard", "Théo"),
+    ("Müller Isabele", "Muller", "Isabelle"),
+]
+
+
+def _like(db, terme: str, limit: int) -> List[dict]:
+    from sqlalchemy import and_, or_
+    from models import Proprietaires
+    from public import proprietaire_rows
+
+    conditions = [
+        or_(Proprietaires.nom_famille.ilike(f"%{word}%"), Proprietaires.nom_usage.ilike(f"%{word}%"), Proprietaires.prenom.ilike(f"%{word}%"))
+        for word in terme.split()
+    ]
+    statement = proprietaire_rows.select().where(and_(*conditions)).order_by(Proprietaires.id).limit(limit)
+    return proprietaire_rows.rows(db, statement)
+
+
+def _found(rows: List[dict], nom: str, prenom: str) -> bool:
+    return any(row["prenom"] == prenom and nom in (row["nom_famille"], row["nom_usage"]) for row in rows)
+
+
+def _normalized(query: str) -> str:
+    from text_search import normalize
+    return normalize(query)
+
+
+def run(repeat: int, limit: int) -> None:
+    from database import SessionLocal
+    from public import search_phonetic, search_trigram
+
+    methods: List[Tuple[str, Callable]] = [
+        # LIKE sur la saisie brute, comme le ferait un filtre naïf (accents et casse compris via ILIKE)
+        ("like", lambda db, q: _like(db, q, limit)),
+        ("trigramme", lambda db, q: search_trigram(db, _normalized(q), limit, 0.5)),
+        ("phonetique", lambda db, q: search_phonetic(db, _normalized(q), limit)),
+    ]
+    db = SessionLocal()
+    try:
+        print(f"{'méthode':<12}{'médiane ms':>12}{'p95 ms':>10}{'rappel':>10}")
+        for name, method in methods:
+            timings: List[float] = []
+            found = 0
+            for query, nom, prenom in QUERIES:
+                for attempt in range(repeat):
+                    start = time.perf_counter()
+                    rows = method(db, query)
+                    timings.append((time.perf_counter() - start) * 1000)
+                    db.rollback()
+                found += _found(rows, nom, prenom)
+            p95 = statistics.quantiles(timings, n=20)[-1]
+            print(f"{name:<12}{statistics.median(timings):>12.2f}{p95:>10.2f}{found:>6}/{len(QUERIES)}")
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=20, help="taille du top, comme le paramètre limit de la route")
+    args = parser.parse_args()
+    run(args.repeat, args.limit)
+
+
+if __name__ == "__main__":
+    main()
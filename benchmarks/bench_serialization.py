@@ -0,0 +1,137 @@
+"""Microbenchmarks de sérialisation des réponses de liste.
+
+Compare, pour fnpcPublic, sivPublic et UserAdminView:
+  - fastapi:      chemin actuel (serialize_response: validation from_attributes + jsonable_encoder, puis JSONResponse)
+  - validate:     model_validate(from_attributes=True) + model_dump_json par objet (sans jsonable_encoder)
+  - fast_rows:    RowSerializer (fast_response.py): dicts de colonnes -> JSON via TypeAdapter précompilé
+
+    python -m benchmarks.bench_serialization --rows 2000
+    python -m benchmarks.bench_serialization --db --rows 5000   # inclut la requête SQL (base générée par benchmarks.seed)
+
+Les objets synthétiques viennent des générateurs de benchmarks.seed: aucune base n'est nécessaire sans --db.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import timeit
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def _fastapi_path(schema) -> Callable[[List[Any]], bytes]:
+    from typing import List as ListType
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+
+    field = create_model_field(name="Response", type_=ListType[schema], mode="serialization")
+
+    def run(objects: List[Any]) -> bytes:
+        content = asyncio.run(serialize_response(field=field, response_content=objects))
+        return JSONResponse(content).body
+    return run
+
+
+def _validate_path(schema) -> Callable[[List[Any]], bytes]:
+    def run(objects: List[Any]) -> bytes:
+        parts = [schema.model_validate(o, from_attributes=True).model_dump_json() for o in objects]
+        return ("[" + ",".join(parts) + "]").encode()
+    return run
+
+
+def _fast_rows_path(serializer) -> Callable[[List[Any]], bytes]:
+    def run(rows: List[tuple]) -> bytes:
+        # Mêmes étapes que RowSerializer.rows() à partir des tuples renvoyés par le driver
+        fields = serializer.fields
+        return serializer.dump_many([dict(zip(fields, row)) for row in rows])
+    return run
+
+
+def synthetic_cases(rows: int) -> Dict[str, Dict[str, Any]]:
+    import models
+    from admin import UserAdminView
+    from benchmarks.seed import COLUMNS, Plan, gen_fnpc, gen_siv, gen_users
+    from fast_response import RowSerializer
+    from public import fnpcPublic, sivPublic
+
+    plan = Plan(1.0, {table: 1 for table in COLUMNS}, 10**11)
+    plan.counts = {table: rows for table in plan.counts}
+    cases = {}
+    for name, schema, model, table, generator, args in [
+        ("fnpcPublic", fnpcPublic, models.fnpc, "fnpc", gen_fnpc, ()),
+        ("sivPublic", sivPublic, models.siv, "siv", gen_siv, ()),
+        ("UserAdminView", UserAdminView, models.Users, "users", gen_users, ("<hash>",)),
+    ]:
+        objects = [model(**dict(zip(COLUMNS[table], row))) for row in generator(plan, random.Random(0), *args)]
+        serializer = RowSerializer(schema, model)
+        tuples = [tuple(getattr(o, f) for f in serializer.fields) for o in objects]
+        cases[name] = {"schema": schema, "serializer": serializer, "objects": objects, "tuples": tuples}
+    return cases
+
+
+def bench(label: str, func: Callable[[], Any], rows: int, repeat: int, baseline: float | None) -> float:
+    number = 1
+    best = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+    speedup = f"x{baseline / best:5.1f}" if baseline else ""
+    print(f"  {label:<12}{best * 1000:10.2f} ms {best / rows * 1e6:8.2f} us/row  {speedup}")
+    return best
+
+
+def run_synthetic(rows: int, repeat: int) -> None:
+    for name, case in synthetic_cases(rows).items():
+        print(f"{name} ({rows} rows)")
+        fastapi_run = _fastapi_path(case["schema"])
+        validate_run = _validate_path(case["schema"])
+        fast_run = _fast_rows_path(case["serializer"])
+        assert fastapi_run(case["objects"]) == fast_run(case["tuples"]), "fast path output differs"
+        baseline = bench("fastapi", lambda: fastapi_run(case["objects"]), rows, repeat, None)
+        bench("validate", lambda: validate_run(case["objects"]), rows, repeat, baseline)
+        bench("fast_rows", lambda: fast_run(case["tuples"]), rows, repeat, baseline)
+
+
+def run_db(rows: int, repeat: int) -> None:
+    import models
+    from database import SessionLocal
+    from fast_response import RowSerializer
+    from public import fnpcPublic, sivPublic
+
+    db = SessionLocal()
+    try:
+        for name, schema, model in [("fnpcPublic", fnpcPublic, models.fnpc), ("sivPublic", sivPublic, models.siv)]:
+            serializer = RowSerializer(schema, model)
+            fastapi_run = _fastapi_path(schema)
+            print(f"{name} + SQL ({rows} rows)")
+
+            def orm() -> bytes:
+                objects = db.query(model).order_by(model.id).limit(rows).all()
+                body = fastapi_run(objects)
+                db.expunge_all()
+                return body
+
+            def fast() -> bytes:
+                return serializer.dump_many(serializer.rows(db, serializer.select().order_by(model.id).limit(rows)))
+
+            baseline = bench("orm+fastapi", orm, rows, repeat, None)
+            bench("fast_rows", fast, rows, repeat, baseline)
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", action="store_true", help="mesure aussi la requête SQL contre la base configurée")
+    args = parser.parse_args()
+    run_synthetic(args.rows, args.repeat)
+    if args.db:
+        run_db(args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
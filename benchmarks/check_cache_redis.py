@@ -0,0 +1,145 @@
+"""Vérification du backend Redis de cache_backend contre un serveur local.
+
+Sans --url, démarre un serveur fakeredis en TCP sur un port libre (pip install -r benchmarks/requirements.txt);
+avec --url, utilise le serveur donné (Redis >= 7, Valkey...), sous un préfixe de clés dédié. Contrôle:
+
+  - single-flight: des « workers » concurrents (un thread et une boucle d'évènements chacun) qui
+    manquent la même clé ne déclenchent qu'une construction et reçoivent tous la même valeur;
+  - génération: un set() préparé avant une invalidation est refusé;
+  - étiquettes: invalider une étiquette retire ses entrées et seulement elles.
+
+    python -m benchmarks.check_cache_redis
+    python -m benchmarks.check_cache_redis --url redis://localhost:6379/15
+
+Code de sortie 1 si un contrôle échoue.
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import cache_backend
+from cache_backend import RedisBackend
+
+TTL_S = 30.0
+
+
+def _start_fake_server() -> Tuple[str, object]:
+    from fakeredis import TcpFakeServer
+
+    class Server(TcpFakeServer):
+        # socketserver: file d'attente de 5 connexions par défaut, trop peu pour les workers simultanés
+        request_queue_size = 128
+
+    server = Server(("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    return f"redis://{host}:{port}/0", server
+
+
+def check_single_flight(workers: int, build_s: float) -> Optional[str]:
+    key = f"check:single_flight:{uuid.uuid4().hex}"
+    builds: List[int] = []
+    results: List[Tuple[Optional[bytes], bool]] = []
+    lock = threading.Lock()
+    start = threading.Barrier(workers)
+
+    def build() -> bytes:
+        with lock:
+            builds.append(1)
+        time.sleep(build_s)
+        return b"value"
+
+    def worker() -> None:
+        start.wait()
+        result = asyncio.run(cache_backend.get_or_build(key, build, TTL_S, ["check"]))
+        with lock:
+            results.append(result)
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if len(builds) != 1:
+        return f"{len(builds)} constructions pour {workers} appelants concurrents (attendu: 1)"
+    if any(value != b"value" for value, _hit in results):
+        return f"valeurs reçues: {sorted({value for value, _hit in results}, key=repr)}"
+    return None
+
+
+def check_stale_set(backend: RedisBackend) -> Optional[str]:
+    key = f"check:stale:{uuid.uuid4().hex}"
+    tag = f"check:stale-tag:{uuid.uuid4().hex}"
+    # Construction commencée (génération lue), puis une écriture invalide avant l'enregistrement
+    generation = backend.generation()
+    backend.invalidate([tag])
+    backend.set(key, b"stale", TTL_S, [tag], generation)
+    if backend.get(key) is not None:
+        return "valeur construite avant l'invalidation enregistrée malgré le changement de génération"
+    backend.set(key, b"fresh", TTL_S, [tag], backend.generation())
+    if backend.get(key) != b"fresh":
+        return "valeur construite après l'invalidation non enregistrée"
+    return None
+
+
+def check_tags(backend: RedisBackend) -> Optional[str]:
+    suffix = uuid.uuid4().hex
+    tag_a, tag_b = f"check:a:{suffix}", f"check:b:{suffix}"
+    keys = {f"check:only_a:{suffix}": [tag_a], f"check:both:{suffix}": [tag_a, tag_b], f"check:only_b:{suffix}": [tag_b]}
+    for key, tags in keys.items():
+        backend.set(key, b"x", TTL_S, tags, backend.generation())
+    backend.invalidate([tag_a])
+    present = {key: backend.get(key) is not None for key in keys}
+    expected = {f"check:only_a:{suffix}": False, f"check:both:{suffix}": False, f"check:only_b:{suffix}": True}
+    if present != expected:
+        return f"entrées présentes après invalidation de {tag_a}: {present} (attendu: {expected})"
+    return None
+
+
+def run(url: Optional[str], workers: int, build_s: float) -> int:
+    server = None
+    if url is None:
+        url, server = _start_fake_server()
+    backend = RedisBackend(url=url, prefix=f"neogend-check:{uuid.uuid4().hex[:8]}:")
+    cache_backend.backend = backend
+    checks = [
+        ("single-flight", lambda: check_single_flight(workers, build_s)),
+        ("set refusé après invalidation", lambda: check_stale_set(backend)),
+        ("invalidation par étiquette", lambda: check_tags(backend)),
+    ]
+    failures = 0
+    try:
+        print(f"serveur: {url}")
+        for name, check in checks:
+            error = check()
+            failures += error is not None
+            print(f"{'OK   ' if error is None else 'ÉCHEC'} {name}" + (f": {error}" if error else ""))
+    finally:
+        backend.clear()
+        if server is not None:
+            server.shutdown()  # type: ignore[attr-defined]
+            server.server_close()  # type: ignore[attr-defined]
+    return 1 if failures else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="serveur Redis à utiliser au lieu de fakeredis")
+    parser.add_argument("--workers", type=int, default=8, help="appelants concurrents du contrôle single-flight")
+    parser.add_argument("--build-ms", type=float, default=200, help="durée d'une construction simulée")
+    args = parser.parse_args()
+    sys.exit(run(args.url, args.workers, args.build_ms / 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+"""Benchmark HTTP de bout en bout de l'API Neogend.
+
+Démarre `main:app` avec uvicorn contre la base locale (variables POSTGRES_* habituelles, données
+générées par `python -m benchmarks.seed`), prépare un compte de benchmark, puis rejoue des mélanges
+de trafic réalistes:
+
+    python -m benchmarks.http_bench run --mix realistic --duration 30 --concurrency 8 -o benchmarks/results/avant.json
+    python -m benchmarks.http_bench compare benchmarks/results/avant.json benchmarks/results/apres.json
+
+Les résultats (débit, p50/p95/p99 par route) sont écrits en JSON pour comparer deux runs.
+À lancer depuis la racine du dépôt, sur une base de développement: le mélange "admin" écrit en base.
+Au-delà de DB_POOL_SIZE + DB_MAX_OVERFLOW clients par worker, le serveur se bloque en attente
+du pool (voir database.py): augmenter --workers ou la taille du pool pour monter en charge.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+BENCH_NIPOL = os.getenv("BENCH_NIPOL", "BENCH-OWNER")
+BENCH_PASSWORD = os.getenv("BENCH_PASSWORD", "bench-password")
+SAMPLE_SIZE = 2000
+
+# Poids relatifs des scénarios dans chaque mélange
+MIXES: Dict[str, Dict[str, int]] = {
+    "realistic": {"public": 70, "notifications": 20, "admin": 8, "login": 2},
+    "login_storm": {"login": 1},
+    "public": {"public": 1},
+    "admin": {"admin": 1},
+    "notifications": {"notifications": 1},
+}
+
+
+# ---------- Préparation ----------
+def ensure_bench_user() -> None:
+    """Crée (ou réactive) le compte owner/OPJ utilisé par le benchmark."""
+    from passlib.context import CryptContext
+    from database import SessionLocal
+    import models
+
+    db = SessionLocal()
+    try:
+        user = db.query(models.Users).filter(models.Users.rp_nipol == BENCH_NIPOL).first()
+        if user is None:
+            user = models.Users(
+                first_name="bench", last_name="bench", email="bench@bench.local",
+                rp_first_name="bench", rp_last_name="bench", rp_nipol=BENCH_NIPOL,
+                temp_password=False,
+            )
+            db.add(user)
+        user.password = CryptContext(schemes=["bcrypt"], deprecated="auto").hash(BENCH_PASSWORD)  # type: ignore
+        user.privileges = "owner"  # type: ignore
+        user.rp_qualif = "opj"  # type: ignore
+        user.inscription_status = "valid"  # type: ignore
+        db.commit()
+    finally:
+        db.close()
+
+
+def sample_keys() -> Dict[str, List[Any]]:
+    """Échantillon de clés existantes pour les lectures unitaires."""
+    from sqlalchemy import text
+    from database import engine
+
+    queries = {
+        "proprietaires": "SELECT id FROM proprietaires LIMIT :n",
+        "fnpc": "SELECT id FROM fnpc LIMIT :n",
+        "neph": "SELECT neph FROM fnpc LIMIT :n",
+        "fpr": "SELECT id FROM fpr LIMIT :n",
+        "siv": "SELECT id FROM siv LIMIT :n",
+        "infractions": "SELECT id FROM infractions_routieres LIMIT :n",
+    }
+    keys: Dict[str, List[Any]] = {}
+    with engine.connect() as conn:
+        for name, sql in queries.items():
+            keys[name] = [row[0] for row in conn.execute(text(sql), {"n": SAMPLE_SIZE})]
+    return keys
+
+
+def start_server(port: int, workers: int) -> subprocess.Popen:
+    env = {**os.environ, "API_ROOT_PATH": "", "ACCESS_LOG": os.getenv("ACCESS_LOG", "false")}
+    cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning", "--no-access-log"]
+    return subprocess.Popen(cmd, cwd=str(ROOT), env=env)
+
+
+async def wait_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"API not ready after {timeout}s at {base_url}")
+
+
+# ---------- Scénarios ----------
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+
+    async def call(self, name: str, request: Awaitable[httpx.Response]) -> httpx.Response | None:
+        start = time.perf_counter()
+        try:
+            response = await request
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            response, status = None, type(e).__name__
+        self.latencies.setdefault(name, []).append(time.perf_counter() - start)
+        counts = self.statuses.setdefault(name, {})
+        counts[status] = counts.get(status, 0) + 1
+        return response
+
+
+Scenario = Callable[[httpx.AsyncClient, Recorder, Dict[str, str], Dict[str, List[Any]], random.Random], Awaitable[None]]
+
+
+async def scenario_login(client, rec, headers, keys, rng) -> None:
+    await rec.call("POST /auth/token", client.post("/auth/token", data={"username": BENCH_NIPOL, "password": BENCH_PASSWORD}))
+
+
+async def scenario_public(client, rec, headers, keys, rng) -> None:
+    choice = rng.random()
+    if choice < 0.05:
+        table = rng.choice(["proprietaires", "fnpc", "fpr", "siv", "infractions"])
+        await rec.call(f"GET /public/{table}/read/", client.get(f"/public/{table}/read/", headers=headers))
+        return
+    if choice < 0.20 and keys["neph"]:
+        neph = rng.choice(keys["neph"])
+        await rec.call("GET /public/infractions/read/by_neph/{neph}/", client.get(f"/public/infractions/read/by_neph/{neph}/", headers=headers))
+        return
+    table = rng.choice([t for t in ("proprietaires", "fnpc", "fpr", "siv", "infractions") if keys[t]] or ["proprietaires"])
+    if not keys[table]:
+        return
+    record_id = rng.choice(keys[table])
+    await rec.call(f"GET /public/{table}/read/{{id}}/", client.get(f"/public/{table}/read/{record_id}/", headers=headers))
+
+
+async def scenario_notifications(client, rec, headers, keys, rng) -> None:
+    await rec.call("GET /notifications_public/notifications/get_unread/", client.get("/notifications_public/notifications/get_unread/", headers=headers))
+
+
+async def scenario_admin(client, rec, headers, keys, rng) -> None:
+    """Cycle create -> read -> update -> delete sur fnpc, siv, fpr et infractions."""
+    if not keys["proprietaires"]:
+        return
+    prop_id = rng.choice(keys["proprietaires"])
+    neph = rng.randrange(10**14, 10**15)
+    categories = {f"cat_{c}": c == "b" for c in ("am", "a1", "a2", "a", "b1", "b", "c1", "c", "d1", "d", "be", "c1e", "ce", "d1e", "de")}
+    fnpc_payload = {
+        "neph": neph, "numero_titre": f"BENCH{neph}", "date_delivrance": "2015-06-01", "prefecture_delivrance": "75",
+        "date_expiration": "2030-06-01", "statut": "valide", "validite": "valide", "probatoire": False,
+        "points": 12, "prop_id": prop_id, **categories,
+    }
+    r = await rec.call("POST /fnpc/create/", client.post("/fnpc/create/", json=fnpc_payload, headers=headers))
+    if r is None or r.status_code != 200:
+        return
+    fnpc_id = r.json()["id"]
+    await rec.call("GET /fnpc/read/{id}/", client.get(f"/fnpc/read/{fnpc_id}/", headers=headers))
+
+    r = await rec.call("POST /infractions/create/", client.post("/infractions/create/", json={
+        "classe": "4", "points": 1, "nipol": BENCH_NIPOL, "date_infraction": "2025-01-01", "statut": "en_cours", "neph": neph,
+    }, headers=headers))
+    infraction_id = r.json()["id"] if r is not None and r.status_code == 200 else None
+
+    r = await rec.call("POST /fpr/create/", client.post("/fpr/create/", json={
+        "date_enregistrement": "2025-01-01", "motif_enregistrement": "bench", "prop_id": prop_id, "neph": neph,
+    }, headers=headers))
+    fpr_id = r.json()["id"] if r is not None and r.status_code == 200 else None
+
+    r = await rec.call("POST /siv/create/", client.post("/siv/create/", json={
+        "prop_id": prop_id, "ci_numero_immatriculation": f"BE-{rng.randrange(1000):03d}-NC", "vl_marque": "Bench",
+    }, headers=headers))
+    siv_id = r.json()["id"] if r is not None and r.status_code == 200 else None
+
+    await rec.call("PUT /fnpc/update/{id}/", client.put(f"/fnpc/update/{fnpc_id}/", json={"points": 6}, headers=headers))
+    if siv_id is not None:
+        await rec.call("PUT /siv/update/{id}/", client.put(f"/siv/update/{siv_id}/", json={"vl_couleur_dominante": "gris"}, headers=headers))
+        await rec.call("DELETE /siv/delete/{id}/", client.delete(f"/siv/delete/{siv_id}/", headers=headers))
+    if fpr_id is not None:
+        await rec.call("PUT /fpr/update/{id}/", client.put(f"/fpr/update/{fpr_id}/", json={"dangerosite": "faible"}, headers=headers))
+        await rec.call("DELETE /fpr/delete/{id}/", client.delete(f"/fpr/delete/{fpr_id}/", headers=headers))
+    if infraction_id is not None:
+        await rec.call("PUT /infractions/update/{id}/", client.put(f"/infractions/update/{infraction_id}/", json={"statut": "payee"}, headers=headers))
+        await rec.call("DELETE /infractions/delete/{id}/", client.delete(f"/infractions/delete/{infraction_id}/", headers=headers))
+    await rec.call("DELETE /fnpc/delete/{id}/", client.delete(f"/fnpc/delete/{fnpc_id}/", headers=headers))
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "login": scenario_login,
+    "public": scenario_public,
+    "notifications": scenario_notifications,
+    "admin": scenario_admin,
+}
+
+
+# ---------- Exécution ----------
+async def drive(base_url: str, mix: str, duration: float, concurrency: int, seed: int, keys: Dict[str, List[Any]]) -> Tuple[Recorder, float]:
+    weights = MIXES[mix]
+    names, values = list(weights), list(weights.values())
+    rec = Recorder()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        r = await client.post("/auth/token", data={"username": BENCH_NIPOL, "password": BENCH_PASSWORD})
+        r.raise_for_status()
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        deadline = time.monotonic() + duration
+
+        async def worker(index: int) -> None:
+            rng = random.Random(seed * 1000 + index)
+            while time.monotonic() < deadline:
+                scenario = SCENARIOS[rng.choices(names, values)[0]]
+                await scenario(client, rec, headers, keys, rng)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return rec, elapsed
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Rang le plus proche: plus petite valeur couvrant pct% des mesures
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+def summarize(rec: Recorder, elapsed: float) -> Dict[str, Any]:
+    routes: Dict[str, Any] = {}
+    total = 0
+    for name, values in sorted(rec.latencies.items()):
+        values = sorted(values)
+        total += len(values)
+        statuses = rec.statuses.get(name, {})
+        routes[name] = {
+            "count": len(values),
+            "throughput_rps": round(len(values) / elapsed, 2),
+            "errors": sum(n for s, n in statuses.items() if not s.isdigit() or int(s) >= 500),
+            "statuses": statuses,
+            "mean_ms": round(sum(values) / len(values) * 1000, 3),
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p95_ms": round(percentile(values, 95) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+            "max_ms": round(values[-1] * 1000, 3),
+        }
+    return {"total_requests": total, "elapsed_s": round(elapsed, 3), "throughput_rps": round(total / elapsed, 2), "routes": routes}
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT), text=True).strip()
+    except Exception:
+        return None
+
+
+def print_summary(result: Dict[str, Any]) -> None:
+    print(f"{'route':58} {'count':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err':>5}")
+    for name, r in result["routes"].items():
+        print(f"{name:58} {r['count']:>7} {r['throughput_rps']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['errors']:>5}")
+    print(f"total: {result['total_requests']} requests in {result['elapsed_s']}s -> {result['throughput_rps']} req/s")
+
+
+def cmd_run(args: argparse.Namespace) -> None:
+    from database import DB_MAX_OVERFLOW, DB_POOL_SIZE
+
+    pool_capacity = DB_POOL_SIZE + DB_MAX_OVERFLOW
+    if args.base_url is None and args.concurrency > pool_capacity * args.workers:
+        print(f"warning: {args.concurrency} clients > {pool_capacity} connexions x {args.workers} worker(s), "
+              "le serveur attendra le pool", file=sys.stderr)
+    if not args.skip_seed:
+        ensure_bench_user()
+    keys = sample_keys()
+    if not keys["proprietaires"]:
+        print("warning: base vide, générer un jeu de données avec `python -m benchmarks.seed`", file=sys.stderr)
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        base_url = f"http://127.0.0.1:{args.port}"
+        server = start_server(args.port, args.workers)
+    try:
+        asyncio.run(wait_ready(base_url))
+        if args.warmup > 0:
+            asyncio.run(drive(base_url, args.mix, args.warmup, args.concurrency, args.seed, keys))
+        rec, elapsed = asyncio.run(drive(base_url, args.mix, args.duration, args.concurrency, args.seed, keys))
+    finally:
+        if server is not None:
+            server.send_signal(signal.SIGINT)
+            server.wait(timeout=30)
+
+    result = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "mix": args.mix,
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "workers": args.workers if args.base_url is None else None,
+            "db_pool": {"size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW},
+            "seed": args.seed,
+            "dataset": {name: len(values) for name, values in keys.items()},
+        },
+        **summarize(rec, elapsed),
+    }
+    print_summary(result)
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"results written to {output}")
+
+
+def cmd_compare(args: argparse.Namespace) -> None:
+    before = json.loads(Path(args.before).read_text(encoding="utf-8"))
+    after = json.loads(Path(args.after).read_text(encoding="utf-8"))
+
+    def delta(a: float, b: float) -> str:
+        return f"{(b - a) / a * 100:+.1f}%" if a else "n/a"
+
+    print(f"{'route':58} {'rps':>16} {'p50 ms':>16} {'p99 ms':>16}")
+    for name in sorted(set(before["routes"]) | set(after["routes"])):
+        a, b = before["routes"].get(name), after["routes"].get(name)
+        if a is None or b is None:
+            print(f"{name:58} {'(only in ' + ('after' if a is None else 'before') + ')':>16}")
+            continue
+        print(f"{name:58} {delta(a['throughput_rps'], b['throughput_rps']):>16} {delta(a['p50_ms'], b['p50_ms']):>16} {delta(a['p99_ms'], b['p99_ms']):>16}")
+    print(f"{'TOTAL':58} {delta(before['throughput_rps'], after['throughput_rps']):>16}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="lance un benchmark")
+    run.add_argument("--mix", choices=sorted(MIXES), default="realistic")
+    run.add_argument("--duration", type=float, default=30.0, help="durée mesurée (s)")
+    run.add_argument("--warmup", type=float, default=5.0, help="chauffe non mesurée (s)")
+    run.add_argument("--concurrency", type=int, default=8, help="clients simultanés")
+    run.add_argument("--workers", type=int, default=1, help="workers uvicorn démarrés")
+    run.add_argument("--port", type=int, default=8765)
+    run.add_argument("--base-url", default=None, help="cible une API déjà démarrée au lieu d'en lancer une")
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--skip-seed", action="store_true", help="ne crée pas le compte de benchmark")
+    run.add_argument("-o", "--output", default=None, help="fichier JSON de résultats")
+    run.set_defaults(func=cmd_run)
+
+    compare = sub.add_parser("compare", help="compare deux fichiers de résultats")
+    compare.add_argument("before")
+    compare.add_argument("after")
+    compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""Générateur de données synthétiques pour les benchmarks.
+
+Produit un jeu cohérent (clés étrangères valides) pour tous les modèles, à une échelle choisie
+et de façon déterministe pour une graine donnée. Les lignes sont chargées par COPY, table par table:
+
+    python -m benchmarks.seed --scale 0.01 --truncate      # ~10k propriétaires, pour le développement
+    python -m benchmarks.seed --scale 1 --truncate         # ~1M propriétaires
+
+À l'échelle 1: 20k utilisateurs, 1M propriétaires, 700k FNPC, 600k SIV, 30k FPR, 1M infractions,
+200k notifications. --truncate vide les tables de fichiers (identités remises à 1, donc mêmes ids
+d'un run à l'autre) et les comptes générés, sans toucher aux autres utilisateurs.
+"""
+import argparse
+import csv
+import io
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Sequence
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from text_search import phonetic_key
+
+SEED_NIPOL_PREFIX = "SEED-"
+SEED_PASSWORD = "seed-password"
+NEPH_BASE = 10**11  # le benchmark HTTP crée ses permis entre 10**14 et 10**15
+COPY_CHUNK_ROWS = 50_000
+
+# Volumes à l'échelle 1
+BASE_COUNTS = {
+    "users": 20_000,
+    "proprietaires": 1_000_000,
+    "fnpc": 700_000,  # un permis au plus par propriétaire
+    "siv": 600_000,
+    "fpr": 30_000,
+    "infractions_routieres": 1_000_000,
+    "notifications": 200_000,
+}
+
+PRENOMS_M = ["Jean", "Pierre", "Michel", "Alain", "Nicolas", "Thomas", "Julien", "Lucas", "Hugo", "Louis",
+             "Gabriel", "Arthur", "Paul", "Antoine", "Maxime", "Kevin", "Mohamed", "Yanis", "Théo", "François"]
+PRENOMS_F = ["Marie", "Nathalie", "Isabelle", "Sylvie", "Catherine", "Julie", "Camille", "Léa", "Manon", "Chloé",
+             "Emma", "Inès", "Sarah", "Laura", "Céline", "Sophie", "Aurélie", "Jade", "Louise", "Hélène"]
+NOMS = ["Martin", "Bernard", "Thomas", "Petit", "Robert", "Richard", "Durand", "Dubois", "Moreau", "Laurent",
+        "Simon", "Michel", "Lefebvre", "Leroy", "Roux", "David", "Bertrand", "Morel", "Fournier", "Girard",
+        "Bonnet", "Dupont", "Lambert", "Fontaine", "Rousseau", "Vincent", "Muller", "Lefèvre", "Faure", "André",
+        "Mercier", "Blanc", "Guérin", "Boyer", "Garnier", "Chevalier", "François", "Legrand", "Gauthier", "Garcia"]
+# Clés phonétiques des noms générés, comme les calcule la route de création de proprietaires.py
+_PHONETIC = {name: phonetic_key(name) for name in NOMS + PRENOMS_M + PRENOMS_F}
+# (commune, code postal, département)
+COMMUNES = [("Paris", "75001", 75), ("Marseille", "13001", 13), ("Lyon", "69001", 69), ("Toulouse", "31000", 31),
+            ("Nice", "06000", 6), ("Nantes", "44000", 44), ("Strasbourg", "67000", 67), ("Montpellier", "34000", 34),
+            ("Bordeaux", "33000", 33), ("Lille", "59000", 59), ("Rennes", "35000", 35), ("Reims", "51100", 51),
+            ("Saint-Étienne", "42000", 42), ("Toulon", "83000", 83), ("Le Havre", "76600", 76), ("Grenoble", "38000", 38),
+            ("Dijon", "21000", 21), ("Angers", "49000", 49), ("Nîmes", "30000", 30), ("Clermont-Ferrand", "63000", 63)]
+TYPES_VOIE = ["rue", "avenue", "boulevard", "place", "chemin", "impasse", "allée", "quai"]
+NOMS_VOIE = ["de la République", "Victor Hugo", "Jean Jaurès", "de la Gare", "Pasteur", "du Général de Gaulle",
+             "des Lilas", "de Paris", "Gambetta", "de la Paix", "du Moulin", "des Écoles", "Voltaire", "Carnot"]
+MARQUES = [("Renault", ["Clio", "Mégane", "Captur", "Twingo"]), ("Peugeot", ["208", "308", "3008", "2008"]),
+           ("Citroën", ["C3", "C4", "Berlingo"]), ("Volkswagen", ["Golf", "Polo", "Tiguan"]),
+           ("Toyota", ["Yaris", "Corolla", "RAV4"]), ("Dacia", ["Sandero", "Duster", "Spring"]), ("Tesla", ["Model 3", "Model Y"])]
+COULEURS = ["blanc", "noir", "gris", "bleu", "rouge", "vert", "beige"]
+CARBURANTS = ["ES", "GO", "EL", "EE"]
+ASSUREURS = ["AXA", "MAAF", "MACIF", "Groupama", "Allianz", "MAIF", "Matmut"]
+CATEGORIES = ["am", "a1", "a2", "a", "b1", "b", "c1", "c", "d1", "d", "be", "c1e", "ce", "d1e", "de"]
+PLAQUE_LETTRES = "ABCDEFGHJKLMNPQRSTVWXYZ"  # sans I, O, U comme le SIV
+ARTICLES = [("R413-14", "4", "11301", 1), ("R412-30", "4", "20585", 4), ("R412-6-1", "4", "22871", 3),
+            ("R412-1", "4", "11286", 3), ("R417-10", "2", "6289", 0), ("R233-1", "1", "9521", 0),
+            ("L234-1", "5", "12311", 6), ("R413-17", "5", "11302", 6)]
+STATUTS_INFRACTION = ["en_cours", "payee", "annulee"]
+AUTORITES = ["Police nationale", "Gendarmerie nationale", "Police municipale", "Parquet"]
+MOTIFS = ["Recherche judiciaire", "Interdiction de paraître", "Fiche S", "Évasion", "Disparition inquiétante", "Contrôle judiciaire"]
+
+
+def _date(rng: random.Random, start: date, end: date) -> date:
+    return date.fromordinal(rng.randint(start.toordinal(), end.toordinal()))
+
+
+def _plaque(index: int) -> str:
+    # Bijection index -> AA-001-AA: chaque SIV généré a une plaque unique
+    letters, digits = divmod(index, 999)
+    n = len(PLAQUE_LETTRES)
+    chars = []
+    for _ in range(4):
+        letters, r = divmod(letters, n)
+        chars.append(PLAQUE_LETTRES[r])
+    return f"{chars[3]}{chars[2]}-{digits + 1:03d}-{chars[1]}{chars[0]}"
+
+
+# ---------- Générateurs de lignes (ordre des colonnes = COLUMNS) ----------
+COLUMNS: Dict[str, Sequence[str]] = {
+    "users": ("id", "first_name", "last_name", "email", "password", "temp_password", "inscription_date", "inscription_status",
+              "rp_first_name", "rp_last_name", "rp_birthdate", "rp_gender", "rp_grade", "rp_affectation", "rp_qualif",
+              "rp_nipol", "rp_server", "rp_service", "privileges", "token_version", "accepted_cgu", "accepted_privacy"),
+    "proprietaires": ("id", "nom_famille", "nom_usage", "prenom", "second_prenom", "date_naissance", "sexe", "lieu_naissance",
+                      "departement_naissance_numero", "adresse_numero", "adresse_type_voie", "adresse_nom_voie",
+                      "adresse_code_postal", "adresse_commune", "nom_phonetique", "nom_usage_phonetique", "prenom_phonetique"),
+    "fnpc": ("id", "neph", "numero_titre", "date_delivrance", "prefecture_delivrance", "date_expiration", "statut", "validite",
+             *[c for cat in CATEGORIES for c in (f"cat_{cat}", f"cat_{cat}_delivrance")],
+             "code_restriction", "probatoire", "date_probatoire", "points", "prop_id"),
+    "siv": ("id", "prop_id", "co_prop_id", "ci_etat_administratif", "ci_numero_immatriculation", "ci_date_premiere_circulation",
+            "ci_date_certificat", "vl_etat_administratif", "vl_marque", "vl_denomination_commerciale", "vl_version",
+            "vl_couleur_dominante", "tech_puissance_kw", "tech_puissance_ch", "tech_puissance_fiscale", "tech_cylindree",
+            "tech_carburant", "tech_emissions_co2", "tech_poids_vide", "tech_poids_ptac", "tech_places_assises",
+            "tech_places_debout", "ct_date_echeance", "as_assureur", "as_date_contrat"),
+    "fpr": ("id", "exactitude", "date_enregistrement", "motif_enregistrement", "autorite_enregistrement", "lieu_faits", "details",
+            "dangerosite", "signes_distinctifs", "conduite", "prop_id", "neph", "num_fijait"),
+    "infractions_routieres": ("id", "article", "classe", "natinf", "points", "nipol", "date_infraction", "details", "statut", "neph"),
+    "notifications": ("id", "user_id", "title", "message", "redirect_to", "is_read", "created_at"),
+}
+
+
+class Plan:
+    """Volumes et premiers identifiants de chaque table pour un run."""
+
+    def __init__(self, scale: float, first_ids: Dict[str, int], first_neph: int) -> None:
+        self.counts = {table: max(1, int(count * scale)) for table, count in BASE_COUNTS.items()}
+        self.counts["fnpc"] = min(self.counts["fnpc"], self.counts["proprietaires"])
+        self.first_ids = first_ids
+        self.first_neph = first_neph
+
+    def ids(self, table: str) -> range:
+        return range(self.first_ids[table], self.first_ids[table] + self.counts[table])
+
+    def prop_id(self, rng: random.Random) -> int:
+        return self.first_ids["proprietaires"] + rng.randrange(self.counts["proprietaires"])
+
+    def neph(self, fnpc_index: int) -> int:
+        return self.first_neph + fnpc_index
+
+
+def gen_users(plan: Plan, rng: random.Random, password_hash: str) -> Iterator[Sequence[Any]]:
+    for user_id in plan.ids("users"):
+        female = rng.random() < 0.4
+        first, last = rng.choice(PRENOMS_F if female else PRENOMS_M), rng.choice(NOMS)
+        privileges = rng.choices(["player", "admin", "owner"], weights=[97, 2.5, 0.5])[0]
+        yield (user_id, first, last, f"{first.lower()}.{last.lower()}{user_id}@seed.local", password_hash, False,
+               _date(rng, date(2023, 1, 1), date(2025, 12, 31)), rng.choices(["valid", "pending", "denied"], weights=[90, 8, 2])[0],
+               rng.choice(PRENOMS_F if female else PRENOMS_M), rng.choice(NOMS), _date(rng, date(1960, 1, 1), date(2003, 12, 31)),
+               "F" if female else "M", rng.choice(["GPX", "BRI", "SGT", "ADJ", "LTN", "CNE"]), rng.choice(COMMUNES)[0],
+               rng.choices(["apj", "opj"], weights=[70, 30])[0], f"{SEED_NIPOL_PREFIX}{user_id}", rng.choice(["S1", "S2"]),
+               rng.choice(["PN", "GN", "PM"]), privileges, 0, True, True)
+
+
+def gen_proprietaires(plan: Plan, rng: random.Random) -> Iterator[Sequence[Any]]:
+    for prop_id in plan.ids("proprietaires"):
+        female = rng.random() < 0.5
+        prenoms = PRENOMS_F if female else PRENOMS_M
+        nom = rng.choice(NOMS)
+        lieu, _cp, dep = rng.choice(COMMUNES)
+        commune, cp, _dep = rng.choice(COMMUNES)
+        nom_usage = rng.choice(NOMS) if female and rng.random() < 0.3 else nom
+        prenom = rng.choice(prenoms)
+        yield (prop_id, nom, nom_usage, prenom,
+               rng.choice(prenoms), _date(rng, date(1940, 1, 1), date(2007, 12, 31)),
+               "F" if female else "M", lieu, dep, rng.randint(1, 250), rng.choice(TYPES_VOIE), rng.choice(NOMS_VOIE), cp, commune,
+               _PHONETIC[nom], _PHONETIC[nom_usage], _PHONETIC[prenom])
+
+
+def gen_fnpc(plan: Plan, rng: random.Random) -> Iterator[Sequence[Any]]:
+    # Le i-ème permis appartient au i-ème propriétaire: pas de doublon, et fpr peut retrouver le NEPH
+    for index, fnpc_id in enumerate(plan.ids("fnpc")):
+        delivrance = _date(rng, date(1980, 1, 1), date(2025, 6, 30))
+        categories: List[Any] = []
+        has_b = rng.random() < 0.95
+        for cat in CATEGORIES:
+            held = has_b if cat == "b" else rng.random() < (0.15 if cat in ("am", "a2", "be") else 0.04)
+            categories += [held, delivrance if held else None]
+        probatoire = delivrance > date(2022, 6, 30)
+        points = rng.randint(6, 12) if probatoire else rng.choices([12, 11, 10, 8, 6, 4, 0], weights=[70, 8, 7, 6, 5, 3, 1])[0]
+        statut = "invalide" if points == 0 else rng.choices(["valide", "suspendu", "annule"], weights=[96, 3, 1])[0]
+        yield (fnpc_id, plan.neph(index), f"{delivrance.year % 100:02d}{rng.randrange(10**10):010d}", delivrance,
+               f"{rng.choice(COMMUNES)[2]:02d}", delivrance + timedelta(days=15 * 365), statut,
+               "valide" if statut == "valide" else "invalide", *categories,
+               rng.choice(["01", "02", "78"]) if rng.random() < 0.1 else None, probatoire,
+               delivrance + timedelta(days=3 * 365) if probatoire else None, points,
+               plan.first_ids["proprietaires"] + index)
+
+
+def gen_siv(plan: Plan, rng: random.Random) -> Iterator[Sequence[Any]]:
+    for index, siv_id in enumerate(plan.ids("siv")):
+        marque, modeles = rng.choice(MARQUES)
+        premiere = _date(rng, date(2000, 1, 1), date(2025, 6, 30))
+        carburant = "EL" if marque == "Tesla" else rng.choice(CARBURANTS)
+        kw = rng.randint(50, 250)
+        yield (siv_id, plan.prop_id(rng), plan.prop_id(rng) if rng.random() < 0.1 else None,
+               rng.choices(["Valide", "Volé", "Perdu", "Annulé"], weights=[95, 2, 2, 1])[0], _plaque(plan.first_ids["siv"] + index),
+               premiere, _date(rng, premiere, date(2025, 9, 30)),
+               rng.choice(["Saisi", "Mis en Fourrière", "Immobilisé"]) if rng.random() < 0.02 else None,
+               marque, rng.choice(modeles), None, rng.choice(COULEURS), kw, round(kw * 1.36), max(3, kw // 15),
+               None if carburant == "EL" else rng.choice([999, 1199, 1499, 1598, 1997]), carburant,
+               0 if carburant == "EL" else rng.randint(90, 220), rng.randint(900, 2100), rng.randint(1400, 2600), 5, 0,
+               premiere + timedelta(days=4 * 365 + 2 * 365 * rng.randint(0, 10)), rng.choice(ASSUREURS),
+               _date(rng, premiere, date(2025, 9, 30)))
+
+
+def gen_fpr(plan: Plan, rng: random.Random) -> Iterator[Sequence[Any]]:
+    for fpr_id in plan.ids("fpr"):
+        prop_index = rng.randrange(plan.counts["proprietaires"])
+        neph = plan.neph(prop_index) if prop_index < plan.counts["fnpc"] else None
+        yield (fpr_id, rng.choice(["Identité confirmée", "Identité non confirmée", "Identité usurpée"]),
+               _date(rng, date(2015, 1, 1), date(2025, 9, 30)), rng.choice(MOTIFS), rng.choice(AUTORITES),
+               rng.choice(COMMUNES)[0], None, rng.choice(["Faible", "Moyenne", "Élevée"]),
+               "Tatouage avant-bras" if rng.random() < 0.2 else None, "Interpeller et aviser l'autorité",
+               plan.first_ids["proprietaires"] + prop_index, neph, rng.randrange(10**9) if rng.random() < 0.3 else None)
+
+
+def gen_infractions(plan: Plan, rng: random.Random) -> Iterator[Sequence[Any]]:
+    for infraction_id in plan.ids("infractions_routieres"):
+        article, classe, natinf, points = rng.choice(ARTICLES)
+        yield (infraction_id, article, classe, natinf, points, f"{SEED_NIPOL_PREFIX}{plan.first_ids['users'] + rng.randrange(plan.counts['users'])}",
+               _date(rng, date(2020, 1, 1), date(2025, 9, 30)), None,
+               rng.choices(STATUTS_INFRACTION, weights=[20, 75, 5])[0], plan.neph(rng.randrange(plan.counts["fnpc"])))
+
+
+def gen_notifications(plan: Plan, rng: random.Random) -> Iterator[Sequence[Any]]:
+    for notification_id in plan.ids("notifications"):
+        day = _date(rng, date(2024, 1, 1), date(2025, 9, 30))
+        yield (notification_id, plan.first_ids["users"] + rng.randrange(plan.counts["users"]), "Information",
+               "Votre demande a été traitée.", None, rng.random() < 0.8,
+               datetime(day.year, day.month, day.day, rng.randrange(24), rng.randrange(60), tzinfo=timezone.utc))
+
+
+# Ordre de chargement: les tables référencées d'abord
+GENERATORS: List[tuple[str, Callable[..., Iterator[Sequence[Any]]]]] = [
+    ("users", gen_users),
+    ("proprietaires", gen_proprietaires),
+    ("fnpc", gen_fnpc),
+    ("siv", gen_siv),
+    ("fpr", gen_fpr),
+    ("infractions_routieres", gen_infractions),
+    ("notifications", gen_notifications),
+]
+
+
+# ---------- Chargement ----------
+def _csv_value(value: Any) -> Any:
+    # En CSV COPY, un champ vide non quoté vaut NULL
+    if value is None:
+        return None
+    if value is True:
+        return "t"
+    if value is False:
+        return "f"
+    return value
+
+
+def copy_rows(cursor, table: str, columns: Sequence[str], rows: Iterator[Sequence[Any]]) -> int:
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    total = 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    for row in rows:
+        writer.writerow([_csv_value(v) for v in row])
+        total += 1
+        if total % COPY_CHUNK_ROWS == 0:
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+    return total
+
+
+def truncate(cursor) -> None:
+    cursor.execute(f"DELETE FROM notifications WHERE user_id IN (SELECT id FROM users WHERE rp_nipol LIKE '{SEED_NIPOL_PREFIX}%')")
+    cursor.execute(f"DELETE FROM users WHERE rp_nipol LIKE '{SEED_NIPOL_PREFIX}%'")
+    cursor.execute("TRUNCATE proprietaires, fnpc, siv, fpr, infractions_routieres RESTART IDENTITY CASCADE")
+
+
+def _next_id(cursor, table: str) -> int:
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+    return cursor.fetchone()[0]
+
+
+def seed(scale: float, seed_value: int, do_truncate: bool) -> Dict[str, int]:
+    from passlib.context import CryptContext
+    import search_index
+    from database import engine
+
+    # Un seul hash bcrypt partagé par tous les comptes générés: hasher 20k mots de passe prendrait des heures
+    password_hash = CryptContext(schemes=["bcrypt"], deprecated="auto").hash(SEED_PASSWORD)
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SET synchronous_commit = off")
+        if do_truncate:
+            truncate(cursor)
+        first_ids = {table: _next_id(cursor, table) for table in COLUMNS}
+        cursor.execute("SELECT COALESCE(MAX(neph) + 1, %s) FROM fnpc WHERE neph < %s", (NEPH_BASE, 10**14))
+        plan = Plan(scale, first_ids, max(NEPH_BASE, cursor.fetchone()[0]))
+
+        loaded: Dict[str, int] = {}
+        for table, generator in GENERATORS:
+            # Une graine par table: la table N ne dépend pas du nombre de tirages des précédentes
+            rng = random.Random(f"{seed_value}:{table}")
+            args = (password_hash,) if table == "users" else ()
+            start = time.perf_counter()
+            loaded[table] = copy_rows(cursor, table, COLUMNS[table], generator(plan, rng, *args))
+            # Les ids sont fournis explicitement: on recale la séquence pour les insertions de l'API
+            cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))")
+            conn.commit()
+            print(f"{table:<24}{loaded[table]:>10} rows  {time.perf_counter() - start:8.1f}s")
+        # COPY contourne la mise à jour incrémentale de l'omnibox: reconstruction complète
+        start = time.perf_counter()
+        with engine.begin() as connection:
+            search_index.rebuild(connection)
+        print(f"{'search_documents':<24}{'':>10}       {time.perf_counter() - start:8.1f}s")
+        conn.autocommit = True
+        cursor.execute("ANALYZE")
+        cursor.close()
+        return loaded
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=0.01, help="multiplicateur des volumes (1 = 1M propriétaires)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true", help="vide les tables de fichiers et les comptes générés avant chargement")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    loaded = seed(args.scale, args.seed, args.truncate)
+    print(f"total: {sum(loaded.values())} rows in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
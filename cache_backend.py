@@ -0,0 +1,391 @@
+import asyncio
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncContextManager, AsyncIterator, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from log import api_log
+from metrics import CACHE_BYTES, CACHE_LOOKUPS
+
+# Cache partagé par les routes (réponses /public, utilisateurs authentifiés).
+# CACHE_BACKEND=memory: LRU dans chaque worker. CACHE_BACKEND=redis: un seul cache pour tous
+# les workers (pip install redis), y compris l'invalidation par étiquettes.
+# Les clés sont préfixées par un espace de noms ("resp:", "user:") utilisé pour les métriques.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+# Seul le backend redis est commun aux workers: avec memory, l'invalidation sur commit n'atteint
+# que le worker qui a écrit, les autres gardent leur copie jusqu'au TTL
+SHARED = CACHE_BACKEND == "redis"
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # backend memory
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_REDIS_PREFIX = os.getenv("CACHE_REDIS_PREFIX", "neogend:")
+# Attente maximale d'un autre worker qui construit la même entrée (single-flight)
+CACHE_SINGLE_FLIGHT_WAIT_S = float(os.getenv("CACHE_SINGLE_FLIGHT_WAIT_S", "2"))
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    redis = None
+
+
+def multiple_workers() -> bool:
+    """Plusieurs workers configurés: WEB_CONCURRENCY (défaut de uvicorn --workers) > 1, ou
+    PROMETHEUS_MULTIPROC_DIR, requis par metrics.py dès qu'il y a plusieurs workers."""
+    return int(os.getenv("WEB_CONCURRENCY", "1")) > 1 or bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def _namespace(key: str) -> str:
+    return key.split(":", 1)[0]
+
+
+class CacheBackend(ABC):
+    """Interface commune des backends. Les valeurs sont des octets.
+
+    generation() est lu avant de construire une valeur et passé à set(): si une invalidation
+    est survenue entre-temps, la valeur (potentiellement périmée) n'est pas enregistrée.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl_s: float, tags: Iterable[str] = (), generation: Optional[int] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def invalidate(self, tags: Iterable[str]) -> None:
+        ...
+
+    @abstractmethod
+    def generation(self) -> int:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def single_flight(self, key: str) -> AsyncContextManager[None]:
+        """Un seul constructeur à la fois pour une clé donnée (gestionnaire de contexte asynchrone).
+
+        L'attente rend la main à la boucle d'évènements: les appelants sont les dépendances et
+        routes async, un time.sleep ici gèlerait toutes les requêtes du worker.
+        """
+        ...
+
+
+class _MemoryEntry:
+    __slots__ = ("value", "tags", "expires_at")
+
+    def __init__(self, value: bytes, tags: Tuple[str, ...], expires_at: float) -> None:
+        self.value = value
+        self.tags = tags
+        self.expires_at = expires_at
+
+
+class MemoryBackend(CacheBackend):
+    """LRU borné en octets, avec TTL par entrée et index des étiquettes. Propre au processus."""
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _MemoryEntry]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._bytes = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._flights: Dict[str, list] = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        return entry.value if entry is not None else None
+
+    def set(self, key: str, value: bytes, ttl_s: float, tags: Iterable[str] = (), generation: Optional[int] = None) -> None:
+        entry = _MemoryEntry(value, tuple(tags), time.monotonic() + ttl_s)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return  # une écriture a eu lieu pendant la construction: on ne garde pas
+            self._remove(key)
+            self._entries[key] = entry
+            self._bytes += len(value)
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while self._bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+            CACHE_BYTES.set(self._bytes)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+            CACHE_BYTES.set(self._bytes)
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    self._remove(key)
+            CACHE_BYTES.set(self._bytes)
+
+    def generation(self) -> int:
+        return self._generation
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+            CACHE_BYTES.set(0)
+
+    @asynccontextmanager
+    async def single_flight(self, key: str) -> AsyncIterator[None]:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = [asyncio.Lock(), 0]
+            flight[1] += 1  # nombre d'appelants, pour retirer le verrou après le dernier
+        try:
+            async with flight[0]:
+                yield
+        finally:
+            with self._lock:
+                flight[1] -= 1
+                if flight[1] == 0:
+                    del self._flights[key]
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= len(entry.value)
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisBackend(CacheBackend):
+    """Backend Redis (protocole RESP: Redis >= 7, Valkey, KeyDB...). Partagé entre workers.
+
+    Chaque étiquette est un SET Redis des clés qui la portent; le compteur de génération est
+    une clé incrémentée à chaque invalidation et surveillée (WATCH) par set().
+    Une panne Redis n'interrompt pas les requêtes: lecture manquée, écriture ignorée, journalisée.
+    """
+
+    def __init__(self, url: str = CACHE_REDIS_URL, prefix: str = CACHE_REDIS_PREFIX, client: Any = None) -> None:
+        if client is None:
+            if redis is None:
+                raise RuntimeError("CACHE_BACKEND=redis nécessite le paquet redis (pip install redis)")
+            client = redis.Redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+        self.client = client
+        self.prefix = prefix
+        self._generation_key = f"{prefix}generation"
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _tag(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def _failed(self, op: str, exc: Exception) -> None:
+        api_log("cache.redis.error", level="WARNING", err=exc, tags=["cache"], data={"op": op})
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = self.client.get(self._key(key))
+        except redis.RedisError as exc:  # type: ignore[union-attr]
+            self._failed("get", exc)
+            value = None
+        return value
+
+    def set(self, key: str, value: bytes, ttl_s: float, tags: Iterable[str] = (), generation: Optional[int] = None) -> None:
+        ttl_ms = max(1, int(ttl_s * 1000))
+        full_key = self._key(key)
+        try:
+            with self.client.pipeline() as pipe:
+                if generation is not None:
+                    pipe.watch(self._generation_key)
+                    if int(pipe.get(self._generation_key) or 0) != generation:
+                        return
+                    pipe.multi()
+                pipe.set(full_key, value, px=ttl_ms)
+                for tag in tags:
+                    tag_key = self._tag(tag)
+                    pipe.sadd(tag_key, full_key)
+                    # L'index vit au moins aussi longtemps que la plus longue de ses entrées
+                    pipe.pexpire(tag_key, ttl_ms, nx=True)
+                    pipe.pexpire(tag_key, ttl_ms, gt=True)
+                pipe.execute()
+        except redis.WatchError:  # type: ignore[union-attr]
+            pass  # invalidation concurrente: on ne garde pas
+        except redis.RedisError as exc:  # type: ignore[union-attr]
+            self._failed("set", exc)
+
+    def delete(self, key: str) -> None:
+        try:
+            self.client.delete(self._key(key))
+        except redis.RedisError as exc:  # type: ignore[union-attr]
+            self._failed("delete", exc)
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        tags = list(tags)
+        tag_keys = [self._tag(tag) for tag in tags]
+        try:
+            # Génération d'abord (même transaction que la lecture des index): toute construction
+            # démarrée avant ce point verra son set() refusé
+            with self.client.pipeline() as pipe:
+                pipe.incr(self._generation_key)
+                for tag_key in tag_keys:
+                    pipe.smembers(tag_key)
+                _generation, *members = pipe.execute()
+            with self.client.pipeline() as pipe:
+                for tag_key, keys in zip(tag_keys, members):
+                    if keys:
+                        pipe.delete(*keys)
+                        # SREM et non DEL: une entrée fraîche ajoutée entre-temps reste indexée
+                        pipe.srem(tag_key, *keys)
+                pipe.execute()
+        except redis.RedisError as exc:  # type: ignore[union-attr]
+            api_log("cache.redis.invalidate.failed", level="ERROR", err=exc, tags=["cache"], data={"tags": tags})
+
+    def generation(self) -> int:
+        try:
+            return int(self.client.get(self._generation_key) or 0)
+        except redis.RedisError as exc:  # type: ignore[union-attr]
+            self._failed("generation", exc)
+            return -1  # set() refusera: pas d'écriture sans garde
+
+    def clear(self) -> None:
+        try:
+            keys = list(self.client.scan_iter(match=f"{self.prefix}*", count=1000))
+            if keys:
+                self.client.delete(*keys)
+            self.client.incr(self._generation_key)
+        except redis.RedisError as exc:  # type: ignore[union-attr]
+            self._failed("clear", exc)
+
+    @asynccontextmanager
+    async def single_flight(self, key: str) -> AsyncIterator[None]:
+        # Verrou SET NX à durée limitée: les autres appelants attendent (asyncio.sleep) que la valeur
+        # apparaisse ou que le verrou disparaisse, puis construisent eux-mêmes au-delà du délai.
+        # Un détenteur mort libère au plus tard à l'expiration du verrou; Redis en erreur: construction immédiate.
+        lock_key = self._key(f"lock:{key}")
+        token = uuid.uuid4().hex
+        acquired = False
+        try:
+            acquired = bool(self.client.set(lock_key, token, nx=True, px=int(CACHE_SINGLE_FLIGHT_WAIT_S * 1000)))
+            if not acquired:
+                deadline = time.monotonic() + CACHE_SINGLE_FLIGHT_WAIT_S
+                while time.monotonic() < deadline:
+                    if self.client.exists(self._key(key)) or not self.client.exists(lock_key):
+                        break
+                    await asyncio.sleep(0.01)
+        except redis.RedisError as exc:  # type: ignore[union-attr]
+            self._failed("single_flight", exc)
+        try:
+            yield
+        finally:
+            if acquired:
+                try:
+                    if self.client.get(lock_key) == token.encode():
+                        self.client.delete(lock_key)
+                except redis.RedisError as exc:  # type: ignore[union-attr]
+                    self._failed("single_flight", exc)
+
+
+def create_backend() -> CacheBackend:
+    if CACHE_BACKEND == "redis":
+        return RedisBackend()
+    if CACHE_BACKEND != "memory":
+        raise RuntimeError(f"CACHE_BACKEND inconnu: {CACHE_BACKEND} (memory ou redis)")
+    return MemoryBackend()
+
+
+backend: CacheBackend = create_backend()
+
+
+def lookup(key: str) -> Optional[bytes]:
+    """Lecture simple; seuls les succès sont comptés (l'échec l'est par get_or_build)."""
+    value = backend.get(key)
+    if value is not None:
+        CACHE_LOOKUPS.labels(_namespace(key), "hit").inc()
+    return value
+
+
+async def get_or_build(key: str, build: Callable[[], Optional[bytes]], ttl_s: float, tags: Iterable[str] = (),
+                       checked: bool = False) -> Tuple[Optional[bytes], bool]:
+    """Valeur en cache, ou construite par un seul appelant à la fois. Renvoie (valeur, hit).
+
+    checked=True si l'appelant vient de faire lookup(key) sans succès. build() peut renvoyer
+    None (ex: enregistrement absent): rien n'est mis en cache.
+    """
+    if not checked:
+        value = lookup(key)
+        if value is not None:
+            return value, True
+    async with backend.single_flight(key):
+        # Un autre appelant a pu construire la valeur pendant l'attente du verrou
+        value = backend.get(key)
+        if value is not None:
+            CACHE_LOOKUPS.labels(_namespace(key), "hit").inc()
+            return value, True
+        CACHE_LOOKUPS.labels(_namespace(key), "miss").inc()
+        generation = backend.generation()
+        value = build()
+        if value is not None:
+            backend.set(key, value, ttl_s, tags, generation)
+    return value, False
+
+
+# ---------- Invalidation sur commit ----------
+# Chaque module enregistre, pour ses modèles, la fonction qui donne les étiquettes d'un objet
+# modifié; les étiquettes collectées pendant les flush sont invalidées au commit.
+_TAGGERS: Dict[type, Callable[[Any], List[str]]] = {}
+_PENDING_TAGS = "cache_tags"
+
+
+def register_tagger(model: type, tagger: Callable[[Any], List[str]]) -> None:
+    _TAGGERS[model] = tagger
+
+
+def _after_flush(session: Session, _flush_context) -> None:
+    pending = session.info.setdefault(_PENDING_TAGS, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        tagger = _TAGGERS.get(type(obj))
+        if tagger is not None:
+            pending.update(tagger(obj))
+
+
+def _after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_TAGS, None)
+    if pending:
+        backend.invalidate(pending)
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_TAGS, None)
+
+
+def install(session_factory) -> None:
+    event.listen(session_factory, "after_flush", _after_flush)
+    event.listen(session_factory, "after_commit", _after_commit)
+    event.listen(session_factory, "after_rollback", _after_rollback)
@@ -0,0 +1,74 @@
+import asyncio
+import os
+from typing import Any, Callable, Dict
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+
+from metrics import COALESCE_REQUESTS
+
+# Regroupement (single-flight) des GET identiques simultanés: même chemin, mêmes paramètres,
+# même classe d'autorisation. Le premier exécute la requête DB et la sérialisation dans le
+# threadpool; ceux qui arrivent pendant ce temps attendent le même résultat (mêmes octets).
+# Propre au worker: rien n'est conservé une fois la construction terminée (ce n'est pas un cache).
+COALESCE_ENABLED = os.getenv("COALESCE_ENABLED", "true").lower() == "true"
+
+_inflight: Dict[str, "asyncio.Future[bytes]"] = {}
+
+
+def authorization_class(user: Any) -> str:
+    """Ce qui détermine ce qu'un utilisateur a le droit de voir (et non qui il est)."""
+    return f"{user.privileges or 'user'}/{user.rp_qualif or '-'}"
+
+
+def coalesce_key(request: Request, user: Any, variant: str = "") -> str:
+    query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+    return f"{request.url.path}?{query}|{authorization_class(user)}|{variant}"
+
+
+def _build_with_session(build: Callable[[Session], bytes]) -> bytes:
+    # Session propre à la construction, jamais celle de la requête du leader: protégée par shield,
+    # la construction survit à l'annulation du leader, dont get_db ferme alors la session
+    # (depuis la boucle d'évènements, pendant que ce thread s'en sert encore)
+    db = SessionLocal()
+    try:
+        return build(db)
+    finally:
+        db.close()
+
+
+async def coalesced(request: Request, user: Any, build: Callable[[Session], bytes], variant: str = "") -> bytes:
+    """Corps construit une seule fois pour toutes les requêtes identiques en cours.
+
+    build(db) est synchrone: il s'exécute hors de la boucle d'évènements, avec une session ouverte
+    pour lui (ne pas utiliser la session de la route dans build).
+    variant distingue des constructions qui ne doivent pas être partagées (ex: révision de table).
+    """
+    if not COALESCE_ENABLED:
+        return _build_with_session(build)
+    route = getattr(request.scope.get("route"), "path", None) or request.url.path
+    key = coalesce_key(request, user, variant)
+    task = _inflight.get(key)
+    if task is not None:
+        COALESCE_REQUESTS.labels(route, "follower").inc()
+    else:
+        COALESCE_REQUESTS.labels(route, "leader").inc()
+        task = asyncio.ensure_future(run_in_threadpool(_build_with_session, build))
+        _inflight[key] = task
+        task.add_done_callback(lambda done: _done(key, done))
+    # shield: l'annulation d'une requête (client parti) n'annule pas la construction des autres
+    return await asyncio.shield(task)
+
+
+def _done(key: str, task: "asyncio.Future[bytes]") -> None:
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        task.exception()  # marque l'exception comme lue si plus personne n'attend
+
+
+async def coalesced_json(request: Request, user: Any, build: Callable[[Session], bytes]) -> Response:
+    return Response(content=await coalesced(request, user, build), media_type="application/json")
@@ -0,0 +1,160 @@
+import os
+import zlib
+from typing import Callable, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+# Compression des réponses selon Accept-Encoding: zstd et brotli si les modules optionnels
+# sont installés (pip install zstandard brotli), gzip sinon. Les petits corps (< COMPRESSION_MIN_SIZE)
+# partent tels quels: le gain ne paie pas le CPU.
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    zstandard = None
+
+_COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/javascript", "application/xml", "application/problem+json")
+
+
+class _Compressor:
+    """Interface commune: compress() pour un morceau de flux, finish() pour terminer."""
+
+    def __init__(self, compress: Callable[[bytes], bytes], finish: Callable[[], bytes]) -> None:
+        self.compress = compress
+        self.finish = finish
+
+
+def _gzip() -> _Compressor:
+    obj = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)  # 31 = en-tête gzip
+    # Z_SYNC_FLUSH: chaque morceau d'un flux est décodable dès réception
+    return _Compressor(lambda data: obj.compress(data) + obj.flush(zlib.Z_SYNC_FLUSH), obj.flush)
+
+
+def _brotli() -> _Compressor:
+    obj = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)  # type: ignore[union-attr]
+    return _Compressor(lambda data: obj.process(data) + obj.flush(), obj.finish)
+
+
+def _zstd() -> _Compressor:
+    obj = zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compressobj()  # type: ignore[union-attr]
+    return _Compressor(lambda data: obj.compress(data) + obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK), obj.flush)  # type: ignore[union-attr]
+
+
+def available_encodings() -> List[Tuple[str, Callable[[], _Compressor]]]:
+    """Encodages supportés, par ordre de préférence serveur."""
+    encodings: List[Tuple[str, Callable[[], _Compressor]]] = []
+    if zstandard is not None:
+        encodings.append(("zstd", _zstd))
+    if brotli is not None:
+        encodings.append(("br", _brotli))
+    encodings.append(("gzip", _gzip))
+    return encodings
+
+
+def _accepted(accept_encoding: str) -> dict:
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def negotiate(accept_encoding: str) -> Optional[Tuple[str, Callable[[], _Compressor]]]:
+    accepted = _accepted(accept_encoding)
+    candidates = [(accepted.get(name, accepted.get("*", 0.0)), -rank, name, factory)
+                  for rank, (name, factory) in enumerate(available_encodings())]
+    candidates = [c for c in candidates if c[0] > 0]
+    if not candidates:
+        return None
+    _quality, _rank, name, factory = max(candidates)
+    return name, factory
+
+
+def _compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False  # déjà compressé (ex: instantané pré-compressé)
+    content_type = headers.get("content-type", "")
+    return content_type.startswith(_COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """Compresse les réponses, y compris les StreamingResponse (morceau par morceau)."""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not COMPRESSION_ENABLED or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        chosen = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if chosen is None:
+            await self.app(scope, receive, send)
+            return
+
+        encoding, factory = chosen
+        start_message = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_wrapper(message) -> None:
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                # Retenu jusqu'au premier morceau: la décision dépend de la taille du corps
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=list(start_message.get("headers", [])))  # type: ignore[union-attr]
+                content_length = headers.get("content-length")
+                too_small = (len(body) < self.minimum_size and not more_body) or (
+                    content_length is not None and int(content_length) < self.minimum_size)
+                if too_small or not _compressible(headers):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = factory()
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["content-length"]
+                    data = compressor.compress(body)
+                else:
+                    data = compressor.compress(body) + compressor.finish()
+                    headers["content-length"] = str(len(data))
+                start_message["headers"] = headers.raw  # type: ignore[index]
+                await send(start_message)
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            data = compressor.compress(body)
+            if not more_body:
+                data += compressor.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,12 +1,11 @@
-from database import SessionLocal
+from database import get_db
 from fastapi import FastAPI, Depends, HTTPException, APIRouter, status, Body, Request
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, ConfigDict
 from typing import Annotated, List
 from models import Users  # Add this import for the Users model
-from passlib.context import CryptContext
 import models
-from auth import get_current_user
+from auth import get_current_user, verify_password, hash_password
 from log import api_log
 
 def connection_required(current_user: Annotated[models.Users, Depends(get_current_user)]):
@@ -20,8 +19,6 @@ router = APIRouter(
     dependencies=[Depends(connection_required)]
 )
 
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 class UserPublic(BaseModel):
     id: int
@@ -46,13 +43,6 @@ class NotificationCreate(BaseModel):
     message: str
     redirect_to: str | None = None  # URL to redirect when clicking on the notification
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 db_dependency = Annotated[Session, Depends(get_db)]
 user_dependency = Annotated[models.Users, Depends(get_current_user)]
 
@@ -70,16 +60,16 @@ class PasswordChangeRequest(BaseModel):
 
 @router.post("/user/password_change/")
 async def change_password(password_change: PasswordChangeRequest, db: db_dependency, user: user_dependency, request: Request):
-    # Recharger l'utilisateur dans la session courante (l'objet injecté vient d'une autre session)
+    # Relecture explicite de l'utilisateur avant modification du mot de passe
     user_db = db.query(Users).filter(Users.id == user.id).first()
     if not user_db:
         raise HTTPException(status_code=404, detail="User not found")
-    if not bcrypt_context.verify(password_change.old_password, user_db.password):  # type: ignore
+    if not await verify_password(password_change.old_password, user_db.password):  # type: ignore
         api_log("password.change.failed", level="CRITICAL", request=request, tags=["users", "password"], user_id=user_db.id,email=user_db.email, correlation_id=request.headers.get("x-correlation-id")) # type: ignore
         raise HTTPException(status_code=400, detail="Old password is incorrect")
 
     user_db.token_version += 1 #type: ignore
-    user_db.password = bcrypt_context.hash(password_change.new_password)  # type: ignore
+    user_db.password = await hash_password(password_change.new_password)  # type: ignore
     user_db.temp_password = False # type: ignore
     api_log("password.change", level="CRITICAL", request=request, tags=["users", "password"], user_id=user_db.id,email=user_db.email, correlation_id=request.headers.get("x-correlation-id")) # type: ignore
     db.commit()
@@ -13,11 +13,29 @@ DB_NAME = os.getenv('POSTGRES_DB')
 
 URL_DATABASE = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
 
+# Pool par worker. Les routes sont async mais la session est synchrone: au-delà de
+# DB_POOL_SIZE + DB_MAX_OVERFLOW requêtes simultanées, l'attente d'une connexion bloque la boucle.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+
 engine = create_engine(
 	URL_DATABASE,
 	pool_pre_ping=True,
+	pool_size=DB_POOL_SIZE,
+	max_overflow=DB_MAX_OVERFLOW,
+	pool_timeout=DB_POOL_TIMEOUT,
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+# Une seule session par requête HTTP: FastAPI met en cache une dépendance par callable,
+# donc get_current_user et la route partagent cette session (et sa connexion du pool).
+def get_db():
+	db = SessionLocal()
+	try:
+		yield db
+	finally:
+		db.close()
@@ -0,0 +1,39 @@
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+# ETags des lectures unitaires, dérivés de la colonne version des fichiers (voir models.py).
+# ETag faible (W/): le corps peut varier selon l'encodage de compression négocié.
+
+
+def make_etag(model: Any, record_id: int, version: int) -> str:
+    return f'W/"{model.__tablename__}-{record_id}-{version}"'
+
+
+def matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Comparaison faible (RFC 9110): on ignore le préfixe W/
+    wanted = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == wanted for candidate in if_none_match.split(","))
+
+
+def not_modified(request: Request, db: Session, model: Any, record_id: int) -> Optional[Response]:
+    """304 si If-None-Match correspond à la version courante, après une requête sur la seule colonne version.
+
+    Renvoie None si la requête doit être servie normalement (pas d'en-tête, version différente,
+    ou enregistrement absent: la route renvoie alors son 404 habituel).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    version = db.execute(select(model.version).where(model.id == record_id)).scalar_one_or_none()
+    if version is None:
+        return None
+    etag = make_etag(model, record_id, version)
+    if not matches(if_none_match, etag):
+        return None
+    return Response(status_code=304, headers={"ETag": etag})
+
@@ -0,0 +1,79 @@
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, Response
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+from typing_extensions import NotRequired, TypedDict
+
+from fast_response import RowSerializer
+
+# Paramètre expand= des lectures /public: embarque l'enregistrement référencé (propriétaire, permis, agent)
+# dans chaque ligne. Résolution à la manière d'un dataloader: les clés de toute la page sont regroupées
+# et chaque relation coûte une seule requête (column = ANY(:keys)), jamais une requête par ligne.
+
+
+class Relation:
+    """Champ de référence d'une ligne (field) et colonne correspondante de la table référencée."""
+
+    def __init__(self, field: str, rows: RowSerializer, column: Any) -> None:
+        self.field = field
+        self.rows = rows
+        self.column = column
+
+
+class Expander:
+    """Relations extensibles d'un schéma de lecture.
+
+        fnpc_expander = Expander(fnpc_rows, {"proprietaire": Relation("prop_id", proprietaire_rows, Proprietaires.id)})
+
+        names = fnpc_expander.parse(expand)          # 422 si une relation est inconnue
+        if names:
+            return fnpc_expander.list_response(db, names, statement)
+    """
+
+    def __init__(self, rows: RowSerializer, relations: Dict[str, Relation]) -> None:
+        self.rows = rows
+        self.relations = relations
+        fields: Dict[str, Any] = {name: field.annotation for name, field in rows.schema.model_fields.items()}
+        # Relations absentes de la ligne si non demandées, null si la référence est vide ou introuvable
+        for name, relation in relations.items():
+            fields[name] = NotRequired[Optional[relation.rows.row_type]]  # type: ignore[valid-type]
+        row_type = TypedDict(f"{rows.schema.__name__}Expanded", fields)  # type: ignore[misc]
+        self._one = TypeAdapter(row_type)
+        self._many = TypeAdapter(List[row_type])  # type: ignore[valid-type]
+
+    def parse(self, expand: Optional[str]) -> List[str]:
+        if not expand:
+            return []
+        names = list(dict.fromkeys(name.strip() for name in expand.split(",") if name.strip()))
+        unknown = [name for name in names if name not in self.relations]
+        if unknown:
+            raise HTTPException(status_code=422, detail=f"Unknown expand: {', '.join(unknown)} (allowed: {', '.join(self.relations)})")
+        return names
+
+    def resolve(self, db: Session, rows: List[Dict[str, Any]], names: List[str]) -> List[Dict[str, Any]]:
+        for name in names:
+            relation = self.relations[name]
+            keys = {row[relation.field] for row in rows if row[relation.field] is not None}
+            targets = relation.rows.rows_by_key(db, relation.column, keys) if keys else {}
+            for row in rows:
+                row[name] = targets.get(row[relation.field])
+        return rows
+
+    def dump_one(self, row: Dict[str, Any]) -> bytes:
+        return self._one.dump_json(row)  # type: ignore[arg-type]
+
+    def dump_many(self, rows: List[Dict[str, Any]]) -> bytes:
+        return self._many.dump_json(rows)  # type: ignore[arg-type]
+
+    def list_response(self, db: Session, names: List[str], statement=None) -> Response:
+        rows = self.resolve(db, self.rows.rows(db, statement), names)
+        return Response(content=self.dump_many(rows), media_type="application/json")
+
+    def one_response(self, db: Session, names: List[str], statement) -> Optional[Response]:
+        """Réponse pour la première ligne de statement; None si aucune (404 côté route)."""
+        rows = self.rows.rows(db, statement)
+        if not rows:
+            return None
+        row = self.resolve(db, rows[:1], names)[0]
+        return Response(content=self.dump_one(row), media_type="application/json")
@@ -0,0 +1,371 @@
+"""Export en masse d'une table (ou d'un ensemble de dossiers) en CSV, NDJSON ou Parquet.
+
+Réservé aux owners (GET /export/{table}) et en ligne de commande sur le serveur:
+
+    python -m export proprietaires --format csv --compression gzip          # -> proprietaires.csv.gz
+    python -m export fnpc --format parquet -o /backups/fnpc.parquet
+    python -m export siv --format ndjson --prop-ids 12,48 -o -              # dossiers 12 et 48, sur stdout
+
+Les lignes sont lues par un curseur côté serveur (stream_results, EXPORT_CHUNK_ROWS lignes à la fois)
+et chaque lot est encodé, compressé puis écrit avant la lecture du suivant: la mémoire utilisée ne dépend
+pas de la taille de la table. Parquet nécessite pyarrow (pip install pyarrow), un groupe de lignes par lot.
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Annotated, Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, Integer, or_, select
+from sqlalchemy.orm import Session
+
+import models
+from auth import get_current_user
+from compression import available_encodings
+from database import SessionLocal
+from log import api_log
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    pyarrow = None
+
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "5000"))
+
+FORMATS = {
+    "csv": ("csv", "text/csv; charset=utf-8"),
+    "ndjson": ("ndjson", "application/x-ndjson"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+# Compression du fichier entier (encodages de compression.py); pour Parquet, codec des colonnes
+COMPRESSIONS = {
+    "gzip": (".gz", "application/gzip", "gzip"),
+    "br": (".br", "application/x-brotli", "brotli"),
+    "zstd": (".zst", "application/zstd", "zstd"),
+}
+
+
+class ExportTable:
+    """Table exportable: colonnes exportées et filtre « dossiers » (lignes liées à des propriétaires)."""
+
+    def __init__(self, model: Any, exclude: Sequence[str] = (), dossier: Optional[Callable[[List[int]], Any]] = None) -> None:
+        self.model = model
+        self.columns = [column for column in model.__table__.columns if column.name not in exclude]
+        self.dossier = dossier
+
+
+# Clés de recherche dérivées (nom_recherche, clés phonétiques) et secrets des comptes non exportés
+EXPORT_TABLES: Dict[str, ExportTable] = {
+    "proprietaires": ExportTable(
+        models.Proprietaires,
+        exclude=("nom_recherche", "nom_phonetique", "nom_usage_phonetique", "prenom_phonetique"),
+        dossier=lambda ids: models.Proprietaires.id.in_(ids),
+    ),
+    "fnpc": ExportTable(models.fnpc, dossier=lambda ids: models.fnpc.prop_id.in_(ids)),
+    "siv": ExportTable(
+        models.siv,
+        exclude=("ci_plaque_normalisee",),
+        dossier=lambda ids: or_(models.siv.prop_id.in_(ids), models.siv.co_prop_id.in_(ids)),
+    ),
+    "fpr": ExportTable(models.fpr, dossier=lambda ids: models.fpr.prop_id.in_(ids)),
+    "infractions_routieres": ExportTable(
+        models.infractions_routieres,
+        dossier=lambda ids: models.infractions_routieres.neph.in_(select(models.fnpc.neph).where(models.fnpc.prop_id.in_(ids))),
+    ),
+    "users": ExportTable(models.Users, exclude=("password", "temp_password", "token_version")),
+    "notifications": ExportTable(models.Notifications),
+}
+
+
+# ---------- Encodeurs (un appel par lot de lignes) ----------
+class _CsvEncoder:
+    def __init__(self, names: List[str]) -> None:
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer, lineterminator="\n")
+        self.writer.writerow(names)
+
+    def _drain(self) -> bytes:
+        data = self.buffer.getvalue().encode("utf-8")
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+    def encode(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        self.writer.writerows(rows)
+        return self._drain()
+
+    def finish(self) -> bytes:
+        return self._drain()
+
+
+class _NdjsonEncoder:
+    def __init__(self, names: List[str]) -> None:
+        self.names = names
+
+    def encode(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        names = self.names
+        # Copie immédiate dans un bytearray: les bytes d'orjson réservent bien plus que leur longueur,
+        # un b"".join garderait toutes les réservations du lot en mémoire jusqu'à la fin
+        buffer = bytearray()
+        for row in rows:
+            buffer += orjson.dumps(dict(zip(names, row)), option=orjson.OPT_APPEND_NEWLINE)
+        return bytes(buffer)
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class _Sink:
+    """Fichier en écriture seule pour pyarrow: les octets écrits sont repris après chaque groupe de lignes."""
+
+    def __init__(self) -> None:
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _arrow_type(column: Any):
+    # BigInteger avant Integer (sous-classe)
+    if isinstance(column.type, BigInteger):
+        return pyarrow.int64()  # type: ignore[union-attr]
+    if isinstance(column.type, Integer):
+        return pyarrow.int32()  # type: ignore[union-attr]
+    if isinstance(column.type, Boolean):
+        return pyarrow.bool_()  # type: ignore[union-attr]
+    if isinstance(column.type, DateTime):
+        return pyarrow.timestamp("us", tz="UTC" if column.type.timezone else None)  # type: ignore[union-attr]
+    if isinstance(column.type, Date):
+        return pyarrow.date32()  # type: ignore[union-attr]
+    return pyarrow.string()  # type: ignore[union-attr]
+
+
+class _ParquetEncoder:
+    def __init__(self, columns: List[Any], codec: Optional[str]) -> None:
+        # Schéma explicite: un lot où une colonne est entièrement NULL garde le type de la colonne
+        self.schema = pyarrow.schema([(column.name, _arrow_type(column)) for column in columns])  # type: ignore[union-attr]
+        self.sink = _Sink()
+        self.writer = pyarrow.parquet.ParquetWriter(pyarrow.PythonFile(self.sink, mode="w"), self.schema, compression=codec or "snappy")  # type: ignore[union-attr]
+
+    def encode(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        arrays = [pyarrow.array([row[index] for row in rows], type=field.type) for index, field in enumerate(self.schema)]  # type: ignore[union-attr]
+        self.writer.write_batch(pyarrow.record_batch(arrays, schema=self.schema))  # type: ignore[union-attr]
+        return self.sink.drain()
+
+    def finish(self) -> bytes:
+        self.writer.close()
+        return self.sink.drain()
+
+
+class Export:
+    """Un export: table, format, compression et filtres validés; chunks() produit le fichier morceau par morceau.
+
+    Lève ValueError pour une option invalide (422 côté route, erreur d'usage côté CLI).
+    """
+
+    def __init__(self, table: str, format: str = "csv", compression: Optional[str] = None,
+                 prop_ids: Optional[List[int]] = None, since: Optional[datetime] = None) -> None:
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"Unknown table: {table} (allowed: {', '.join(EXPORT_TABLES)})")
+        if format not in FORMATS:
+            raise ValueError(f"Unknown format: {format} (allowed: {', '.join(FORMATS)})")
+        encodings = {name for name, _factory in available_encodings()}
+        if compression is not None and (compression not in COMPRESSIONS or (format != "parquet" and compression not in encodings)):
+            allowed = list(COMPRESSIONS) if format == "parquet" else [name for name in COMPRESSIONS if name in encodings]
+            raise ValueError(f"Unsupported compression: {compression} (allowed: {', '.join(allowed)})")
+        if format == "parquet" and pyarrow is None:
+            raise ValueError("Parquet export requires pyarrow (pip install pyarrow)")
+        self.table = EXPORT_TABLES[table]
+        if prop_ids is not None and self.table.dossier is None:
+            raise ValueError(f"prop_ids does not apply to {table}")
+        if since is not None:
+            if not hasattr(self.table.model, "updated_at"):
+                raise ValueError(f"since does not apply to {table}")
+            if since.tzinfo is None:
+                raise ValueError("since must include a timezone")
+        self.name = table
+        self.format = format
+        self.compression = compression
+        self.prop_ids = prop_ids
+        self.since = since
+        self.rows = 0
+        self.bytes = 0
+
+    @property
+    def filename(self) -> str:
+        extension, _media_type = FORMATS[self.format]
+        if self.compression is not None and self.format != "parquet":
+            extension += COMPRESSIONS[self.compression][0]
+        return f"{self.name}.{extension}"
+
+    @property
+    def media_type(self) -> str:
+        if self.compression is not None and self.format != "parquet":
+            return COMPRESSIONS[self.compression][1]
+        return FORMATS[self.format][1]
+
+    def statement(self):
+        model = self.table.model
+        statement = select(*self.table.columns).order_by(model.id)
+        if self.prop_ids is not None:
+            statement = statement.where(self.table.dossier(self.prop_ids))  # type: ignore[misc]
+        if self.since is not None:
+            statement = statement.where(model.updated_at >= self.since)
+        # Curseur nommé psycopg2: le serveur envoie EXPORT_CHUNK_ROWS lignes à chaque FETCH
+        return statement.execution_options(stream_results=True, yield_per=EXPORT_CHUNK_ROWS)
+
+    def _encoder(self):
+        names = [column.name for column in self.table.columns]
+        if self.format == "csv":
+            return _CsvEncoder(names)
+        if self.format == "ndjson":
+            return _NdjsonEncoder(names)
+        codec = COMPRESSIONS[self.compression][2] if self.compression is not None else None
+        return _ParquetEncoder(self.table.columns, codec)
+
+    def chunks(self, db: Session) -> Iterator[bytes]:
+        encoder = self._encoder()
+        compressor = None
+        if self.compression is not None and self.format != "parquet":
+            compressor = dict(available_encodings())[self.compression]()
+        result = db.execute(self.statement())
+        try:
+            for rows in result.partitions():
+                self.rows += len(rows)
+                data = encoder.encode(rows)
+                if compressor is not None:
+                    data = compressor.compress(data)
+                if data:
+                    self.bytes += len(data)
+                    yield data
+        finally:
+            result.close()
+        data = encoder.finish()
+        if compressor is not None:
+            data = compressor.compress(data) + compressor.finish()
+        if data:
+            self.bytes += len(data)
+            yield data
+
+
+def parse_ids(value: Optional[str]) -> Optional[List[int]]:
+    if value is None:
+        return None
+    try:
+        return sorted({int(part) for part in value.split(",") if part.strip()})
+    except ValueError:
+        raise ValueError("prop_ids must be a comma-separated list of integers") from None
+
+
+# ---------- Route (owner uniquement) ----------
+def owner_required(current_user: Annotated[models.Users, Depends(get_current_user)]):
+    if not current_user or current_user.privileges != "owner": # type: ignore
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    return current_user
+
+router = APIRouter(
+    prefix="/export",
+    tags=["export"],
+    dependencies=[Depends(owner_required)]
+)
+
+user_dependency = Annotated[models.Users, Depends(get_current_user)]
+
+def _stream(export: Export, user: models.Users, correlation_id: Optional[str], data: Dict[str, Any]) -> Iterator[bytes]:
+    # Session propre au flux: celle de get_db est fermée avant l'envoi du corps d'une StreamingResponse.
+    # Générateur synchrone: Starlette l'itère dans le pool de threads, la boucle d'évènements reste libre.
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        yield from export.chunks(db)
+    except Exception as e:
+        api_log("export.failed", level="ERROR", email=user.email, user_id=user.id, tags=["export"], correlation_id=correlation_id, data={**data, "rows": export.rows}, err=e) # type: ignore
+        raise
+    finally:
+        db.close()
+    api_log("export.done", level="INFO", email=user.email, user_id=user.id, tags=["export"], correlation_id=correlation_id, data={**data, "rows": export.rows, "bytes": export.bytes, "duration_ms": round((time.perf_counter() - start) * 1000, 1)}) # type: ignore
+
+@router.get("/{table}")
+async def export_table(
+    table: str,
+    user: user_dependency,
+    request: Request,
+    format: str = Query("csv", description="csv, ndjson ou parquet"),
+    compression: Optional[str] = Query(None, description="gzip, br ou zstd (codec des colonnes pour parquet)"),
+    prop_ids: Optional[str] = Query(None, description="Dossiers: ids de propriétaires séparés par des virgules"),
+    since: Optional[datetime] = Query(None, description="Lignes modifiées depuis (updated_at, avec fuseau)"),
+):
+    try:
+        export = Export(table, format, compression, parse_ids(prop_ids), since)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    data = {"table": table, "format": format, "compression": compression, "prop_ids": export.prop_ids, "since": since.isoformat() if since else None}
+    api_log("export.start", level="WARNING", request=request, email=user.email, user_id=user.id, tags=["export"], correlation_id=request.headers.get("x-correlation-id"), data=data, audit=True) # type: ignore
+    return StreamingResponse(
+        _stream(export, user, request.headers.get("x-correlation-id"), data),
+        media_type=export.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{export.filename}"'},
+    )
+
+
+# ---------- Ligne de commande ----------
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("table", choices=list(EXPORT_TABLES))
+    parser.add_argument("--format", default="csv", choices=list(FORMATS))
+    parser.add_argument("--compression", choices=list(COMPRESSIONS))
+    parser.add_argument("--prop-ids", help="dossiers: ids de propriétaires séparés par des virgules")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="lignes modifiées depuis (ISO 8601 avec fuseau)")
+    parser.add_argument("-o", "--output", help="fichier de sortie (défaut: <table>.<format>[.gz], - pour stdout)")
+    args = parser.parse_args()
+    try:
+        export = Export(args.table, args.format, args.compression, parse_ids(args.prop_ids), args.since)
+    except ValueError as e:
+        parser.error(str(e))
+    output = args.output or export.filename
+
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        if output == "-":
+            for chunk in export.chunks(db):
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+        else:
+            with open(output, "wb") as file:
+                for chunk in export.chunks(db):
+                    file.write(chunk)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - start
+    print(f"{export.rows} lignes, {export.bytes} octets -> {output} en {elapsed:.1f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Type
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+from typing_extensions import TypedDict
+
+# Chemin de réponse rapide pour les listes de lignes issues de la base (données de confiance).
+# Le chemin standard valide chaque objet ORM avec from_attributes=True puis repasse par
+# jsonable_encoder: c'est l'essentiel du coût CPU des routes de liste. Ici on sélectionne
+# uniquement les colonnes du schéma et on sérialise les dicts directement en JSON (pydantic-core),
+# sans validation. Le JSON produit est identique à celui du response_model.
+
+
+class RowSerializer:
+    """Sérialiseur précompilé d'un schéma Pydantic pour des lignes d'un modèle SQLAlchemy.
+
+    Usage dans un routeur (le response_model reste déclaré pour la documentation OpenAPI):
+
+        fnpc_rows = RowSerializer(fnpcPublic, models.fnpc)
+
+        @router.get("/read/", response_model=List[fnpcPublic])
+        async def read_all(db: db_dependency):
+            return fnpc_rows.list_response(db)
+    """
+
+    def __init__(self, schema: Type[BaseModel], model: Any) -> None:
+        self.schema = schema
+        self.model = model
+        self.fields: Sequence[str] = tuple(schema.model_fields)
+        self.columns = [getattr(model, name) for name in self.fields]
+        row_type = TypedDict(f"{schema.__name__}Row", {name: field.annotation for name, field in schema.model_fields.items()})  # type: ignore[misc]
+        self.row_type = row_type
+        self._one = TypeAdapter(row_type)
+        self._many = TypeAdapter(List[row_type])  # type: ignore[valid-type]
+
+    def select(self):
+        """SELECT des seules colonnes exposées par le schéma (à compléter avec .where / .order_by)."""
+        return select(*self.columns)
+
+    def rows(self, db: Session, statement=None) -> List[Dict[str, Any]]:
+        result = db.execute(statement if statement is not None else self.select())
+        fields = self.fields
+        return [dict(zip(fields, row)) for row in result]
+
+    def rows_by_key(self, db: Session, column: Any, keys: Iterable[Any]) -> Dict[Any, Dict[str, Any]]:
+        """Lignes dont column vaut l'une des clés, en une requête (column = ANY(:keys)), indexées par clé.
+
+        Pour une clé non unique, la ligne de plus petit id.
+        """
+        statement = (
+            select(*self.columns, column.label("row_key"))
+            .where(column == any_(bindparam("row_keys", list(set(keys)), type_=ARRAY(column.type))))
+            .order_by(self.model.id)
+        )
+        by_key: Dict[Any, Dict[str, Any]] = {}
+        for row in db.execute(statement):
+            record = dict(zip(self.fields, row))
+            by_key.setdefault(row.row_key, record)
+        return by_key
+
+    def dump_one(self, row: Mapping[str, Any]) -> bytes:
+        return self._one.dump_json(row)  # type: ignore[arg-type]
+
+    def dump_many(self, rows: Iterable[Mapping[str, Any]]) -> bytes:
+        return self._many.dump_json(rows)  # type: ignore[arg-type]
+
+    def dump_rows(self, db: Session, statement=None) -> bytes:
+        return self.dump_many(self.rows(db, statement))
+
+    def list_response(self, db: Session, statement=None) -> Response:
+        return Response(content=self.dump_rows(db, statement), media_type="application/json")
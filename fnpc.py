@@ -1,5 +1,5 @@
 from datetime import date
-from database import SessionLocal
+from database import get_db
 from fastapi import FastAPI, Depends, HTTPException, APIRouter, status, Body, Request
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, ConfigDict
@@ -8,6 +8,8 @@ from models import Proprietaires  # Add this import for the Users model
 import models
 from auth import get_current_user
 from log import api_log
+from fast_response import RowSerializer
+from snapshots import CollectionSnapshot
 
 def connection_required(current_user: Annotated[models.Users, Depends(get_current_user)]):
     can_use = ["admin", "owner"]
@@ -171,28 +173,24 @@ class fnpcUpdate(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 db_dependency = Annotated[Session, Depends(get_db)]
 user_dependency = Annotated[models.Users, Depends(get_current_user)]
 
+fnpc_rows = RowSerializer(fnpcPublic, models.fnpc)
+fnpc_list = CollectionSnapshot(fnpc_rows)
+
 @router.get("/read/", response_model=List[fnpcPublic])
 async def read_all_fnpcs(db: db_dependency, user: user_dependency, request: Request):
-    fnpcs = db.query(models.fnpc).all()
-    api_log("fnpc.read_all", level="INFO", request=request,email=user.email, user_id=user.id, tags=["fnpc", "list"], correlation_id=request.headers.get("x-correlation-id")) # type: ignore
-    return fnpcs
+    response = await fnpc_list.response(request, db, user)
+    api_log("fnpc.read_all", level="INFO", request=request,email=user.email, user_id=user.id, tags=["fnpc", "list"], correlation_id=request.headers.get("x-correlation-id"), audit=True) # type: ignore
+    return response
 
 @router.get("/read/{fnpc_id}/", response_model=fnpcPublic)
 async def read_fnpc(fnpc_id: int, db: db_dependency, user: user_dependency, request: Request):
     fnpc = db.query(models.fnpc).filter(models.fnpc.id == fnpc_id).first()
     if not fnpc:
         raise HTTPException(status_code=404, detail="fnpc not found")
-    api_log("fnpc.read", level="INFO", request=request,email=user.email, user_id=user.id, tags=["fnpc", "read"], correlation_id=request.headers.get("x-correlation-id")) # type: ignore
+    api_log("fnpc.read", level="INFO", request=request,email=user.email, user_id=user.id, tags=["fnpc", "read"], correlation_id=request.headers.get("x-correlation-id"), data={"record_id": fnpc_id}, audit=True) # type: ignore
     return fnpc
 
 @router.post("/create/", response_model=fnpcPublic)
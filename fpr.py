@@ -1,5 +1,5 @@
 from datetime import date
-from database import SessionLocal
+from database import get_db
 from fastapi import FastAPI, Depends, HTTPException, APIRouter, status, Body, Request
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, ConfigDict
@@ -83,20 +83,13 @@ class fprUpdate(BaseModel):
     neph: int | None = None  # BIGINT côté DB
     num_fijait: int | None = None  # BIGINT côté DB
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 db_dependency = Annotated[Session, Depends(get_db)]
 user_dependency = Annotated[models.Users, Depends(get_current_user)]
 
 @router.get("/read/", response_model=List[fprPublic])
 async def read_all_fpr(db: db_dependency, user: user_dependency, request: Request):
     fpr_records = db.query(fpr).all()
-    api_log("fpr.read_all", level="INFO", request=request,email=user.email, user_id=user.id, tags=["fpr", "list"], correlation_id=request.headers.get("x-correlation-id")) # type: ignore
+    api_log("fpr.read_all", level="INFO", request=request,email=user.email, user_id=user.id, tags=["fpr", "list"], correlation_id=request.headers.get("x-correlation-id"), audit=True) # type: ignore
     return fpr_records
 
 @router.get("/read/{fpr_id}/", response_model=fprPublic)
@@ -104,7 +97,7 @@ async def read_fpr(fpr_id: int, db: db_dependency, user: user_dependency, reques
     fpr_record = db.query(fpr).filter(fpr.id == fpr_id).first()
     if not fpr_record:
         raise HTTPException(status_code=404, detail="FPR not found")
-    api_log("fpr.read_one", level="INFO", request=request,email=user.email, user_id=user.id, tags=["fpr", "detail"], correlation_id=request.headers.get("x-correlation-id")) # type: ignore
+    api_log("fpr.read_one", level="INFO", request=request,email=user.email, user_id=user.id, tags=["fpr", "detail"], correlation_id=request.headers.get("x-correlation-id"), data={"record_id": fpr_id}, audit=True) # type: ignore
     return fpr_record
 
 @router.post("/create/", response_model=fprPublic)
@@ -1,5 +1,5 @@
 from datetime import date
-from database import SessionLocal
+from database import get_db
 from fastapi import FastAPI, Depends, HTTPException, APIRouter, status, Body, Request
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, ConfigDict
@@ -59,13 +59,6 @@ class infractionUpdate(BaseModel):
     neph: int | None = None
     model_config = ConfigDict(from_attributes=True)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 db_dependency = Annotated[Session, Depends(get_db)]
 user_dependency = Annotated[models.Users, Depends(get_current_user)]
 
@@ -102,16 +95,14 @@ async def create_infraction(infraction: infractionCreate, db: db_dependency, use
         statut=infraction.statut,
         neph=infraction.neph
     )
-    try:
-        db.query(models.fnpc).filter(models.fnpc.neph == infraction.neph).one()
-    except Exception:
+    matchFnpc = db.query(models.fnpc).filter(models.fnpc.neph == infraction.neph).first()
+    if matchFnpc is None:
         raise HTTPException(status_code=404, detail="NEPH not matched with any FNPC")
-    
-    matchFnpc = db.query(models.fnpc).filter(models.fnpc.neph == infraction.neph).one()
+
+    # Retrait des points et création de l'infraction dans une seule transaction
     matchFnpc.points -= infraction.points #type: ignore
     if matchFnpc.points < 0: #type: ignore
         matchFnpc.points = 0 #type: ignore
-    db.commit()
     db.add(db_infraction)
     db.commit()
     db.refresh(db_infraction)
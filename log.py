@@ -6,7 +6,7 @@ from logging.handlers import TimedRotatingFileHandler
 import os
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Any, Dict, Iterable, Mapping, Optional
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional
 from contextvars import ContextVar
 import traceback as _traceback
 
@@ -23,6 +23,63 @@ def get_correlation_id() -> Optional[str]:
     return _correlation_id_ctx.get()
 
 
+def _request_info(req: Any) -> Optional[Dict[str, Any]]:
+    """Extrait method/path/ip/user-agent d'un objet Request (duck-typed)."""
+    try:
+        path = getattr(getattr(req, "url", None), "path", None)
+        method = getattr(req, "method", None)
+
+        # Try headers first (X-Forwarded-For, X-Real-Ip) — useful behind proxies/load-balancers
+        headers = None
+        try:
+            headers = req.headers
+        except Exception:
+            headers = getattr(req, "headers", None)
+
+        client_ip: Optional[str] = None
+        if headers is not None:
+            # starlette Headers is Mapping-like, but be defensive
+            try:
+                xff = headers.get("x-forwarded-for") or headers.get("x-real-ip")
+            except Exception:
+                xff = headers.get("x-forwarded-for") if isinstance(headers, Mapping) else None
+            if xff:
+                # X-Forwarded-For may contain comma-separated list; take first
+                client_ip = xff.split(",")[0].strip()
+
+        # Fallback to request.client (Starlette Address) or scope
+        if not client_ip:
+            client = getattr(req, "client", None)
+            if client is not None:
+                # Address may be object with .host or a tuple
+                client_ip = getattr(client, "host", None) if hasattr(client, "host") else (client[0] if isinstance(client, (list, tuple)) and client else None)
+
+        if not client_ip:
+            try:
+                scope = getattr(req, "scope", None)
+                if scope and "client" in scope and scope["client"]:
+                    client_ip = scope["client"][0]
+            except Exception:
+                pass
+
+        user_agent = None
+        if headers is not None:
+            try:
+                user_agent = headers.get("user-agent")
+            except Exception:
+                user_agent = headers.get("user-agent") if isinstance(headers, Mapping) else None
+
+        return {
+            "method": method,
+            "path": path,
+            "client_ip": client_ip,
+            "user_agent": user_agent,
+        }
+    except Exception:
+        # never break logging on request extraction
+        return None
+
+
 class JSONFormatter(logging.Formatter):
     def __init__(self, *, indent: Optional[int] = None) -> None:
         super().__init__()
@@ -58,59 +115,9 @@ class JSONFormatter(logging.Formatter):
         # request info (duck-typed)
         req = getattr(record, "request", None)
         if req is not None:
-            try:
-                path = getattr(getattr(req, "url", None), "path", None)
-                method = getattr(req, "method", None)
-
-                # Try headers first (X-Forwarded-For, X-Real-Ip) — useful behind proxies/load-balancers
-                headers = None
-                try:
-                    headers = req.headers
-                except Exception:
-                    headers = getattr(req, "headers", None)
-
-                client_ip: Optional[str] = None
-                if headers is not None:
-                    # starlette Headers is Mapping-like, but be defensive
-                    try:
-                        xff = headers.get("x-forwarded-for") or headers.get("x-real-ip")
-                    except Exception:
-                        xff = headers.get("x-forwarded-for") if isinstance(headers, Mapping) else None
-                    if xff:
-                        # X-Forwarded-For may contain comma-separated list; take first
-                        client_ip = xff.split(",")[0].strip()
-
-                # Fallback to request.client (Starlette Address) or scope
-                if not client_ip:
-                    client = getattr(req, "client", None)
-                    if client is not None:
-                        # Address may be object with .host or a tuple
-                        client_ip = getattr(client, "host", None) if hasattr(client, "host") else (client[0] if isinstance(client, (list, tuple)) and client else None)
-
-                if not client_ip:
-                    try:
-                        scope = getattr(req, "scope", None)
-                        if scope and "client" in scope and scope["client"]:
-                            client_ip = scope["client"][0]
-                    except Exception:
-                        pass
-
-                user_agent = None
-                if headers is not None:
-                    try:
-                        user_agent = headers.get("user-agent")
-                    except Exception:
-                        user_agent = headers.get("user-agent") if isinstance(headers, Mapping) else None
-
-                payload["request"] = {
-                    "method": method,
-                    "path": path,
-                    "client_ip": client_ip,
-                    "user_agent": user_agent,
-                }
-            except Exception:
-                # never break logging on request extraction
-                pass
+            info = _request_info(req)
+            if info is not None:
+                payload["request"] = info
 
         # attach structured data if provided
         data = getattr(record, "data", None)
@@ -136,6 +143,15 @@ class JSONFormatter(logging.Formatter):
         return json.dumps(payload, ensure_ascii=False, indent=self._indent)
 
 
+def get_logs_dir() -> Path:
+    # Paths (configurable via env var for Docker volumes in prod)
+    base_dir = Path(__file__).resolve().parent
+    env_log_dir = os.getenv("APP_LOG_DIR")
+    logs_dir = Path(env_log_dir) if env_log_dir else (base_dir / "logs")
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    return logs_dir
+
+
 def _ensure_logger() -> logging.Logger:
     logger = logging.getLogger("api")
     if logger.handlers:
@@ -144,11 +160,7 @@ def _ensure_logger() -> logging.Logger:
     logger.setLevel(logging.INFO)
     logger.propagate = False
 
-    # Paths (configurable via env var for Docker volumes in prod)
-    base_dir = Path(__file__).resolve().parent
-    env_log_dir = os.getenv("APP_LOG_DIR")
-    logs_dir = Path(env_log_dir) if env_log_dir else (base_dir / "logs")
-    logs_dir.mkdir(parents=True, exist_ok=True)
+    logs_dir = get_logs_dir()
 
     # Console handler (human readable)
     ch = logging.StreamHandler()
@@ -205,6 +217,22 @@ def _redact(obj: Any, redact_keys: Iterable[str]) -> Any:
         return obj
 
 
+# Sinks appelés pour les évènements marqués audit=True (ex: audit.py -> table audit_events).
+# Ils doivent être non bloquants: un sink ne fait qu'empiler, l'écriture se fait ailleurs.
+AuditSink = Callable[[Dict[str, Any]], None]
+_audit_sinks: list[AuditSink] = []
+
+
+def add_audit_sink(sink: AuditSink) -> None:
+    if sink not in _audit_sinks:
+        _audit_sinks.append(sink)
+
+
+def remove_audit_sink(sink: AuditSink) -> None:
+    if sink in _audit_sinks:
+        _audit_sinks.remove(sink)
+
+
 def api_log(
     event: str,
     *,
@@ -217,6 +245,7 @@ def api_log(
     tags: list[str] | None = None,
     correlation_id: str | None = None,
     redact_keys: Iterable[str] | None = None,
+    audit: bool = False,
 ) -> None:
     """Log structurément un évènement API.
 
@@ -229,6 +258,7 @@ def api_log(
     - tags: liste de tags strings pour filtrage ultérieur
     - correlation_id: ID de corrélation (sinon pris depuis le contexte)
     - redact_keys: clés sensibles à masquer (par défaut: password/token/...)
+    - audit: transmet aussi l'évènement aux sinks d'audit (lectures sensibles FPR/FNPC/SIV)
     """
 
     logger = _ensure_logger()
@@ -264,9 +294,30 @@ def api_log(
 
     logger.log(lvl, console_message, extra=extra, exc_info=err is not None)
 
+    if audit and _audit_sinks:
+        audit_event: Dict[str, Any] = {
+            "event": event,
+            "ts": datetime.now(timezone.utc),
+            "user_id": user_id,
+            "email": email,
+            "data": data,
+            "tags": tags,
+            "correlation_id": extra["correlation_id"],
+            "request": _request_info(request) if request is not None else None,
+        }
+        for sink in list(_audit_sinks):
+            try:
+                sink(audit_event)
+            except Exception:
+                # un sink défaillant ne doit jamais casser la requête
+                pass
+
 
 __all__ = [
     "api_log",
+    "add_audit_sink",
+    "remove_audit_sink",
     "set_correlation_id",
     "get_correlation_id",
+    "get_logs_dir",
 ]
@@ -4,13 +4,15 @@ from pydantic import BaseModel, ConfigDict
 from typing import List, Annotated, Optional, cast
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from sqlalchemy.orm.exc import StaleDataError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from passlib.context import CryptContext
 import time
 import os
 from dotenv import load_dotenv
 # Local
-from database import engine, SessionLocal
+from database import engine, SessionLocal, get_db
 from models import Users
 import models
 import auth
@@ -23,6 +25,15 @@ import fpr
 import siv
 import notifications
 import notifications_public
+import audit
+import metrics
+import query_stats
+import slow_queries
+import profiling
+import compression
+import cache_backend
+import search_index
+import export
 
 import public
 from auth import get_current_user
@@ -33,6 +44,8 @@ load_dotenv()
 app = FastAPI(
     # Permet d’être servi derrière un préfixe (ex: /api) via le reverse proxy
     root_path=os.getenv("API_ROOT_PATH", "/api"),
+    # orjson pour toutes les routes: même JSON que JSONResponse (dates déjà converties par le response_model), encodage plus rapide
+    default_response_class=ORJSONResponse,
 )
 app.title = "Neogend API"
 app.version = str(os.getenv("APP_VERSION", "Unknown"))
@@ -46,12 +59,16 @@ app.include_router(infractions.router)
 app.include_router(fpr.router)
 app.include_router(siv.router)
 app.include_router(notifications.router)
+app.include_router(audit.router)
 
 # Routes publiques
 app.include_router(public.router)
 app.include_router(auth.router)
 app.include_router(connected.router)
 app.include_router(notifications_public.router)
+app.include_router(metrics.router)
+app.include_router(profiling.router)
+app.include_router(export.router)
 
 
 
@@ -75,17 +92,45 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Compression au plus près de l'application: les middlewares externes ne voient que les en-têtes
+app.add_middleware(compression.CompressionMiddleware)
+# Le profilage s'exécute à l'intérieur de QueryStatsMiddleware pour lire le temps DB de la requête
+app.add_middleware(profiling.ProfilingMiddleware)
+app.add_middleware(query_stats.QueryStatsMiddleware)
+# Ajouté en dernier = exécuté en premier: mesure aussi le coût des autres middlewares
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(engine)
+query_stats.instrument_engine(engine)
+slow_queries.instrument_engine(engine)
+# Invalide le cache (réponses /public, utilisateurs) à chaque commit qui touche une entrée en cache
+cache_backend.install(SessionLocal)
+# Tient à jour search_documents (omnibox /public/search/) dans la transaction de chaque écriture
+search_index.install(SessionLocal)
 
 @app.on_event("startup")
 async def _on_startup() -> None:
     # Force l'initialisation du logger et la création du répertoire logs
     api_log("app.startup", level="INFO", data={"version": app.version})
+    # Démarre l'écriture par lots du journal d'audit (lectures FPR/FNPC/SIV)
+    audit.start()
     # Créer un admin par défaut si la base est vide
     try:
         create_default_admin_user()
     except Exception as e:
         api_log("app.startup.default_admin.failed", level="ERROR", data={"error": str(e)})
 
+@app.on_event("shutdown")
+async def _on_shutdown() -> None:
+    # Écrit les derniers évènements d'audit encore en file
+    audit.stop()
+    metrics.mark_process_dead()
+
+# Colonne version (version_id_col): une mise à jour concurrente du même fichier est refusée plutôt qu'écrasée
+@app.exception_handler(StaleDataError)
+async def _stale_data_handler(request: Request, exc: StaleDataError):
+    api_log("db.stale_data", level="WARNING", request=request, err=exc, tags=["db"], correlation_id=request.headers.get("x-correlation-id"))
+    return ORJSONResponse(status_code=status.HTTP_409_CONFLICT, content={"detail": "Record was modified concurrently, reload it and retry"})
+
 # Exécuter create_all uniquement hors production, sauf si DB_BOOTSTRAP=true
 IS_PROD = os.getenv("APP_RELEASE_STATUS", "").lower() == "prod"
 DB_BOOTSTRAP = os.getenv("DB_BOOTSTRAP", "").lower() == "true"
@@ -143,13 +188,6 @@ class UserPublic(BaseModel):
     privileges: str | None = None
     model_config = ConfigDict(from_attributes=True)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 db_dependency = Annotated[Session, Depends(get_db)]
 user_dependency = Annotated[models.Users, Depends(get_current_user)]
 
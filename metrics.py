@@ -0,0 +1,155 @@
+import hmac
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Avec plusieurs workers uvicorn, PROMETHEUS_MULTIPROC_DIR doit pointer vers un répertoire
+# vidé au démarrage (cf. start.sh): chaque worker y écrit ses valeurs, /metrics les agrège.
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+# /metrics exige "Authorization: Bearer <METRICS_TOKEN>"; sans jeton configuré, la route répond 404
+# (l'API est privée: routes, répartition des statuts et état du pool ne sont pas publics)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "Requêtes HTTP traitées", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "Durée de traitement des requêtes HTTP", ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requêtes HTTP en cours", ["method"], multiprocess_mode="livesum"
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size", "Taille configurée du pool de connexions", multiprocess_mode="livesum"
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connexions du pool actuellement empruntées", multiprocess_mode="livesum"
+)
+BCRYPT_QUEUE_DEPTH = Gauge(
+    "bcrypt_queue_depth", "Opérations bcrypt soumises au threadpool et non terminées", ["op"], multiprocess_mode="livesum"
+)
+BCRYPT_DURATION = Histogram(
+    "bcrypt_duration_seconds", "Durée des opérations bcrypt (attente comprise)", ["op"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LOG_QUEUE_DEPTH = Gauge(
+    "log_queue_depth", "Évènements d'audit en attente d'écriture", multiprocess_mode="livesum"
+)
+LOG_QUEUE_DROPPED = Counter(
+    "log_queue_dropped_total", "Évènements d'audit perdus (file pleine)"
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total", "Consultations du cache", ["namespace", "result"]  # resp / user, hit / miss
+)
+COALESCE_REQUESTS = Counter(
+    "coalesce_requests_total", "GET identiques simultanés", ["route", "role"]  # leader (exécute) / follower (attend)
+)
+SNAPSHOT_REQUESTS = Counter(
+    "snapshot_requests_total", "Lectures des routes de liste en instantané", ["route", "result"]  # hit / rebuild
+)
+CACHE_BYTES = Gauge(
+    "cache_memory_bytes", "Taille des valeurs du cache en mémoire (backend memory)", multiprocess_mode="livesum"
+)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI (pas BaseHTTPMiddleware) pour garder un surcoût minimal par requête."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            # Le template de la route ("/fnpc/read/{fnpc_id}/") évite l'explosion de cardinalité
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_LATENCY.labels(method, route_path).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, route_path, str(status_code)).inc()
+
+
+@contextmanager
+def track_bcrypt(op: str) -> Iterator[None]:
+    depth = BCRYPT_QUEUE_DEPTH.labels(op)
+    depth.inc()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        depth.dec()
+        BCRYPT_DURATION.labels(op).observe(time.perf_counter() - start)
+
+
+def instrument_engine(engine: Engine) -> None:
+    pool = engine.pool
+    size = getattr(pool, "size", None)
+    if callable(size):
+        DB_POOL_SIZE.set(size())
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+        DB_POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record) -> None:
+        DB_POOL_CHECKED_OUT.dec()
+
+
+def mark_process_dead() -> None:
+    # Retire les gauges "live" du worker qui s'arrête
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def _registry() -> CollectorRegistry:
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", include_in_schema=False)
+async def read_metrics(request: Request):
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    authorization = request.headers.get("authorization", "")
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {METRICS_TOKEN}".encode()):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return Response(content=generate_latest(_registry()), media_type=CONTENT_TYPE_LATEST)
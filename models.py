@@ -1,5 +1,8 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, BigInteger, String, Date, DateTime, func
+from sqlalchemy import Boolean, Column, Computed, ForeignKey, Integer, BigInteger, String, Date, DateTime, Index, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import relationship
 from database import Base
+from text_search import sql_normalize
 
 class Users(Base):
     __tablename__ = "users"
@@ -52,6 +55,9 @@ class Notifications(Base):
         server_default=func.now(),
     )
 
+# Champs concaténés dans proprietaires.nom_recherche
+NOM_RECHERCHE_SOURCE = "coalesce(nom_famille, '') || ' ' || coalesce(nom_usage, '') || ' ' || coalesce(prenom, '') || ' ' || coalesce(second_prenom, '')"
+
 class Proprietaires(Base):
     __tablename__ = "proprietaires"
 
@@ -70,6 +76,33 @@ class Proprietaires(Base):
     adresse_code_postal = Column(String, index=True)
     adresse_commune = Column(String, index=True)
 
+    # Noms et prénoms normalisés (sans accents ni casse) pour la recherche approchée
+    # /public/proprietaires/search/, indexés en trigrammes (ix_proprietaires_nom_recherche_trgm)
+    nom_recherche = Column(String, Computed(sql_normalize(NOM_RECHERCHE_SOURCE), persisted=True))
+    # Clés phonétiques (text_search.phonetic_key), renseignées par les routes d'écriture de proprietaires.py:
+    # recherche /public/proprietaires/search/?mode=phonetique
+    nom_phonetique = Column(String)
+    nom_usage_phonetique = Column(String)
+    prenom_phonetique = Column(String)
+
+    # Relations en lecture seule (dossier d'une personne): à charger avec selectinload, jamais ligne par ligne
+    permis = relationship("fnpc", viewonly=True, order_by="fnpc.id")
+    fiches_fpr = relationship("fpr", viewonly=True, order_by="fpr.id")
+    vehicules = relationship("siv", viewonly=True, foreign_keys="siv.prop_id", order_by="siv.id")
+    vehicules_co_proprietaire = relationship("siv", viewonly=True, foreign_keys="siv.co_prop_id", order_by="siv.id")
+
+    # Version de la ligne, incrémentée par l'ORM à chaque UPDATE: sert d'ETag aux lectures unitaires
+    version = Column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
+    # Dernière écriture (trigger touch_updated_at, migration 6c1f3e8a9b52): flux /public/changes
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
+
+# Recherche par identité (nom + prénom sans casse + date de naissance): /public/proprietaires/read/by_identity/
+Index("ix_proprietaires_identite", func.lower(Proprietaires.nom_famille), func.lower(Proprietaires.prenom), Proprietaires.date_naissance)
+Index("ix_proprietaires_nom_phonetique", Proprietaires.nom_phonetique, Proprietaires.prenom_phonetique)
+Index("ix_proprietaires_nom_usage_phonetique", Proprietaires.nom_usage_phonetique, Proprietaires.prenom_phonetique)
+Index("ix_proprietaires_nom_recherche_trgm", Proprietaires.nom_recherche, postgresql_using="gin", postgresql_ops={"nom_recherche": "gin_trgm_ops"})
+
 class fnpc(Base):
     __tablename__ = "fnpc"
 
@@ -118,7 +151,14 @@ class fnpc(Base):
     points = Column(Integer, index=True)
 
     # Collones Etrangères
-    prop_id = Column(Integer, ForeignKey("proprietaires.id"))
+    prop_id = Column(Integer, ForeignKey("proprietaires.id"), index=True)
+
+    infractions = relationship("infractions_routieres", viewonly=True, order_by="infractions_routieres.id")
+
+    version = Column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
+    # Dernière écriture (trigger touch_updated_at, migration 6c1f3e8a9b52): flux /public/changes
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
 
 class infractions_routieres(Base):
     __tablename__ = "infractions_routieres"
@@ -135,10 +175,20 @@ class infractions_routieres(Base):
 
 
     # Collones Etrangères
-    neph = Column(BigInteger, ForeignKey("fnpc.neph"))
+    neph = Column(BigInteger, ForeignKey("fnpc.neph"), index=True)
+
+    version = Column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
+    # Dernière écriture (trigger touch_updated_at, migration 6c1f3e8a9b52): flux /public/changes
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
 
 class fpr(Base):
     __tablename__ = "fpr"
+    __table_args__ = (
+        # Fiches d'une personne / d'un permis, les plus récentes d'abord (by_prop, by_neph)
+        Index("ix_fpr_prop_id_date_enregistrement", "prop_id", "date_enregistrement"),
+        Index("ix_fpr_neph_date_enregistrement", "neph", "date_enregistrement"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     exactitude = Column(String, index=True, nullable=True) #? Identité confirmé, non confirmé, usurpée
@@ -160,18 +210,28 @@ class fpr(Base):
     neph = Column(BigInteger, ForeignKey("fnpc.neph"), nullable=True) #? nullable : une FPR peut être créée sans FNPC (ex: si la personne n'a pas le permis)
     num_fijait = Column(BigInteger, nullable=True) #TODO: Faire une relation avec le FIJAIT quand créer
 
+    version = Column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
+    # Dernière écriture (trigger touch_updated_at, migration 6c1f3e8a9b52): flux /public/changes
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
+
 class siv(Base):
     __tablename__ = "siv"
 
     id = Column(Integer, primary_key=True, index=True)
 
     # Propriétaire
-    prop_id = Column(Integer, ForeignKey("proprietaires.id"))
-    co_prop_id = Column(Integer, ForeignKey("proprietaires.id"), nullable=True) #? Co-propriétaire, nullable si pas de co-propriétaire
+    prop_id = Column(Integer, ForeignKey("proprietaires.id"), index=True)
+    co_prop_id = Column(Integer, ForeignKey("proprietaires.id"), index=True, nullable=True) #? Co-propriétaire, nullable si pas de co-propriétaire
+
+    proprietaire = relationship("Proprietaires", viewonly=True, foreign_keys=[prop_id])
+    co_proprietaire = relationship("Proprietaires", viewonly=True, foreign_keys=[co_prop_id])
     
     # Certificat d'immatriculation
     ci_etat_administratif = Column(String, index=True, nullable=True) #? (Valide, Volé, Perdu, Détruit, Annulé)
     ci_numero_immatriculation = Column(String, index=True, nullable=True)
+    # Plaque sans séparateurs ni casse ("ab-123 cd" -> "AB123CD"), calculée par PostgreSQL: voir normalize_plate (public.py)
+    ci_plaque_normalisee = Column(String, Computed("upper(regexp_replace(ci_numero_immatriculation, '[^A-Za-z0-9]', '', 'g'))", persisted=True), index=True)
     ci_date_premiere_circulation = Column(Date, index=True, nullable=True) #? Date de la première immatriculation du véhicule
     ci_date_certificat = Column(Date, index=True, nullable=True) #? Date de délivrance du certificat actuel
 
@@ -201,4 +261,70 @@ class siv(Base):
 
     # Assurance
     as_assureur = Column(String, index=True, nullable=True)
-    as_date_contrat = Column(Date, index=True, nullable=True)
\ No newline at end of file
+    as_date_contrat = Column(Date, index=True, nullable=True)
+
+    version = Column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
+    # Dernière écriture (trigger touch_updated_at, migration 6c1f3e8a9b52): flux /public/changes
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
+
+class AuditEvents(Base):
+    __tablename__ = "audit_events"
+    __table_args__ = (
+        # Requêtes d'audit: "qui a consulté quoi" (par utilisateur) et "qui a consulté ce dossier" (par enregistrement)
+        Index("ix_audit_events_user_created_at", "user_id", "created_at"),
+        Index("ix_audit_events_record_created_at", "record_type", "record_id", "created_at"),
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    created_at = Column(DateTime(timezone=True), index=True, nullable=False, server_default=func.now())
+    event = Column(String, nullable=False) #? Ex: fpr.read_one, fnpc.read_all
+    # Pas de clé étrangère: la trace doit survivre à la suppression du compte
+    user_id = Column(Integer, nullable=True)
+    email = Column(String, nullable=True)
+    record_type = Column(String, nullable=True) #? fpr / fnpc / siv
+    record_id = Column(BigInteger, nullable=True) #? NULL pour les lectures de liste
+    method = Column(String, nullable=True)
+    path = Column(String, nullable=True)
+    client_ip = Column(String, nullable=True)
+    correlation_id = Column(String, nullable=True)
+    data = Column(JSONB(none_as_null=True), nullable=True)
+class TableRevisions(Base):
+    # Compteur de révision par table, incrémenté par un trigger par instruction (migration 7d3a9c4e1f20)
+    # à chaque INSERT/UPDATE/DELETE/TRUNCATE, quelle que soit l'origine de l'écriture
+    __tablename__ = "table_revisions"
+
+    table_name = Column(String, primary_key=True)
+    revision = Column(BigInteger, nullable=False, server_default="0")
+
+class SearchDocuments(Base):
+    # Index dénormalisé de l'omnibox /public/search/: une ligne par clé cherchable (plaque, NEPH, numéro
+    # de titre, nom + prénom, NIPOL) de proprietaires, siv, fnpc et users, tenu à jour par search_index.py
+    __tablename__ = "search_documents"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    record_id = Column(Integer, nullable=False)
+    # Clé compacte (text_search.compact). Index text_pattern_ops: préfixes (LIKE 'abc%') et tri
+    # (ORDER BY cle USING ~<~) lus dans l'ordre de l'index, arrêt dès la limite atteinte
+    cle = Column(String, nullable=False)
+    libelle = Column(String, nullable=False)
+
+    __table_args__ = (
+        Index("ix_search_documents_cle", "cle", postgresql_ops={"cle": "text_pattern_ops"}),
+        Index("ix_search_documents_kind_record_id", "kind", "record_id"),
+    )
+
+class DeletedRecords(Base):
+    # Pierres tombales des suppressions (trigger record_deletion, migration 6c1f3e8a9b52) de proprietaires,
+    # fnpc, siv, fpr et infractions_routieres: le flux /public/changes y lit les ids supprimés
+    __tablename__ = "deleted_records"
+
+    id = Column(BigInteger, primary_key=True)
+    table_name = Column(String, nullable=False)
+    record_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_deleted_records_table_name_deleted_at", "table_name", "deleted_at"),
+    )
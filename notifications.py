@@ -1,5 +1,5 @@
 from datetime import date, datetime
-from database import SessionLocal
+from database import get_db
 from fastapi import FastAPI, Depends, HTTPException, APIRouter, status, Body, Request
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, ConfigDict
@@ -45,13 +45,6 @@ class NotificationCreateAll(BaseModel):
     message: str
     redirect_to: str | None = None  # URL to redirect when clicking on the notification
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 db_dependency = Annotated[Session, Depends(get_db)]
 user_dependency = Annotated[models.Users, Depends(get_current_user)]
 
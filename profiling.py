@@ -0,0 +1,259 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Annotated, Any, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse
+from jose import JWTError, jwt
+from pydantic import BaseModel, Field
+
+import models
+from auth import ALGORITHM, SECRET_KEY, _create_token, get_current_user
+from log import api_log, get_logs_dir
+from query_stats import current_stats
+
+# Profilage à la demande, réservé aux owners. Deux déclencheurs:
+#  - en-tête X-Profile-Token (jeton signé obtenu via POST /profiling/token), pour une requête précise;
+#  - échantillonnage (PUT /profiling/config), pour attraper une route lente en production.
+# La configuration est propre à chaque worker.
+PROFILE_TOKEN_HEADER = "x-profile-token"
+PROFILE_TOKEN_EXPIRE_MINUTES = 10
+PROFILE_MAX_REPORTS = int(os.getenv("PROFILE_MAX_REPORTS", "200"))
+_REPORT_ID_RE = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+
+# (fichier se terminant par, fonction) -> catégorie de la ventilation du temps
+_BREAKDOWN_FUNCTIONS = {
+    "jwt_decode": [("jose/jwt.py", "decode")],
+    "serialization": [("fastapi/routing.py", "serialize_response")],
+    "logging": [("log.py", "api_log")],
+}
+
+
+class ProfilingConfig(BaseModel):
+    enabled: bool = False
+    sample_rate: float = Field(0.0, ge=0.0, le=1.0)
+    route_prefix: str | None = None  # ex: "/public/fnpc" pour ne profiler que ces routes
+
+
+_config = ProfilingConfig()
+# Profil en cours dans ce worker. Un seul à la fois: sys.setprofile est propre au thread de la boucle,
+# un second cProfile.enable() prendrait le crochet du premier et son disable() le retirerait aux deux.
+# overlapping: requêtes entrées pendant la mesure (présentes dans le rapport);
+# skipped: celles qui devaient être profilées et ne l'ont pas été (X-Profile-Skipped: busy)
+_active: Dict[str, int] | None = None
+
+
+def _profiles_dir():
+    path = get_logs_dir() / "profiles"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def create_profile_token(user_id: int) -> str:
+    return _create_token({"scope": "profile", "id": user_id}, timedelta(minutes=PROFILE_TOKEN_EXPIRE_MINUTES))
+
+
+def _valid_profile_token(token: str) -> bool:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return False
+    return payload.get("scope") == "profile"
+
+
+def _should_profile(scope) -> bool:
+    for name, value in scope.get("headers", []):
+        if name == PROFILE_TOKEN_HEADER.encode():
+            return _valid_profile_token(value.decode("latin-1"))
+    if not _config.enabled or _config.sample_rate <= 0:
+        return False
+    if _config.route_prefix and not scope.get("path", "").startswith(_config.route_prefix):
+        return False
+    return random.random() < _config.sample_rate
+
+
+def _cumulative_time(stats: pstats.Stats, targets) -> float:
+    total = 0.0
+    for (filename, _line, funcname), (_cc, _nc, _tt, ct, _callers) in stats.stats.items():  # type: ignore[attr-defined]
+        normalized = filename.replace("\\", "/")
+        for suffix, target in targets:
+            if funcname == target and normalized.endswith(suffix):
+                total += ct
+    return total
+
+
+def _build_report(report_id: str, scope, status_code: int, wall: float, profiler: cProfile.Profile, active: Dict[str, int]) -> Dict[str, Any]:
+    stats = pstats.Stats(profiler)
+    breakdown = {name: round(_cumulative_time(stats, targets) * 1000, 3) for name, targets in _BREAKDOWN_FUNCTIONS.items()}
+    query_stats = current_stats()
+    breakdown["db"] = round(query_stats.db_time * 1000, 3) if query_stats is not None else None
+    wall_ms = wall * 1000
+    breakdown["other"] = round(max(0.0, wall_ms - sum(v for v in breakdown.values() if v)), 3)
+
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(40)
+    return {
+        "id": report_id,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "method": scope.get("method"),
+        "path": scope.get("path"),
+        "route": getattr(scope.get("route"), "path", None),
+        "status": status_code,
+        "wall_ms": round(wall_ms, 3),
+        "db_statements": query_stats.statements if query_stats is not None else None,
+        "breakdown_ms": breakdown,
+        "overlapping_requests": active["overlapping"],
+        "skipped_profiles": active["skipped"],
+        "top_functions": out.getvalue(),
+    }
+
+
+def _store_report(report: Dict[str, Any], profiler: cProfile.Profile) -> None:
+    directory = _profiles_dir()
+    profiler.dump_stats(str(directory / f"{report['id']}.prof"))
+    (directory / f"{report['id']}.json").write_text(json.dumps(report, ensure_ascii=False), encoding="utf-8")
+    # Rotation simple: on garde les PROFILE_MAX_REPORTS derniers rapports
+    reports = sorted(directory.glob("*.json"))
+    for old in reports[:-PROFILE_MAX_REPORTS]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".prof").unlink(missing_ok=True)
+
+
+def _skipped_send(send):
+    async def send_wrapper(message) -> None:
+        if message["type"] == "http.response.start":
+            message["headers"] = list(message.get("headers", [])) + [(b"x-profile-skipped", b"busy")]
+        await send(message)
+    return send_wrapper
+
+
+class ProfilingMiddleware:
+    """Exécute cProfile autour d'une requête ciblée.
+
+    cProfile observe le thread de la boucle d'évènements: les coroutines d'autres requêtes
+    entrelacées pendant la mesure apparaissent aussi dans le rapport.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        global _active
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if _active is not None:
+            _active["overlapping"] += 1
+            if _should_profile(scope):
+                _active["skipped"] += 1
+                await self.app(scope, receive, _skipped_send(send))
+                return
+        if not _should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        report_id = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        status_code = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", report_id.encode())]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        active = _active = {"overlapping": 0, "skipped": 0}
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            _active = None
+            wall = time.perf_counter() - start
+            try:
+                report = _build_report(report_id, scope, status_code, wall, profiler, active)
+                _store_report(report, profiler)
+                api_log("profiling.report", level="INFO", data={"report_id": report_id, "path": scope.get("path"), "wall_ms": report["wall_ms"], "skipped_profiles": active["skipped"]}, tags=["profiling"])
+            except Exception as e:
+                api_log("profiling.report.failed", level="ERROR", data={"report_id": report_id}, err=e, tags=["profiling"])
+
+
+# ---------- Administration (owner uniquement) ----------
+def owner_required(current_user: Annotated[models.Users, Depends(get_current_user)]):
+    if not current_user or current_user.privileges != "owner": # type: ignore
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    return current_user
+
+router = APIRouter(
+    prefix="/profiling",
+    tags=["profiling"],
+    dependencies=[Depends(owner_required)]
+)
+
+user_dependency = Annotated[models.Users, Depends(get_current_user)]
+
+class ProfileToken(BaseModel):
+    profile_token: str
+    header: str
+    expires_in: int
+
+class ProfileReportSummary(BaseModel):
+    id: str
+    created_at: str
+    method: str | None = None
+    path: str | None = None
+    route: str | None = None
+    status: int
+    wall_ms: float
+    breakdown_ms: Dict[str, float | None]
+    overlapping_requests: int = 0
+    skipped_profiles: int = 0
+
+@router.post("/token", response_model=ProfileToken)
+async def create_token(user: user_dependency, request: Request):
+    api_log("profiling.token", level="INFO", request=request, email=user.email, user_id=user.id, tags=["profiling", "token"], correlation_id=request.headers.get("x-correlation-id")) # type: ignore
+    return {"profile_token": create_profile_token(user.id), "header": "X-Profile-Token", "expires_in": PROFILE_TOKEN_EXPIRE_MINUTES * 60} # type: ignore
+
+@router.get("/config", response_model=ProfilingConfig)
+async def read_config():
+    return _config
+
+@router.put("/config", response_model=ProfilingConfig)
+async def update_config(config: ProfilingConfig, user: user_dependency, request: Request):
+    global _config
+    _config = config
+    api_log("profiling.config", level="WARNING", request=request, email=user.email, user_id=user.id, data=config.model_dump(), tags=["profiling", "config"], correlation_id=request.headers.get("x-correlation-id")) # type: ignore
+    return _config
+
+@router.get("/reports/", response_model=List[ProfileReportSummary])
+async def read_reports(limit: int = Query(50, ge=1, le=500)):
+    reports = sorted(_profiles_dir().glob("*.json"), reverse=True)[:limit]
+    return [json.loads(path.read_text(encoding="utf-8")) for path in reports]
+
+@router.get("/reports/{report_id}")
+async def read_report(report_id: str):
+    if not _REPORT_ID_RE.match(report_id):
+        raise HTTPException(status_code=400, detail="Invalid report id")
+    path = _profiles_dir() / f"{report_id}.json"
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Report not found")
+    return json.loads(path.read_text(encoding="utf-8"))
+
+@router.get("/reports/{report_id}/pstats")
+async def download_report_pstats(report_id: str):
+    if not _REPORT_ID_RE.match(report_id):
+        raise HTTPException(status_code=400, detail="Invalid report id")
+    path = _profiles_dir() / f"{report_id}.prof"
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Report not found")
+    return FileResponse(str(path), media_type="application/octet-stream", filename=f"{report_id}.prof")
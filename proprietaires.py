@@ -1,5 +1,5 @@
 from datetime import date
-from database import SessionLocal
+from database import get_db
 from fastapi import FastAPI, Depends, HTTPException, APIRouter, status, Body, Request
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, ConfigDict
@@ -8,6 +8,7 @@ from models import Proprietaires  # Add this import for the Users model
 import models
 from auth import get_current_user
 from log import api_log
+from text_search import phonetic_key
 
 def connection_required(current_user: Annotated[models.Users, Depends(get_current_user)]):
     can_use = ["admin", "owner"]
@@ -53,16 +54,15 @@ class proprietaireCreate(BaseModel):
     adresse_code_postal: str
     adresse_commune: str
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 db_dependency = Annotated[Session, Depends(get_db)]
 user_dependency = Annotated[models.Users, Depends(get_current_user)]
 
+def set_phonetic_keys(proprietaire: Proprietaires):
+    # Clés de la recherche phonétique (/public/proprietaires/search/?mode=phonetique), à recalculer à chaque écriture des noms
+    proprietaire.nom_phonetique = phonetic_key(proprietaire.nom_famille) # type: ignore
+    proprietaire.nom_usage_phonetique = phonetic_key(proprietaire.nom_usage) # type: ignore
+    proprietaire.prenom_phonetique = phonetic_key(proprietaire.prenom) # type: ignore
+
 @router.get("/read/", response_model=List[proprietairePublic])
 async def read_all_proprietaires(db: db_dependency, user: user_dependency, request: Request):
     proprietaires = db.query(Proprietaires).all()
@@ -94,6 +94,7 @@ async def create_proprietaire(proprietaire: proprietaireCreate, db: db_dependenc
         adresse_code_postal=proprietaire.adresse_code_postal,
         adresse_commune=proprietaire.adresse_commune
     )
+    set_phonetic_keys(db_proprietaire)
     db.add(db_proprietaire)
     db.commit()
     db.refresh(db_proprietaire)
@@ -110,6 +111,7 @@ async def update_proprietaire(proprietaire_id: int, proprietaire_update: proprie
     update_data = proprietaire_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(proprietaire, field, value)
+    set_phonetic_keys(proprietaire)
     
     db.commit()
     db.refresh(proprietaire)
@@ -1,13 +1,22 @@
-from datetime import date
-from database import SessionLocal
-from fastapi import FastAPI, Depends, HTTPException, APIRouter, status, Body, Request
-from sqlalchemy.orm import Session
-from pydantic import BaseModel, ConfigDict
-from typing import Annotated, List
-from models import Proprietaires  # Add this import for the Users model
+import os
+import re
+from datetime import date, datetime, timedelta, timezone
+import orjson
+from database import get_db
+from fastapi import FastAPI, Depends, HTTPException, APIRouter, status, Body, Query, Request, Response
+from sqlalchemy import func, literal, or_, select, text
+from sqlalchemy.orm import Session, joinedload, selectinload
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+from typing import Annotated, Any, Callable, Dict, Generic, List, Literal, TypeVar
+from models import Proprietaires, SearchDocuments  # Add this import for the Users model
 import models
 from auth import get_current_user
 from log import api_log
+from fast_response import RowSerializer
+from snapshots import CollectionSnapshot
+from expand import Expander, Relation
+from response_cache import cached_json, cached_record, neph_tag
+from text_search import compact, edit_distance, normalize, phonetic_key
 
 def connection_required(current_user: Annotated[models.Users, Depends(get_current_user)]):
     can_see = ["opj", "apj", "apja"]
@@ -168,89 +177,544 @@ class sivPublic(BaseModel):
 
 	model_config = ConfigDict(from_attributes=True)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+class dossierPublic(BaseModel):
+    id: int
+    proprietaire: proprietairePublic
+    permis: List[fnpcPublic]
+    infractions: List[infractionPublic]  # infractions de tous les permis de la personne
+    fpr: List[fprPublic]
+    vehicules: List[sivPublic]
+    vehicules_co_proprietaire: List[sivPublic]
+
+# Contrôle routier: l'essentiel de la personne pour un agent sur le terrain
+class permisStatut(BaseModel):
+    neph: int
+    numero_titre: str
+    statut: str
+    validite: str
+    points: int
+    probatoire: bool
+    date_expiration: date
+    model_config = ConfigDict(from_attributes=True)
+
+class fprSignalement(BaseModel):
+    id: int
+    motif_enregistrement: str | None = None
+    exactitude: str | None = None
+    dangerosite: str | None = None
+    conduite: str | None = None
+    model_config = ConfigDict(from_attributes=True)
+
+class personneControle(BaseModel):
+    id: int
+    nom_famille: str
+    nom_usage: str
+    prenom: str
+    date_naissance: date
+    permis: List[permisStatut]
+    fiches_fpr: List[fprSignalement]
+    model_config = ConfigDict(from_attributes=True)
+
+class controlePlaque(BaseModel):
+    vehicule: sivPublic
+    proprietaire: personneControle | None = None
+    co_proprietaire: personneControle | None = None
 
 db_dependency = Annotated[Session, Depends(get_db)]
 user_dependency = Annotated[models.Users, Depends(get_current_user)]
 
+# Routes de liste: sérialisation directe des lignes (voir fast_response.py)
+infraction_rows = RowSerializer(infractionPublic, models.infractions_routieres)
+infraction_list = CollectionSnapshot(infraction_rows)
+proprietaire_rows = RowSerializer(proprietairePublic, Proprietaires)
+proprietaire_list = CollectionSnapshot(proprietaire_rows)
+fnpc_rows = RowSerializer(fnpcPublic, models.fnpc)
+fnpc_list = CollectionSnapshot(fnpc_rows)
+fpr_rows = RowSerializer(fprPublic, models.fpr)
+fpr_list = CollectionSnapshot(fpr_rows)
+siv_rows = RowSerializer(sivPublic, models.siv)
+siv_list = CollectionSnapshot(siv_rows)
+
+# Relations de ?expand=: une requête groupée par relation demandée, sur toute la réponse
+class agentPublic(BaseModel):
+    rp_nipol: str
+    rp_grade: str | None = None
+    rp_first_name: str | None = None
+    rp_last_name: str | None = None
+    rp_service: str | None = None
+    rp_affectation: str | None = None
+
+agent_rows = RowSerializer(agentPublic, models.Users)
+infraction_expander = Expander(infraction_rows, {
+    "permis": Relation("neph", fnpc_rows, models.fnpc.neph),
+    "agent": Relation("nipol", agent_rows, models.Users.rp_nipol),
+})
+fnpc_expander = Expander(fnpc_rows, {
+    "proprietaire": Relation("prop_id", proprietaire_rows, Proprietaires.id),
+})
+fpr_expander = Expander(fpr_rows, {
+    "proprietaire": Relation("prop_id", proprietaire_rows, Proprietaires.id),
+    "permis": Relation("neph", fnpc_rows, models.fnpc.neph),
+})
+siv_expander = Expander(siv_rows, {
+    "proprietaire": Relation("prop_id", proprietaire_rows, Proprietaires.id),
+    "co_proprietaire": Relation("co_prop_id", proprietaire_rows, Proprietaires.id),
+})
+expand_query = Query(None, description="Relations à embarquer, séparées par des virgules (ex. proprietaire,permis)")
+
 @router.get("/infractions/read/", response_model=List[infractionPublic])
-async def read_all_infractions(db: db_dependency, user: user_dependency, request: Request):
-    infractions = db.query(models.infractions_routieres).all()
-    api_log("infractions.read_all", level="INFO", request=request,email=user.email, user_id=user.id, tags=["infractions", "list"], correlation_id=request.headers.get("x-correlation-id")) # type: ignore
-    return infractions
+async def read_all_infractions(db: db_dependency, user: user_dependency, request: Request, expand: str | None = expand_query):
+    names = infraction_expander.parse(expand)
+    if names:
+        response = infraction_expander.list_response(db, names)
+    else:
+        response = await infraction_list.response(request, db, user)
+    api_log("infractions.read_all", level="INFO", request=request,email=user.email, user_id=user.id, tags=["infractions", "list"], correlation_id=request.headers.get("x-correlation-id"), data={"expand": names}) # type: ignore
+    return response
 
 @router.get("/infractions/read/{infraction_id}/", response_model=infractionPublic)
-async def read_infraction(infraction_id: int, db: db_dependency, user: user_dependency, request: Request):
-    infraction = db.query(models.infractions_routieres).filter(models.infractions_routieres.id == infraction_id).first()
-    if not infraction:
+async def read_infraction(infraction_id: int, db: db_dependency, user: user_dependency, request: Request, expand: str | None = expand_query):
+    names = infraction_expander.parse(expand)
+    if names:
+        response = infraction_expander.one_response(db, names, infraction_rows.select().where(models.infractions_routieres.id == infraction_id))
+    else:
+        response = await cached_record(request, db, models.infractions_routieres, infraction_id, infractionPublic)
+    if response is None:
         raise HTTPException(status_code=404, detail="Infraction not found")
-    api_log("infractions.read_one", level="INFO", request=request,email=user.email, user_id=user.id, tags=["infractions", "detail"], correlation_id=request.headers.get("x-correlation-id")) # type: ignore
-    return infraction
+    api_log("infractions.read_one", level="INFO", request=request,email=user.email, user_id=user.id, tags=["infractions", "detail"], data={"record_id": infraction_id, "not_modified": response.status_code == 304}, correlation_id=request.headers.get("x-correlation-id")) # type: ignore
+    return response
 
 @router.get("/infractions/read/by_neph/{neph}/", response_model=List[infractionPublic])
-async def read_infractions_by_neph(neph: int, db: db_dependency, user: user_dependency, request: Request):
-    infractions = db.query(models.infractions_routieres).filter(models.infractions_routieres.neph == neph).all()
+async def read_infractions_by_neph(neph: int, db: db_dependency, user: user_dependency, request: Request, expand: str | None = expand_query):
+    names = infraction_expander.parse(expand)
+    statement = infraction_rows.select().where(models.infractions_routieres.neph == neph)
+    if names:
+        response = infraction_expander.list_response(db, names, statement)
+    else:
+        response = await cached_json(request, [neph_tag(neph)], lambda: infraction_rows.dump_rows(db, statement))
     api_log("infractions.read_by_neph", level="INFO", request=request,email=user.email, user_id=user.id, tags=["infractions", "list"], correlation_id=request.headers.get("x-correlation-id")) # type: ignore
-    return infractions
+    return response
 
 @router.get("/proprietaires/read/", response_model=List[proprietairePublic])
 async def read_all_proprietaires(db: db_dependency, user: user_dependency, request: Request):
-    proprietaires = db.query(Proprietaires).all()
+    response = await proprietaire_list.response(request, db, user)
     api_log("proprietaires.read_all", level="INFO", request=request,email=user.email, user_id=user.id, tags=["proprietaires", "list"], correlation_id=request.headers.get("x-correlation-id")) # type: ignore
-    return proprietaires
+    return response
+
+# Déclarée avant /proprietaires/read/{proprietaire_id}/, qui capturerait "by_identity"
+@router.get("/proprietaires/read/by_identity/", response_model=List[proprietairePublic])
+async def read_proprietaires_by_identity(nom_famille: str, prenom: str, date_naissance: date, db: db_dependency, user: user_dependency, request: Request):
+    # Index ix_proprietaires_identite (lower(nom_famille), lower(prenom), date_naissance).
+    # lower() des deux côtés en SQL: même repli de casse que l'index, quelle que soit la locale
+    # (str.lower() de Python replie "É", le lower() PostgreSQL d'une base en locale C non)
+    statement = proprietaire_rows.select().where(
+        func.lower(Proprietaires.nom_famille) == func.lower(nom_famille),
+        func.lower(Proprietaires.prenom) == func.lower(prenom),
+        Proprietaires.date_naissance == date_naissance,
+    ).order_by(Proprietaires.id)
+    response = proprietaire_rows.list_response(db, statement)
+    api_log("proprietaires.read_by_identity", level="INFO", request=request,email=user.email, user_id=user.id, tags=["proprietaires", "list"], correlation_id=request.headers.get("x-correlation-id")) # type: ignore
+    return response
+
+# Recherche approchée: trigrammes sur nom_recherche (index GIN ix_proprietaires_nom_recherche_trgm),
+# insensible aux accents et à la casse ("Lefevre" trouve "Lefèvre"), tolérante aux fautes de frappe
+SEARCH_MIN_LENGTH = 3
+SEARCH_MAX_LIMIT = 100
+# Mode phonétique: candidats lus par les index de clés phonétiques, puis reclassés en Python
+PHONETIC_MAX_WORDS = 4
+PHONETIC_MAX_CANDIDATES = 1000
+
+class proprietaireRecherche(proprietairePublic):
+    score: float
+
+recherche_adapter = TypeAdapter(List[proprietaireRecherche])
+
+def search_trigram(db: Session, terme: str, limit: int, threshold: float) -> List[dict]:
+    # Seuil local à la transaction de la requête; l'opérateur <% l'applique via l'index
+    db.execute(select(func.set_config("pg_trgm.word_similarity_threshold", str(threshold), True)))
+    score = func.word_similarity(terme, Proprietaires.nom_recherche)
+    statement = (
+        select(*proprietaire_rows.columns, score.label("score"))
+        .where(literal(terme).op("<%")(Proprietaires.nom_recherche))
+        # À score égal, la ressemblance sur l'ensemble des noms départage (nom exact avant homonyme partiel)
+        .order_by(score.desc(), func.similarity(terme, Proprietaires.nom_recherche).desc(), Proprietaires.id)
+        .limit(limit)
+    )
+    return [dict(row._mapping) for row in db.execute(statement)]
+
+def search_phonetic(db: Session, terme: str, limit: int) -> List[dict]:
+    # Le nom peut tenir en plusieurs mots ("le roy"), et l'ordre nom / prénom est libre: on essaie la clé
+    # de chaque suite de mots consécutifs, comme nom puis (s'il y a plusieurs mots) comme prénom
+    words = terme.split()[:PHONETIC_MAX_WORDS]
+    keys = {phonetic_key(" ".join(words[i:j])) for i in range(len(words)) for j in range(i + 1, len(words) + 1)} - {None}
+    conditions = [or_(Proprietaires.nom_phonetique.in_(keys), Proprietaires.nom_usage_phonetique.in_(keys))]
+    if len(words) > 1:
+        conditions.append(Proprietaires.prenom_phonetique.in_(keys))
+    statement = (
+        select(*proprietaire_rows.columns, Proprietaires.nom_recherche)
+        .where(*conditions)
+        .order_by(Proprietaires.id)
+        .limit(PHONETIC_MAX_CANDIDATES)
+    )
+    # Reclassement par distance d'édition: chaque mot cherché contre le mot le plus proche des noms du candidat
+    letters = sum(len(word) for word in words)
+    resultats = []
+    for row in db.execute(statement):
+        resultat = dict(row._mapping)
+        noms = resultat.pop("nom_recherche").split()
+        distance = sum(min(edit_distance(word, nom) for nom in noms) for word in words)
+        resultat["score"] = max(0.0, 1 - distance / letters)
+        resultats.append(resultat)
+    resultats.sort(key=lambda resultat: (-resultat["score"], resultat["id"]))
+    return resultats[:limit]
+
+@router.get("/proprietaires/search/", response_model=List[proprietaireRecherche])
+async def search_proprietaires(q: str, db: db_dependency, user: user_dependency, request: Request, limit: int = Query(20, ge=1, le=SEARCH_MAX_LIMIT), threshold: float = Query(0.5, ge=0.1, le=1.0), mode: Literal["trigramme", "phonetique"] = "trigramme"):
+    terme = normalize(q)
+    if len(terme) < SEARCH_MIN_LENGTH:
+        raise HTTPException(status_code=422, detail=f"Recherche trop courte ({SEARCH_MIN_LENGTH} caractères minimum hors accents et ponctuation)")
+    if mode == "phonetique":
+        rows = search_phonetic(db, terme, limit)
+    else:
+        rows = search_trigram(db, terme, limit, threshold)
+    resultats = recherche_adapter.validate_python(rows)
+    api_log("proprietaires.search", level="INFO", request=request,email=user.email, user_id=user.id, tags=["proprietaires", "search"], correlation_id=request.headers.get("x-correlation-id"), data={"mode": mode, "results": len(resultats), "limit": limit, "threshold": threshold}, audit=True) # type: ignore
+    return Response(content=recherche_adapter.dump_json(resultats), media_type="application/json")
+
+# Omnibox (saisie au fil des touches): plaque, NEPH, numéro de titre, nom + prénom ou NIPOL, par préfixe
+# sur search_documents (tenue à jour par search_index.py). Lecture dans l'ordre de l'index text_pattern_ops,
+# arrêtée à la limite: coût constant quel que soit le nombre de clés qui commencent par le préfixe
+OMNIBOX_MIN_LENGTH = 2
+OMNIBOX_MAX_LIMIT = 20
+
+class resultatOmnibox(BaseModel):
+    kind: str
+    record_id: int
+    libelle: str
+
+omnibox_adapter = TypeAdapter(List[resultatOmnibox])
+
+@router.get("/search/", response_model=List[resultatOmnibox])
+async def omnibox(q: str, db: db_dependency, user: user_dependency, request: Request, limit: int = Query(10, ge=1, le=OMNIBOX_MAX_LIMIT)):
+    prefixe = compact(q)
+    if len(prefixe) < OMNIBOX_MIN_LENGTH:
+        return Response(content=b"[]", media_type="application/json")
+    # Jusqu'à 3 clés par enregistrement (nom + prénom dans les deux ordres, nom d'usage): on en lit assez
+    # pour garder limit enregistrements distincts
+    statement = (
+        select(SearchDocuments.kind, SearchDocuments.record_id, SearchDocuments.libelle)
+        .where(SearchDocuments.cle.like(f"{prefixe}%"))
+        .order_by(text("cle USING ~<~"))
+        .limit(limit * 3)
+    )
+    resultats: dict = {}
+    for row in db.execute(statement):
+        resultats.setdefault((row.kind, row.record_id), row._mapping)
+        if len(resultats) == limit:
+            break
+    body = omnibox_adapter.dump_json(omnibox_adapter.validate_python(list(resultats.values())))
+    api_log("search.omnibox", level="INFO", request=request,email=user.email, user_id=user.id, tags=["search", "list"], correlation_id=request.headers.get("x-correlation-id"), data={"results": len(resultats), "limit": limit}) # type: ignore
+    return Response(content=body, media_type="application/json")
 
 @router.get("/proprietaires/read/{proprietaire_id}/", response_model=proprietairePublic)
 async def read_proprietaire(proprietaire_id: int, db: db_dependency, user: user_dependency, request: Request):
-    proprietaire = db.query(Proprietaires).filter(Proprietaires.id == proprietaire_id).first()
+    response = await cached_record(request, db, Proprietaires, proprietaire_id, proprietairePublic)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Proprietaire not found")
+    api_log("proprietaires.read_one", level="INFO", request=request,email=user.email, user_id=user.id, tags=["proprietaires", "detail"], data={"record_id": proprietaire_id, "not_modified": response.status_code == 304}, correlation_id=request.headers.get("x-correlation-id")) # type: ignore
+    return response
+
+@router.get("/proprietaires/{proprietaire_id}/dossier", response_model=dossierPublic)
+async def read_dossier(proprietaire_id: int, db: db_dependency, user: user_dependency, request: Request):
+    # Nombre de requêtes fixe (une par relation, IN sur les clés) quel que soit le nombre de lignes
+    proprietaire = (
+        db.query(Proprietaires)
+        .options(
+            selectinload(Proprietaires.permis).selectinload(models.fnpc.infractions),
+            selectinload(Proprietaires.fiches_fpr),
+            selectinload(Proprietaires.vehicules),
+            selectinload(Proprietaires.vehicules_co_proprietaire),
+        )
+        .filter(Proprietaires.id == proprietaire_id)
+        .first()
+    )
     if not proprietaire:
         raise HTTPException(status_code=404, detail="Proprietaire not found")
-    api_log("proprietaires.read_one", level="INFO", request=request,email=user.email, user_id=user.id, tags=["proprietaires", "detail"], correlation_id=request.headers.get("x-correlation-id")) # type: ignore
-    return proprietaire
+    dossier = dossierPublic.model_validate({
+        "id": proprietaire.id,
+        "proprietaire": proprietaire,
+        "permis": proprietaire.permis,
+        "infractions": [infraction for permis in proprietaire.permis for infraction in permis.infractions],
+        "fpr": proprietaire.fiches_fpr,
+        "vehicules": proprietaire.vehicules,
+        "vehicules_co_proprietaire": proprietaire.vehicules_co_proprietaire,
+    }, from_attributes=True)
+    api_log("proprietaires.dossier", level="INFO", request=request,email=user.email, user_id=user.id, tags=["proprietaires", "dossier"], correlation_id=request.headers.get("x-correlation-id"), data={"record_id": proprietaire_id}, audit=True) # type: ignore
+    return Response(content=dossier.model_dump_json(), media_type="application/json")
 
 @router.get("/fnpc/read/", response_model=List[fnpcPublic])
-async def read_all_fnpcs(db: db_dependency, user: user_dependency, request: Request):
-    fnpcs = db.query(models.fnpc).all()
-    api_log("fnpc.read_all", level="INFO", request=request,email=user.email, user_id=user.id, tags=["fnpc", "list"], correlation_id=request.headers.get("x-correlation-id")) # type: ignore
-    return fnpcs
+async def read_all_fnpcs(db: db_dependency, user: user_dependency, request: Request, expand: str | None = expand_query):
+    names = fnpc_expander.parse(expand)
+    if names:
+        response = fnpc_expander.list_response(db, names)
+    else:
+        response = await fnpc_list.response(request, db, user)
+    api_log("fnpc.read_all", level="INFO", request=request,email=user.email, user_id=user.id, tags=["fnpc", "list"], correlation_id=request.headers.get("x-correlation-id"), data={"expand": names}, audit=True) # type: ignore
+    return response
 
 @router.get("/fnpc/read/{fnpc_id}/", response_model=fnpcPublic)
-async def read_fnpc(fnpc_id: int, db: db_dependency, user: user_dependency, request: Request):
-    fnpc = db.query(models.fnpc).filter(models.fnpc.id == fnpc_id).first()
-    if not fnpc:
+async def read_fnpc(fnpc_id: int, db: db_dependency, user: user_dependency, request: Request, expand: str | None = expand_query):
+    names = fnpc_expander.parse(expand)
+    if names:
+        response = fnpc_expander.one_response(db, names, fnpc_rows.select().where(models.fnpc.id == fnpc_id))
+    else:
+        response = await cached_record(request, db, models.fnpc, fnpc_id, fnpcPublic)
+    if response is None:
+        raise HTTPException(status_code=404, detail="fnpc not found")
+    api_log("fnpc.read", level="INFO", request=request,email=user.email, user_id=user.id, tags=["fnpc", "read"], correlation_id=request.headers.get("x-correlation-id"), data={"record_id": fnpc_id, "not_modified": response.status_code == 304}, audit=True) # type: ignore
+    return response
+
+@router.get("/fnpc/read/by_neph/{neph}/", response_model=fnpcPublic)
+async def read_fnpc_by_neph(neph: int, db: db_dependency, user: user_dependency, request: Request, expand: str | None = expand_query):
+    names = fnpc_expander.parse(expand)
+    # NEPH unique (ix_fnpc_neph)
+    rows = fnpc_expander.resolve(db, fnpc_rows.rows(db, fnpc_rows.select().where(models.fnpc.neph == neph)), names)
+    if not rows:
         raise HTTPException(status_code=404, detail="fnpc not found")
-    api_log("fnpc.read", level="INFO", request=request,email=user.email, user_id=user.id, tags=["fnpc", "read"], correlation_id=request.headers.get("x-correlation-id")) # type: ignore
-    return fnpc
+    api_log("fnpc.read_by_neph", level="INFO", request=request,email=user.email, user_id=user.id, tags=["fnpc", "read"], correlation_id=request.headers.get("x-correlation-id"), data={"record_id": rows[0]["id"], "expand": names}, audit=True) # type: ignore
+    return Response(content=fnpc_expander.dump_one(rows[0]), media_type="application/json")
+
+@router.get("/fnpc/read/by_numero_titre/{numero_titre}/", response_model=List[fnpcPublic])
+async def read_fnpc_by_numero_titre(numero_titre: str, db: db_dependency, user: user_dependency, request: Request, expand: str | None = expand_query):
+    names = fnpc_expander.parse(expand)
+    # Pas de contrainte d'unicité sur le numéro de titre: liste (ix_fnpc_numero_titre)
+    statement = fnpc_rows.select().where(models.fnpc.numero_titre == numero_titre).order_by(models.fnpc.id)
+    response = fnpc_expander.list_response(db, names, statement)
+    api_log("fnpc.read_by_numero_titre", level="INFO", request=request,email=user.email, user_id=user.id, tags=["fnpc", "list"], correlation_id=request.headers.get("x-correlation-id"), audit=True) # type: ignore
+    return response
 
 @router.get("/fpr/read/", response_model=List[fprPublic])
-async def read_all_fpr(db: db_dependency, user: user_dependency, request: Request):
-    fpr_records = db.query(models.fpr).all()
-    api_log("fpr.read_all", level="INFO", request=request,email=user.email, user_id=user.id, tags=["fpr", "list"], correlation_id=request.headers.get("x-correlation-id")) # type: ignore
-    return fpr_records
+async def read_all_fpr(db: db_dependency, user: user_dependency, request: Request, expand: str | None = expand_query):
+    names = fpr_expander.parse(expand)
+    if names:
+        response = fpr_expander.list_response(db, names)
+    else:
+        response = await fpr_list.response(request, db, user)
+    api_log("fpr.read_all", level="INFO", request=request,email=user.email, user_id=user.id, tags=["fpr", "list"], correlation_id=request.headers.get("x-correlation-id"), data={"expand": names}, audit=True) # type: ignore
+    return response
 
 @router.get("/fpr/read/{fpr_id}/", response_model=fprPublic)
-async def read_fpr(fpr_id: int, db: db_dependency, user: user_dependency, request: Request):
-    fpr_record = db.query(models.fpr).filter(models.fpr.id == fpr_id).first()
-    if not fpr_record:
+async def read_fpr(fpr_id: int, db: db_dependency, user: user_dependency, request: Request, expand: str | None = expand_query):
+    names = fpr_expander.parse(expand)
+    if names:
+        response = fpr_expander.one_response(db, names, fpr_rows.select().where(models.fpr.id == fpr_id))
+    else:
+        response = await cached_record(request, db, models.fpr, fpr_id, fprPublic)
+    if response is None:
         raise HTTPException(status_code=404, detail="FPR not found")
-    api_log("fpr.read_one", level="INFO", request=request,email=user.email, user_id=user.id, tags=["fpr", "detail"], correlation_id=request.headers.get("x-correlation-id")) # type: ignore
-    return fpr_record
+    api_log("fpr.read_one", level="INFO", request=request,email=user.email, user_id=user.id, tags=["fpr", "detail"], correlation_id=request.headers.get("x-correlation-id"), data={"record_id": fpr_id, "not_modified": response.status_code == 304}, audit=True) # type: ignore
+    return response
+
+@router.get("/fpr/read/by_prop/{prop_id}/", response_model=List[fprPublic])
+async def read_fpr_by_prop(prop_id: int, db: db_dependency, user: user_dependency, request: Request, expand: str | None = expand_query):
+    names = fpr_expander.parse(expand)
+    # Plus récentes d'abord: ix_fpr_prop_id_date_enregistrement
+    statement = fpr_rows.select().where(models.fpr.prop_id == prop_id).order_by(models.fpr.date_enregistrement.desc(), models.fpr.id.desc())
+    response = fpr_expander.list_response(db, names, statement)
+    api_log("fpr.read_by_prop", level="INFO", request=request,email=user.email, user_id=user.id, tags=["fpr", "list"], correlation_id=request.headers.get("x-correlation-id"), data={"prop_id": prop_id}, audit=True) # type: ignore
+    return response
+
+@router.get("/fpr/read/by_neph/{neph}/", response_model=List[fprPublic])
+async def read_fpr_by_neph(neph: int, db: db_dependency, user: user_dependency, request: Request, expand: str | None = expand_query):
+    names = fpr_expander.parse(expand)
+    # Plus récentes d'abord: ix_fpr_neph_date_enregistrement
+    statement = fpr_rows.select().where(models.fpr.neph == neph).order_by(models.fpr.date_enregistrement.desc(), models.fpr.id.desc())
+    response = fpr_expander.list_response(db, names, statement)
+    api_log("fpr.read_by_neph", level="INFO", request=request,email=user.email, user_id=user.id, tags=["fpr", "list"], correlation_id=request.headers.get("x-correlation-id"), data={"neph": neph}, audit=True) # type: ignore
+    return response
 
 @router.get("/siv/read/", response_model=List[sivPublic])
-async def read_all_siv(db: db_dependency, user: user_dependency, request: Request):
-	records = db.query(models.siv).all()
-	api_log("siv.read_all", level="INFO", request=request, email=user.email, user_id=user.id, tags=["siv", "list"], correlation_id=request.headers.get("x-correlation-id"))  # type: ignore
-	return records
+async def read_all_siv(db: db_dependency, user: user_dependency, request: Request, expand: str | None = expand_query):
+	names = siv_expander.parse(expand)
+	if names:
+		response = siv_expander.list_response(db, names)
+	else:
+		response = await siv_list.response(request, db, user)
+	api_log("siv.read_all", level="INFO", request=request, email=user.email, user_id=user.id, tags=["siv", "list"], correlation_id=request.headers.get("x-correlation-id"), data={"expand": names}, audit=True)  # type: ignore
+	return response
 
 
 @router.get("/siv/read/{siv_id}/", response_model=sivPublic)
-async def read_siv(siv_id: int, db: db_dependency, user: user_dependency, request: Request):
-	record = db.query(models.siv).filter(models.siv.id == siv_id).first()
-	if not record:
+async def read_siv(siv_id: int, db: db_dependency, user: user_dependency, request: Request, expand: str | None = expand_query):
+	names = siv_expander.parse(expand)
+	if names:
+		response = siv_expander.one_response(db, names, siv_rows.select().where(models.siv.id == siv_id))
+	else:
+		response = await cached_record(request, db, models.siv, siv_id, sivPublic)
+	if response is None:
 		raise HTTPException(status_code=404, detail="siv record not found")
-	api_log("siv.read_one", level="INFO", request=request, email=user.email, user_id=user.id, tags=["siv", "detail"], correlation_id=request.headers.get("x-correlation-id"))  # type: ignore
-	return record
\ No newline at end of file
+	api_log("siv.read_one", level="INFO", request=request, email=user.email, user_id=user.id, tags=["siv", "detail"], correlation_id=request.headers.get("x-correlation-id"), data={"record_id": siv_id, "not_modified": response.status_code == 304}, audit=True)  # type: ignore
+	return response
+
+
+@router.get("/siv/read/by_prop/{prop_id}/", response_model=List[sivPublic])
+async def read_siv_by_prop(prop_id: int, db: db_dependency, user: user_dependency, request: Request, expand: str | None = expand_query):
+	names = siv_expander.parse(expand)
+	# Titulaire ou co-titulaire: BitmapOr sur ix_siv_prop_id et ix_siv_co_prop_id
+	statement = siv_rows.select().where(or_(models.siv.prop_id == prop_id, models.siv.co_prop_id == prop_id)).order_by(models.siv.id)
+	response = siv_expander.list_response(db, names, statement)
+	api_log("siv.read_by_prop", level="INFO", request=request, email=user.email, user_id=user.id, tags=["siv", "list"], correlation_id=request.headers.get("x-correlation-id"), data={"prop_id": prop_id}, audit=True)  # type: ignore
+	return response
+
+
+controles_adapter = TypeAdapter(List[controlePlaque])
+
+def normalize_plate(plate: str) -> str:
+    """Même normalisation que la colonne générée siv.ci_plaque_normalisee."""
+    return re.sub(r"[^A-Z0-9]", "", plate.upper())
+
+@router.get("/control/plate/{plate}", response_model=List[controlePlaque])
+async def control_plate(plate: str, db: db_dependency, user: user_dependency, request: Request):
+    normalized = normalize_plate(plate)
+    if not normalized:
+        raise HTTPException(status_code=422, detail="Invalid plate")
+    # Une seule requête: véhicule, titulaires, permis et fiches FPR par jointures (index sur la plaque normalisée)
+    vehicules = (
+        db.query(models.siv)
+        .options(
+            joinedload(models.siv.proprietaire).joinedload(Proprietaires.permis),
+            joinedload(models.siv.proprietaire).joinedload(Proprietaires.fiches_fpr),
+            joinedload(models.siv.co_proprietaire).joinedload(Proprietaires.permis),
+            joinedload(models.siv.co_proprietaire).joinedload(Proprietaires.fiches_fpr),
+        )
+        .filter(models.siv.ci_plaque_normalisee == normalized)
+        .order_by(models.siv.id)
+        .all()
+    )
+    controles = [
+        controlePlaque.model_validate({"vehicule": vehicule, "proprietaire": vehicule.proprietaire, "co_proprietaire": vehicule.co_proprietaire}, from_attributes=True)
+        for vehicule in vehicules
+    ]
+    api_log("siv.control_plate", level="INFO", request=request, email=user.email, user_id=user.id, tags=["siv", "control"], correlation_id=request.headers.get("x-correlation-id"), data={"plate": normalized, "results": len(controles)}, audit=True)  # type: ignore
+    return Response(content=controles_adapter.dump_json(controles), media_type="application/json")
+
+# ---------- Lectures par lots ----------
+# Résolution de nombreuses clés (ids, NEPH, plaques) en une requête par table: WHERE cle = ANY(:cles),
+# un seul paramètre tableau quel que soit le nombre de clés. Réponse indexée par clé telle que saisie,
+# les clés sans résultat listées dans missing.
+BATCH_MAX_KEYS = 500
+
+class lotIds(BaseModel):
+    keys: List[int] = Field(min_length=1, max_length=BATCH_MAX_KEYS)
+
+class lotPlaques(BaseModel):
+    keys: List[str] = Field(min_length=1, max_length=BATCH_MAX_KEYS)
+
+T = TypeVar("T")
+
+class resultatLot(BaseModel, Generic[T]):
+    found: Dict[str, T]
+    missing: List[str]
+
+_batch_adapters: Dict[Any, TypeAdapter] = {}
+
+def _batch_adapter(schema: Any) -> TypeAdapter:
+    adapter = _batch_adapters.get(schema)
+    if adapter is None:
+        adapter = _batch_adapters[schema] = TypeAdapter(resultatLot[schema])
+    return adapter
+
+def batch_response(request: Request, db: Session, user: models.Users, event: str, rows: RowSerializer, column: Any, keys: List[Any], normalize_key: Callable[[Any], Any] | None = None) -> Response:
+    # Clés en double ignorées, ordre de saisie conservé
+    lookup = {key: normalize_key(key) if normalize_key else key for key in dict.fromkeys(keys)}
+    # Plusieurs lignes pour une même valeur (plaque en double): la plus ancienne
+    by_value = rows.rows_by_key(db, column, lookup.values())
+    found = {str(key): by_value[value] for key, value in lookup.items() if value in by_value}
+    missing = [str(key) for key, value in lookup.items() if value not in by_value]
+    # Une entrée d'audit par enregistrement consulté, comme les lectures unitaires
+    for record in found.values():
+        api_log(f"{event}.read_batch", level="INFO", request=request, email=user.email, user_id=user.id, tags=[event, "batch"], correlation_id=request.headers.get("x-correlation-id"), data={"record_id": record["id"]}, audit=True) # type: ignore
+    api_log(f"{event}.batch", level="INFO", request=request, email=user.email, user_id=user.id, tags=[event, "batch"], correlation_id=request.headers.get("x-correlation-id"), data={"keys": len(lookup), "found": len(found), "missing": len(missing)}) # type: ignore
+    adapter = _batch_adapter(rows.schema)
+    return Response(content=adapter.dump_json(adapter.validate_python({"found": found, "missing": missing})), media_type="application/json")
+
+@router.post("/proprietaires/batch/", response_model=resultatLot[proprietairePublic])
+async def batch_proprietaires(lot: lotIds, db: db_dependency, user: user_dependency, request: Request):
+    return batch_response(request, db, user, "proprietaires", proprietaire_rows, Proprietaires.id, lot.keys)
+
+@router.post("/fnpc/batch/", response_model=resultatLot[fnpcPublic])
+async def batch_fnpc(lot: lotIds, db: db_dependency, user: user_dependency, request: Request):
+    return batch_response(request, db, user, "fnpc", fnpc_rows, models.fnpc.id, lot.keys)
+
+@router.post("/fnpc/batch/by_neph/", response_model=resultatLot[fnpcPublic])
+async def batch_fnpc_by_neph(lot: lotIds, db: db_dependency, user: user_dependency, request: Request):
+    return batch_response(request, db, user, "fnpc", fnpc_rows, models.fnpc.neph, lot.keys)
+
+@router.post("/fpr/batch/", response_model=resultatLot[fprPublic])
+async def batch_fpr(lot: lotIds, db: db_dependency, user: user_dependency, request: Request):
+    return batch_response(request, db, user, "fpr", fpr_rows, models.fpr.id, lot.keys)
+
+@router.post("/siv/batch/", response_model=resultatLot[sivPublic])
+async def batch_siv(lot: lotIds, db: db_dependency, user: user_dependency, request: Request):
+    return batch_response(request, db, user, "siv", siv_rows, models.siv.id, lot.keys)
+
+@router.post("/siv/batch/by_plate/", response_model=resultatLot[sivPublic])
+async def batch_siv_by_plate(lot: lotPlaques, db: db_dependency, user: user_dependency, request: Request):
+    # Clés rendues telles que saisies ("ab-123-cd"), recherchées sous forme normalisée (ix_siv_ci_plaque_normalisee)
+    return batch_response(request, db, user, "siv", siv_rows, models.siv.ci_plaque_normalisee, lot.keys, normalize_plate)
+
+# ---------- Flux de modifications ----------
+# Synchronisation incrémentale côté client: lignes créées ou modifiées (updated_at, posé par trigger) et ids
+# supprimés (deleted_records) depuis le curseur. Le curseur est l'heure de début de la requête; la lecture
+# suivante repart CHANGES_OVERLAP_S plus tôt pour couvrir les transactions validées après coup (une ligne
+# peut donc revenir deux fois: le client applique upserted puis deleted, par id, de façon idempotente).
+# Premier appel sans since: renvoie seulement le curseur, à prendre AVANT de télécharger les listes complètes.
+CHANGES_OVERLAP_S = float(os.getenv("CHANGES_OVERLAP_S", "30"))
+CHANGES_MAX_ROWS = int(os.getenv("CHANGES_MAX_ROWS", "5000"))
+CHANGES_TABLES = {
+    "proprietaires": proprietaire_rows,
+    "fnpc": fnpc_rows,
+    "siv": siv_rows,
+    "fpr": fpr_rows,
+    "infractions_routieres": infraction_rows,
+}
+
+class changesTable(BaseModel):
+    upserted: List[Dict[str, Any]]
+    deleted: List[int]
+
+class changesPublic(BaseModel):
+    cursor: datetime
+    tables: Dict[str, changesTable]
+
+@router.get("/changes", response_model=changesPublic)
+async def read_changes(db: db_dependency, user: user_dependency, request: Request, since: datetime | None = None, tables: str | None = Query(None, description="Tables à suivre, séparées par des virgules (toutes par défaut)")):
+    selected = list(dict.fromkeys(name.strip() for name in tables.split(",") if name.strip())) if tables else list(CHANGES_TABLES)
+    unknown = [name for name in selected if name not in CHANGES_TABLES]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown tables: {', '.join(unknown)}")
+    if since is not None and since.tzinfo is None:
+        raise HTTPException(status_code=422, detail="since must include a timezone (use the cursor returned by the previous call)")
+    cursor = db.execute(select(func.now())).scalar_one().astimezone(timezone.utc)
+    parts = []
+    counts = {}
+    if since is not None:
+        start = since - timedelta(seconds=CHANGES_OVERLAP_S)
+        for name in selected:
+            rows = CHANGES_TABLES[name]
+            model = rows.model
+            # Index ix_<table>_updated_at et ix_deleted_records_table_name_deleted_at
+            upserted = rows.rows(db, rows.select().where(model.updated_at > start).order_by(model.updated_at, model.id).limit(CHANGES_MAX_ROWS + 1))
+            deleted = db.execute(
+                select(models.DeletedRecords.record_id)
+                .where(models.DeletedRecords.table_name == name, models.DeletedRecords.deleted_at > start)
+                .order_by(models.DeletedRecords.deleted_at)
+                .limit(CHANGES_MAX_ROWS + 1)
+            ).scalars().all()
+            if len(upserted) > CHANGES_MAX_ROWS or len(deleted) > CHANGES_MAX_ROWS:
+                raise HTTPException(status_code=409, detail=f"Too many changes in {name} since the cursor: reload the full list")
+            counts[name] = [len(upserted), len(deleted)]
+            parts.append(orjson.dumps(name) + b':{"upserted":' + rows.dump_many(upserted) + b',"deleted":' + orjson.dumps(list(deleted)) + b"}")
+    body = b'{"cursor":' + orjson.dumps(cursor) + b',"tables":{' + b",".join(parts) + b"}}"
+    api_log("changes.read", level="INFO", request=request,email=user.email, user_id=user.id, tags=["changes", "list"], correlation_id=request.headers.get("x-correlation-id"), data={"since": since.isoformat() if since else None, "counts": counts}, audit=True) # type: ignore
+    return Response(content=body, media_type="application/json")
@@ -0,0 +1,100 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.requests import Request
+
+from log import api_log
+
+# Budget de requêtes SQL par requête HTTP: au-delà, un warning "http.sql_budget_exceeded" est émis
+SQL_STATEMENT_BUDGET = int(os.getenv("SQL_STATEMENT_BUDGET", "15"))
+ACCESS_LOG = os.getenv("ACCESS_LOG", "true").lower() == "true"
+
+
+class RequestQueryStats:
+    __slots__ = ("statements", "db_time", "scope")
+
+    def __init__(self, scope=None) -> None:
+        self.statements = 0
+        self.db_time = 0.0
+        self.scope = scope
+
+    @property
+    def route(self) -> Optional[str]:
+        # Renseigné par le routeur FastAPI une fois la route résolue
+        if self.scope is None:
+            return None
+        return getattr(self.scope.get("route"), "path", None)
+
+
+# Objet mutable partagé: les dépendances exécutées dans le threadpool reçoivent une copie
+# du contexte, mais incrémentent bien le même compteur.
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> Optional[RequestQueryStats]:
+    return _current_stats.get()
+
+
+def instrument_engine(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = time.perf_counter() - context._query_start
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_time += elapsed
+
+
+class QueryStatsMiddleware:
+    """Compte les requêtes SQL et le temps DB de chaque requête HTTP.
+
+    Les totaux partent dans l'en-tête Server-Timing et dans le log d'accès "http.access".
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(scope)
+        token = _current_stats.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total_ms = (time.perf_counter() - start) * 1000
+                timing = f'db;dur={stats.db_time * 1000:.1f};desc="{stats.statements} queries", app;dur={total_ms:.1f}'
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"server-timing", timing.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_stats.reset(token)
+            data = {
+                "route": stats.route,
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                "db_statements": stats.statements,
+                "db_time_ms": round(stats.db_time * 1000, 2),
+            }
+            request = Request(scope)
+            if ACCESS_LOG:
+                api_log("http.access", level="INFO", request=request, data=data, tags=["http", "access"])
+            if stats.statements > SQL_STATEMENT_BUDGET:
+                api_log("http.sql_budget_exceeded", level="WARNING", request=request, data={**data, "budget": SQL_STATEMENT_BUDGET}, tags=["http", "sql"])
@@ -0,0 +1,137 @@
+import os
+from typing import Any, Callable, List, Optional, Type
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+import cache_backend
+import models
+from etag import make_etag, matches, not_modified
+from log import api_log
+
+# Cache des réponses des lectures /public, stocké dans cache_backend (mémoire du worker ou Redis).
+# Invalidation par étiquettes ("fnpc:12", "infractions_routieres:neph:123") à chaque commit
+# qui touche les fichiers concernés, via les évènements de session: les routes d'écriture
+# de fnpc.py, siv.py, fpr.py, infractions.py et proprietaires.py n'ont rien à appeler.
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+# Avec plusieurs workers, l'invalidation n'atteint tous les caches que si le backend est partagé:
+# en mémoire, une fiche (FPR comprise) modifiée resterait servie jusqu'au TTL par les autres workers
+if RESPONSE_CACHE_ENABLED and not cache_backend.SHARED and cache_backend.multiple_workers():
+    RESPONSE_CACHE_ENABLED = False
+    api_log("response_cache.disabled", level="WARNING", tags=["cache"],
+            data={"reason": "CACHE_BACKEND=memory with several workers, set CACHE_BACKEND=redis to enable the response cache"})
+RESPONSE_CACHE_TTL_S = float(os.getenv("RESPONSE_CACHE_TTL_S", "300"))
+RESPONSE_CACHE_MAX_BODY_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BODY_BYTES", str(256 * 1024)))
+
+# Modèles dont les écritures invalident le cache
+CACHED_MODELS = (models.Proprietaires, models.fnpc, models.fpr, models.siv, models.infractions_routieres)
+
+
+def record_tag(table: str, record_id: Any) -> str:
+    return f"{table}:{record_id}"
+
+
+def neph_tag(neph: Any) -> str:
+    return f"infractions_routieres:neph:{neph}"
+
+
+class CachedResponse:
+    """Corps JSON et ETag éventuel; stocké sous la forme "<etag>\n<corps>"."""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes, etag: Optional[str]) -> None:
+        self.body = body
+        self.etag = etag
+
+    def encode(self) -> bytes:
+        return (self.etag or "").encode() + b"\n" + self.body
+
+    @classmethod
+    def decode(cls, value: bytes) -> "CachedResponse":
+        etag, _, body = value.partition(b"\n")
+        return cls(body, etag.decode() or None)
+
+    def to_response(self, request: Request, hit: bool) -> Response:
+        headers = {"X-Cache": "HIT" if hit else "MISS"}
+        if self.etag is not None:
+            headers["ETag"] = self.etag
+            if_none_match = request.headers.get("if-none-match")
+            if if_none_match and matches(if_none_match, self.etag):
+                return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+def cache_key(request: Request) -> str:
+    query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+    return f"resp:{request.url.path}?{query}"
+
+
+async def _cached(request: Request, tags: List[str], build: Callable[[], Optional[CachedResponse]], checked: bool = False) -> Optional[Response]:
+    if not RESPONSE_CACHE_ENABLED:
+        entry = build()
+        return entry.to_response(request, hit=False) if entry is not None else None
+
+    built: List[bytes] = []
+
+    def build_value() -> Optional[bytes]:
+        entry = build()
+        if entry is None:
+            return None
+        value = entry.encode()
+        built.append(value)
+        # Trop gros pour le cache: servi mais pas conservé
+        return value if len(entry.body) <= RESPONSE_CACHE_MAX_BODY_BYTES else None
+
+    value, hit = await cache_backend.get_or_build(cache_key(request), build_value, RESPONSE_CACHE_TTL_S, tags, checked)
+    if value is None and built:
+        value = built[0]
+    if value is None:
+        return None
+    return CachedResponse.decode(value).to_response(request, hit=hit)
+
+
+async def cached_json(request: Request, tags: List[str], build: Callable[[], bytes]) -> Response:
+    """Réponse JSON mise en cache; build() produit le corps en cas d'absence."""
+    response = await _cached(request, tags, lambda: CachedResponse(build(), None))
+    assert response is not None
+    return response
+
+
+async def cached_record(request: Request, db: Session, model: Any, record_id: int, schema: Type[BaseModel]) -> Optional[Response]:
+    """Lecture unitaire avec cache et ETag. Renvoie None si l'enregistrement n'existe pas (404 côté route)."""
+
+    def build() -> Optional[CachedResponse]:
+        record = db.query(model).filter(model.id == record_id).first()
+        if record is None:
+            return None
+        body = schema.model_validate(record, from_attributes=True).model_dump_json().encode()
+        return CachedResponse(body, make_etag(model, record_id, record.version))
+
+    if RESPONSE_CACHE_ENABLED:
+        value = cache_backend.lookup(cache_key(request))
+        if value is not None:
+            return CachedResponse.decode(value).to_response(request, hit=True)
+    # Absent du cache: un If-None-Match à jour coûte encore une simple lecture de la version
+    unchanged = not_modified(request, db, model, record_id)
+    if unchanged is not None:
+        return unchanged
+    return await _cached(request, [record_tag(model.__tablename__, record_id)], build, checked=True)
+
+
+# ---------- Invalidation sur commit ----------
+def _tags_for(obj: Any) -> List[str]:
+    tags = [record_tag(obj.__tablename__, obj.id)]
+    if isinstance(obj, models.infractions_routieres):
+        # Ancien et nouveau NEPH: l'infraction quitte une liste et en rejoint une autre
+        history = inspect(obj).attrs.neph.history
+        for neph in {obj.neph, *history.deleted}:
+            if neph is not None:
+                tags.append(neph_tag(neph))
+    return tags
+
+
+for _model in CACHED_MODELS:
+    cache_backend.register_tagger(_model, _tags_for)
@@ -0,0 +1,113 @@
+from typing import Any, Dict, Sequence, Set, Tuple
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+
+import models
+from text_search import sql_compact
+
+# Maintenance de search_documents (omnibox /public/search/). Les documents d'un enregistrement sont
+# produits en SQL (une seule définition, utilisée pour la reconstruction complète comme pour la mise à jour
+# incrémentale): à chaque flush qui crée, modifie ou supprime un enregistrement indexé, ses documents
+# sont supprimés puis recalculés dans la même transaction. Les routes d'écriture n'ont rien à appeler.
+
+
+class Source:
+    """Documents d'une table: une clé par expression de keys, toutes avec le même libellé."""
+
+    def __init__(self, kind: str, model: Any, keys: Sequence[str], libelle: str, columns: Sequence[str]) -> None:
+        self.kind = kind
+        self.model = model
+        self.keys = keys
+        self.libelle = libelle
+        # Colonnes lues par keys et libelle: une mise à jour qui n'en touche aucune ne recalcule rien
+        self.columns = columns
+
+    def select_sql(self, where: str) -> str:
+        table = self.model.__tablename__
+        selects = [
+            f"SELECT '{self.kind}' AS kind, id AS record_id, {sql_compact(key)} AS cle, {self.libelle} AS libelle FROM {table} WHERE {where}"
+            for key in self.keys
+        ]
+        # UNION: un nom d'usage identique au nom de famille ne donne qu'un document
+        return f"SELECT kind, record_id, cle, libelle FROM ({' UNION '.join(selects)}) documents WHERE cle <> ''"
+
+    def insert_sql(self, where: str) -> str:
+        return f"INSERT INTO search_documents (kind, record_id, cle, libelle) {self.select_sql(where)}"
+
+
+SOURCES: Dict[type, Source] = {source.model: source for source in [
+    Source(
+        "proprietaire", models.Proprietaires,
+        keys=[
+            "coalesce(nom_famille, '') || ' ' || coalesce(prenom, '')",
+            "coalesce(nom_usage, '') || ' ' || coalesce(prenom, '')",
+            "coalesce(prenom, '') || ' ' || coalesce(nom_famille, '')",
+        ],
+        libelle="concat_ws(' ', nom_famille, prenom, '(' || to_char(date_naissance, 'DD/MM/YYYY') || ')')",
+        columns=("nom_famille", "nom_usage", "prenom", "date_naissance"),
+    ),
+    Source(
+        "siv", models.siv,
+        keys=["ci_numero_immatriculation"],
+        libelle="concat_ws(' ', ci_numero_immatriculation, vl_marque, vl_denomination_commerciale)",
+        columns=("ci_numero_immatriculation", "vl_marque", "vl_denomination_commerciale"),
+    ),
+    Source(
+        "fnpc", models.fnpc,
+        keys=["neph::text", "numero_titre"],
+        libelle="concat_ws(' ', 'Permis', numero_titre, '- NEPH', neph)",
+        columns=("neph", "numero_titre"),
+    ),
+    Source(
+        "user", models.Users,
+        keys=["rp_nipol", "coalesce(rp_last_name, '') || ' ' || coalesce(rp_first_name, '')"],
+        libelle="concat_ws(' ', rp_nipol, rp_grade, rp_last_name, rp_first_name)",
+        columns=("rp_nipol", "rp_grade", "rp_last_name", "rp_first_name"),
+    ),
+]}
+
+
+def rebuild(connection: Any) -> None:
+    """Reconstruction complète (migration, chargement par COPY de benchmarks.seed)."""
+    connection.execute(text("TRUNCATE search_documents RESTART IDENTITY"))
+    for source in SOURCES.values():
+        connection.execute(text(source.insert_sql("true")))
+
+
+def refresh(connection: Any, source: Source, record_ids: Sequence[int], deleted: bool = False) -> None:
+    ids = list(record_ids)
+    connection.execute(text("DELETE FROM search_documents WHERE kind = :kind AND record_id = ANY(:ids)"), {"kind": source.kind, "ids": ids})
+    if not deleted:
+        connection.execute(text(source.insert_sql("id = ANY(:ids)")), {"ids": ids})
+
+
+# ---------- Mise à jour incrémentale ----------
+def _changed(source: Source, obj: Any) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[column].history.has_changes() for column in source.columns)
+
+
+def _after_flush(session: Session, _flush_context) -> None:
+    pending: Dict[Tuple[Source, bool], Set[int]] = {}
+    for obj in session.new:
+        source = SOURCES.get(type(obj))
+        if source is not None:
+            pending.setdefault((source, False), set()).add(obj.id)
+    for obj in session.dirty:
+        source = SOURCES.get(type(obj))
+        if source is not None and _changed(source, obj):
+            pending.setdefault((source, False), set()).add(obj.id)
+    for obj in session.deleted:
+        source = SOURCES.get(type(obj))
+        if source is not None:
+            pending.setdefault((source, True), set()).add(obj.id)
+    if not pending:
+        return
+    connection = session.connection()
+    for (source, deleted), record_ids in pending.items():
+        refresh(connection, source, sorted(record_ids), deleted)
+
+
+def install(session_factory) -> None:
+    event.listen(session_factory, "after_flush", _after_flush)
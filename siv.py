@@ -1,5 +1,5 @@
 from datetime import date
-from database import SessionLocal
+from database import get_db
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, ConfigDict
@@ -7,6 +7,8 @@ from typing import Annotated, List
 import models
 from auth import get_current_user
 from log import api_log
+from fast_response import RowSerializer
+from snapshots import CollectionSnapshot
 
 
 def connection_required(current_user: Annotated[models.Users, Depends(get_current_user)]):
@@ -142,23 +144,19 @@ class sivUpdate(BaseModel):
 	model_config = ConfigDict(from_attributes=True)
 
 
-def get_db():
-	db = SessionLocal()
-	try:
-		yield db
-	finally:
-		db.close()
-
 
 db_dependency = Annotated[Session, Depends(get_db)]
 user_dependency = Annotated[models.Users, Depends(get_current_user)]
 
+siv_rows = RowSerializer(sivPublic, models.siv)
+siv_list = CollectionSnapshot(siv_rows)
+
 
 @router.get("/read/", response_model=List[sivPublic])
 async def read_all_siv(db: db_dependency, user: user_dependency, request: Request):
-	records = db.query(models.siv).all()
-	api_log("siv.read_all", level="INFO", request=request, email=user.email, user_id=user.id, tags=["siv", "list"], correlation_id=request.headers.get("x-correlation-id"))  # type: ignore
-	return records
+	response = await siv_list.response(request, db, user)
+	api_log("siv.read_all", level="INFO", request=request, email=user.email, user_id=user.id, tags=["siv", "list"], correlation_id=request.headers.get("x-correlation-id"), audit=True)  # type: ignore
+	return response
 
 
 @router.get("/read/{siv_id}/", response_model=sivPublic)
@@ -166,7 +164,7 @@ async def read_siv(siv_id: int, db: db_dependency, user: user_dependency, reques
 	record = db.query(models.siv).filter(models.siv.id == siv_id).first()
 	if not record:
 		raise HTTPException(status_code=404, detail="siv record not found")
-	api_log("siv.read_one", level="INFO", request=request, email=user.email, user_id=user.id, tags=["siv", "detail"], correlation_id=request.headers.get("x-correlation-id"))  # type: ignore
+	api_log("siv.read_one", level="INFO", request=request, email=user.email, user_id=user.id, tags=["siv", "detail"], correlation_id=request.headers.get("x-correlation-id"), data={"record_id": siv_id}, audit=True)  # type: ignore
 	return record
 
 
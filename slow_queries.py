@@ -0,0 +1,133 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Mapping
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from log import api_log, _redact, _DEFAULT_REDACT_KEYS
+from query_stats import current_stats
+
+# Toute requête SQL plus lente que SLOW_QUERY_MS est journalisée ("db.slow_query").
+# SLOW_QUERY_EXPLAIN=true ajoute un EXPLAIN (ANALYZE, BUFFERS) capturé hors requête HTTP,
+# au plus une fois par requête normalisée toutes les SLOW_QUERY_EXPLAIN_INTERVAL_S secondes.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "false").lower() == "true"
+SLOW_QUERY_EXPLAIN_INTERVAL_S = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL_S", "300"))
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "10000"))
+
+_PLACEHOLDER_LIST_RE = re.compile(r"\(\s*%\(\w+\)s(?:\s*,\s*%\(\w+\)s)+\s*\)")
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+_PARAM_SUFFIX_RE = re.compile(r"_\d+$")
+_MAX_PARAM_LENGTH = 200
+
+_explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+# Forme normalisée -> dernier EXPLAIN, dans l'ordre des EXPLAIN (le plus ancien en tête): les entrées
+# plus vieilles que l'intervalle sont retirées à chaque ajout, la taille reste bornée par le nombre
+# de formes lentes distinctes vues pendant un intervalle
+_last_explained: "OrderedDict[str, float]" = OrderedDict()
+_last_explained_lock = threading.Lock()
+
+
+def normalize_sql(statement: str) -> str:
+    """Forme canonique d'une requête: regroupe les variantes qui ne diffèrent que par les valeurs."""
+    sql = _PLACEHOLDER_LIST_RE.sub("(...)", statement)
+    sql = _STRING_LITERAL_RE.sub("?", sql)
+    sql = _NUMBER_LITERAL_RE.sub("?", sql)
+    return _WHITESPACE_RE.sub(" ", sql).strip()
+
+
+def _safe_parameters(parameters: Any) -> Any:
+    if isinstance(parameters, Mapping):
+        # SQLAlchemy suffixe les paramètres liés ("password_1"): on masque selon le nom d'origine
+        redact = set(_DEFAULT_REDACT_KEYS)
+        redact.update(k for k in parameters if _PARAM_SUFFIX_RE.sub("", str(k)).lower() in _DEFAULT_REDACT_KEYS)
+        params = _redact(dict(parameters), redact)
+        return {k: _truncate(v) for k, v in params.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_safe_parameters(p) for p in parameters[:10]]
+    return _truncate(parameters)
+
+
+def _truncate(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, str) and len(value) > _MAX_PARAM_LENGTH:
+        return value[:_MAX_PARAM_LENGTH] + "..."
+    if isinstance(value, (int, float, bool, str)) or value is None:
+        return value
+    return str(value)
+
+
+def _should_explain(statement: str, normalized: str, executemany: bool) -> bool:
+    if not SLOW_QUERY_EXPLAIN or executemany:
+        return False
+    # ANALYZE exécute réellement la requête: uniquement les lectures
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return False
+    now = time.monotonic()
+    with _last_explained_lock:
+        last = _last_explained.get(normalized)
+        if last is not None and now - last < SLOW_QUERY_EXPLAIN_INTERVAL_S:
+            return False
+        _last_explained[normalized] = now
+        _last_explained.move_to_end(normalized)
+        while _last_explained:
+            oldest, explained_at = next(iter(_last_explained.items()))
+            if now - explained_at < SLOW_QUERY_EXPLAIN_INTERVAL_S:
+                break
+            del _last_explained[oldest]
+    return True
+
+
+def _explain(engine: Engine, statement: str, parameters: Any, normalized: str, route: str | None) -> None:
+    try:
+        # Connexion DBAPI brute: pas d'évènements SQLAlchemy, donc pas de récursion
+        conn = engine.raw_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"SET LOCAL statement_timeout = {SLOW_QUERY_EXPLAIN_TIMEOUT_MS}")
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters)
+            plan = cursor.fetchone()[0]
+            cursor.close()
+            conn.rollback()
+        finally:
+            conn.close()
+        api_log("db.slow_query.explain", level="WARNING", data={"sql": normalized, "route": route, "plan": plan}, tags=["db", "slow_query"])
+    except Exception as e:
+        api_log("db.slow_query.explain.failed", level="ERROR", data={"sql": normalized, "route": route}, err=e, tags=["db", "slow_query"])
+
+
+def instrument_engine(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        context._slow_query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        duration_ms = (time.perf_counter() - context._slow_query_start) * 1000
+        if duration_ms < SLOW_QUERY_MS:
+            return
+        stats = current_stats()
+        route = stats.route if stats is not None else None
+        normalized = normalize_sql(statement)
+        api_log(
+            "db.slow_query",
+            level="WARNING",
+            data={
+                "sql": normalized,
+                "parameters": _safe_parameters(parameters),
+                "duration_ms": round(duration_ms, 2),
+                "route": route,
+                "executemany": executemany,
+            },
+            tags=["db", "slow_query"],
+        )
+        if _should_explain(statement, normalized, executemany):
+            _explainer.submit(_explain, engine, statement, parameters, normalized, route)
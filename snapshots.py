@@ -0,0 +1,95 @@
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import compression
+from coalesce import coalesced
+from etag import matches
+from fast_response import RowSerializer
+from metrics import SNAPSHOT_REQUESTS
+from models import TableRevisions
+
+# Instantanés des routes de liste complète: le JSON sérialisé (et ses variantes compressées,
+# calculées à la première demande de chaque encodage) est gardé tant que la révision de la table
+# ne change pas. La révision est incrémentée par un trigger à chaque écriture (table_revisions):
+# une lecture répétée coûte une requête sur une clé primaire et une copie mémoire.
+# Un instantané par route et par worker; une table sans ligne de révision (base créée par
+# create_all, sans triggers) n'est jamais mise en instantané.
+SNAPSHOTS_ENABLED = os.getenv("SNAPSHOTS_ENABLED", "true").lower() == "true"
+SNAPSHOTS_PRECOMPRESS = os.getenv("SNAPSHOTS_PRECOMPRESS", "true").lower() == "true"
+
+
+def table_revision(db: Session, table: str) -> Optional[int]:
+    return db.execute(select(TableRevisions.revision).where(TableRevisions.table_name == table)).scalar_one_or_none()
+
+
+class _Snapshot:
+    __slots__ = ("revision", "body", "etag", "encoded")
+
+    def __init__(self, revision: int, body: bytes, etag: str) -> None:
+        self.revision = revision
+        self.body = body
+        self.etag = etag
+        self.encoded: Dict[str, bytes] = {}
+
+
+class CollectionSnapshot:
+    """Réponse d'une route de liste complète, reconstruite seulement quand la table change.
+
+        fnpc_list = CollectionSnapshot(fnpc_rows)
+
+        @router.get("/read/", response_model=List[fnpcPublic])
+        async def read_all(db: db_dependency, user: user_dependency, request: Request):
+            return await fnpc_list.response(request, db, user)
+    """
+
+    def __init__(self, rows: RowSerializer) -> None:
+        self.rows = rows
+        self.table = rows.model.__tablename__
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = threading.Lock()
+
+    async def response(self, request: Request, db: Session, user: Any) -> Response:
+        revision = table_revision(db, self.table) if SNAPSHOTS_ENABLED else None
+        if revision is None:
+            return Response(content=await coalesced(request, user, lambda build_db: self.rows.dump_rows(build_db)), media_type="application/json")
+        route = getattr(request.scope.get("route"), "path", None) or request.url.path
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.revision == revision:
+            SNAPSHOT_REQUESTS.labels(route, "hit").inc()
+        else:
+            SNAPSHOT_REQUESTS.labels(route, "rebuild").inc()
+            # Révision lue avant les lignes: si une écriture s'intercale, l'instantané est plus récent
+            # que sa révision et sera simplement reconstruit à la requête suivante
+            body = await coalesced(request, user, lambda build_db: self.rows.dump_rows(build_db), variant=f"rev={revision}")
+            snapshot = _Snapshot(revision, body, f'W/"{self.table}-rev-{revision}"')
+            with self._lock:
+                if self._snapshot is None or self._snapshot.revision <= revision:
+                    self._snapshot = snapshot
+        return await self._send(request, snapshot)
+
+    async def _send(self, request: Request, snapshot: _Snapshot) -> Response:
+        headers = {"ETag": snapshot.etag}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and matches(if_none_match, snapshot.etag):
+            return Response(status_code=304, headers=headers)
+        chosen = compression.negotiate(request.headers.get("accept-encoding", "")) if SNAPSHOTS_PRECOMPRESS and compression.COMPRESSION_ENABLED else None
+        if chosen is None or len(snapshot.body) < compression.COMPRESSION_MIN_SIZE:
+            return Response(content=snapshot.body, media_type="application/json", headers=headers)
+        encoding, factory = chosen
+        data = snapshot.encoded.get(encoding)
+        if data is None:
+            def compress() -> bytes:
+                compressor = factory()
+                return compressor.compress(snapshot.body) + compressor.finish()
+            data = await run_in_threadpool(compress)
+            snapshot.encoded[encoding] = data
+        # Content-Encoding déjà posé: CompressionMiddleware laisse passer tel quel
+        headers["Content-Encoding"] = encoding
+        headers["Vary"] = "Accept-Encoding"
+        return Response(content=data, media_type="application/json", headers=headers)
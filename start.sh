@@ -27,6 +27,12 @@ echo "[start] Running Alembic migrations..."
 alembic upgrade head
 
 echo "[start] Launching API..."
+# Metrics multi-workers: le répertoire des collecteurs doit être vide au démarrage
+if [ -n "${PROMETHEUS_MULTIPROC_DIR:-}" ]; then
+  rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+  mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+  echo "[start] Prometheus multiprocess dir: $PROMETHEUS_MULTIPROC_DIR"
+fi
 # Allow configuring which proxy IPs are trusted for X-Forwarded-* headers.
 # Default to the current Nginx container IP if not provided.
 # You can override this at runtime with FORWARDED_ALLOW_IPS (comma-separated list),
@@ -0,0 +1,96 @@
+import re
+from typing import Any, Iterable, Optional
+
+# Normalisation des noms pour la recherche: sans accents ni casse, lettres et chiffres séparés par
+# une espace ("Lefèvre-Dupont" -> "lefevre dupont"). La même règle existe en SQL (sql_normalize) pour
+# les colonnes générées: la requête et la colonne sont normalisées à l'identique.
+# translate() plutôt qu'unaccent(): unaccent n'est pas IMMUTABLE et ne peut pas servir dans une
+# colonne générée ou un index. Majuscules accentuées incluses: lower() de PostgreSQL ne les traite
+# pas avec une locale C.
+ACCENTS = "àâäáãåāăąçćčĉďđéèêëēėęěĝğíìîïīįĵķĺľłñńňóòôöõøōőŕřśšşťţúùûüūůűųŵýÿŷźžżÀÂÄÁÃÅĀĂĄÇĆČĈĎĐÉÈÊËĒĖĘĚĜĞÍÌÎÏĪĮĴĶĹĽŁÑŃŇÓÒÔÖÕØŌŐŔŘŚŠŞŤŢÚÙÛÜŪŮŰŲŴÝŸŶŹŽŻ"
+SANS_ACCENTS = "aaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzzaaaaaaaaaccccddeeeeeeeeggiiiiiijklllnnnoooooooorrsssttuuuuuuuuwyyyzzz"
+LIGATURES = (("œ", "oe"), ("Œ", "OE"), ("æ", "ae"), ("Æ", "AE"), ("ß", "ss"))
+
+_TRANSLATION = str.maketrans(ACCENTS, SANS_ACCENTS)
+_SEPARATORS = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: Any) -> str:
+    if text is None:
+        return ""
+    text = str(text)
+    for ligature, replacement in LIGATURES:
+        text = text.replace(ligature, replacement)
+    return _SEPARATORS.sub(" ", text.translate(_TRANSLATION).lower()).strip()
+
+
+def compact(text: Any) -> str:
+    """normalize() sans espaces: clé des préfixes de l'omnibox ("AB-123 cd" -> "ab123cd")."""
+    return normalize(text).replace(" ", "")
+
+
+def sql_normalize(expression: str) -> str:
+    """Expression SQL IMMUTABLE équivalente à normalize() appliquée à expression."""
+    for ligature, replacement in LIGATURES:
+        expression = f"replace({expression}, '{ligature}', '{replacement}')"
+    return f"btrim(regexp_replace(lower(translate({expression}, '{ACCENTS}', '{SANS_ACCENTS}')), '[^a-z0-9]+', ' ', 'g'))"
+
+
+def sql_compact(expression: str) -> str:
+    """Expression SQL équivalente à compact() appliquée à expression."""
+    return f"replace({sql_normalize(expression)}, ' ', '')"
+
+
+# ---------- Clés phonétiques ----------
+# Clé phonétique française simplifiée (dans l'esprit de Phonex et Soundex-FR, sans troncature):
+# deux graphies qui se prononcent pareil ("Dupont"/"Dupond", "Gauthier"/"Gotier", "Lefebvre"/"Lefèvre")
+# donnent la même clé. Les chiffres notent des sons sans lettre dédiée: 1 = in, 2 = an, 3 = ou,
+# 4 = oi, 5 = ch, 6 = on, 9 = eu. Calculée en Python: pas d'équivalent SQL, les colonnes
+# *_phonetique sont renseignées par les routes d'écriture de proprietaires.py.
+_PHONETIC_CONSONANTS = [
+    (r"y", "i"), (r"ph", "f"), (r"s?[cs]h", "5"), (r"h", ""),
+    (r"gu(?=[ei])", "k"), (r"g(?=[ei])", "j"), (r"gn", "n"), (r"g", "k"),
+    (r"qu?", "k"), (r"c(?=[ei])", "s"), (r"c", "k"), (r"x$", ""), (r"x", "ks"),
+    (r"w", "v"), (r"z", "s"), (r"bv", "v"),
+]
+_PHONETIC_ENDINGS = [(r"[dts]+$", ""), (r"ier$", "ie")]
+_PHONETIC_VOWELS = [
+    (r"e?au", "o"), (r"oi", "4"), (r"ou", "3"),
+    (r"(?:ai|ei)[nm](?![aeiou])", "1"), (r"[iu][nm](?![aeiou])", "1"),
+    (r"[ae][nm](?![aeiou])", "2"), (r"o[nm](?![aeiou])", "6"),
+    (r"ai|ei", "e"), (r"eu|oe", "9"), (r"(?<=.)e+$", ""),
+]
+_DOUBLES = re.compile(r"(.)\1+")
+_NOT_LETTERS = re.compile(r"[^a-z]+")
+
+
+def _apply(rules: Iterable[Any], text: str) -> str:
+    for pattern, replacement in rules:
+        text = re.sub(pattern, replacement, text)
+    return text
+
+
+def phonetic_key(text: Any) -> Optional[str]:
+    """Clé phonétique d'un nom (mots composés accolés: "Le Roy" et "Leroy" coïncident); None si vide."""
+    if text is None:
+        return None
+    # La cédille se prononce "s": à traiter avant la suppression des accents
+    word = _NOT_LETTERS.sub("", normalize(str(text).replace("ç", "s").replace("Ç", "S")))
+    if not word:
+        return None
+    word = _DOUBLES.sub(r"\1", _apply(_PHONETIC_CONSONANTS, word))
+    word = _apply(_PHONETIC_VOWELS, _apply(_PHONETIC_ENDINGS, word))
+    return _DOUBLES.sub(r"\1", word) or None
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Distance de Levenshtein (insertion, suppression, substitution)."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]